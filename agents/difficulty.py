@@ -0,0 +1,115 @@
+import math
+
+from .question_bank import DIFFICULTIES, DIFFICULTY_RATINGS
+
+# Glicko-style online ability estimate. Each stage keeps a rating and a rating
+# deviation (rd); rd shrinks as scored answers come in, and once it is small
+# enough the stage has all the signal it needs and can end early.
+INITIAL_RATING = DIFFICULTY_RATINGS["medium"]
+INITIAL_RD = 350.0
+MIN_RD = 50.0
+STAGE_START_RD = 200.0
+
+# Per stage: (minimum questions, maximum questions, rd at which we stop)
+STAGE_LIMITS = {
+    "technical": (3, 10, 135.0),
+    "dsa": (1, 2, 180.0),
+}
+
+# Don't stop right after an answer that contradicted the estimate
+MAX_SURPRISE = 0.25
+
+_Q = math.log(10) / 400
+
+
+def new_ability(rating=INITIAL_RATING, rd=INITIAL_RD):
+    return {"rating": rating, "rd": rd, "answered": 0, "surprise": 1.0, "topics": {}}
+
+
+def get_stage_ability(ability, stage):
+    """
+    Returns the ability estimate for a stage. A stage seen for the first time
+    starts from the best rating estimate so far, with a widened deviation.
+    """
+    ability = ability or {}
+    if stage in ability:
+        return ability[stage]
+    if ability:
+        best = min(ability.values(), key=lambda a: a["rd"])
+        return new_ability(best["rating"], max(best["rd"], STAGE_START_RD))
+    return new_ability()
+
+
+def expected_score(rating, question_rating):
+    """Probability-like expectation (0-1) that the candidate answers well."""
+    return 1 / (1 + 10 ** ((question_rating - rating) / 400))
+
+
+def update_ability(stage_ability, score, question_rating, topic=None):
+    """
+    Folds one 1-10 feedback score into the stage's ability estimate and
+    returns the new estimate. The input dict is not modified.
+    """
+    outcome = min(max((score - 1) / 9, 0.0), 1.0)
+    rating = stage_ability["rating"]
+    rd = stage_ability["rd"]
+
+    expected = expected_score(rating, question_rating)
+    d_squared = 1 / (_Q ** 2 * expected * (1 - expected))
+    new_rd_squared = 1 / (1 / rd ** 2 + 1 / d_squared)
+
+    topics = dict(stage_ability.get("topics", {}))
+    if topic:
+        count, mean = topics.get(topic, [0, 0.0])
+        topics[topic] = [count + 1, mean + (score - mean) / (count + 1)]
+
+    return {
+        "rating": rating + _Q * new_rd_squared * (outcome - expected),
+        "rd": max(math.sqrt(new_rd_squared), MIN_RD),
+        "answered": stage_ability.get("answered", 0) + 1,
+        "surprise": abs(outcome - expected),
+        "topics": topics,
+    }
+
+
+def pick_difficulty(stage_ability):
+    """Difficulty tag whose base rating is closest to the current estimate."""
+    rating = stage_ability["rating"]
+    return min(DIFFICULTIES, key=lambda d: abs(DIFFICULTY_RATINGS[d] - rating))
+
+
+def pick_topic(stage_ability, topics):
+    """
+    Next topic to probe: the least-asked one, preferring topics where the
+    candidate has scored lowest so weak areas get confirmed quickly.
+    """
+    if not topics:
+        return None
+    seen = stage_ability.get("topics", {})
+
+    def priority(topic):
+        count, mean = seen.get(topic, [0, 0.0])
+        return (count, mean)
+
+    return min(topics, key=priority)
+
+
+def stage_complete(stage_ability, stage, questions_asked):
+    """True once the stage hit its question cap or the estimate is confident enough."""
+    min_questions, max_questions, stop_rd = STAGE_LIMITS[stage]
+    if questions_asked >= max_questions:
+        return True
+    return (
+        questions_asked >= min_questions
+        and stage_ability["rd"] <= stop_rd
+        and stage_ability.get("surprise", 1.0) <= MAX_SURPRISE
+    )
+
+
+def profile_topics(profile):
+    """Candidate-specific topics to rotate through in the technical stage."""
+    profile = profile or {}
+    topics = profile.get("recommended_topics") or profile.get("skills") or []
+    if isinstance(topics, str):
+        topics = [t.strip() for t in topics.split(",") if t.strip()]
+    return [str(t) for t in topics]
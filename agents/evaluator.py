@@ -1,15 +1,34 @@
 import sys
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import AIMessage
+import json
+
+from .question_bank import get_bank, run_tests
+from .prompts import CODE_EVALUATION
+from .state import ai, candidate_key
+from utils.mcp_client import get_client
+
+
+def format_results(problem, run):
+    """The test run as lines for the evaluation prompt."""
+    if run["error"]:
+        return f"The code could not run: {run['error']}"
+    lines = [f"{run['passed']}/{run['total']} tests passed."]
+    for r in run["results"]:
+        call = f"{problem['function_name']}(*{json.dumps(r['input'])})"
+        if r["passed"]:
+            lines.append(f"- PASS {call}")
+        elif "error" in r:
+            lines.append(f"- FAIL {call} raised {r['error']}")
+        else:
+            lines.append(f"- FAIL {call} returned {json.dumps(r['output'], default=repr)}, expected {json.dumps(r['expected'])}")
+    return "\n".join(lines)
 
-llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash-exp")
 
 def evaluator_node(state):
     """
-    Agent C: Verifies coding answers by using LLM to simulate and evaluate.
+    Agent C: Runs coding answers against the problem's tests and has the
+    LLM review the code and explain the results.
     """
-    print("--- CODE EVALUATOR (LLM) ---")
+    print("--- CODE EVALUATOR ---")
     messages = state["messages"]
     last_message = messages[-1]
     
@@ -22,38 +41,49 @@ def evaluator_node(state):
         code_block = content.split("```")[1].split("```")[0].strip()
         
     if not code_block:
-        return {"messages": [AIMessage(content="I didn't detect any code to run. Please provide your solution in a Python code block.")]}
+        return {
+            "code_output": None,
+            "code_tests": None,
+            "messages": [ai("I didn't detect any code to run. Please provide your solution in a Python code block.")]
+        }
     
-    # Evaluate using LLM (Simulation + Feedback)
-    eval_prompt = ChatPromptTemplate.from_template(
-        """
-        You are an expert Python Code Evaluator.
-        
-        User Code:
-        ```python
-        {code}
-        ```
-        
-        Please perform the following:
-        1. **Simulate Execution**: Predict exactly what this code would output if run.
-        2. **Evaluation**: Is the code correct, efficient, and following best practices?
-        
-        Format your response as:
-        **Predicted Output:**
-        ```
-        [Output here]
-        ```
-        
-        **Feedback:**
-        [Your detailed feedback here]
-        """
-    )
+    # Run against the bank's test suite when the problem came from it
+    # (problems the LLM wrote on the spot have none)
+    code_tests = None
+    code_output = "No tests available for this problem."
+    results = "No tests available; judge correctness from the code."
+    problem = get_bank().get(state.get("current_problem_id") or "")
+    if problem and problem["tests"]:
+        run = run_tests(problem, code_block)
+        code_tests = {"passed": run["passed"], "total": run["total"], "error": run["error"]}
+        code_output = f"Could not run: {run['error']}" if run["error"] else f"{run['passed']}/{run['total']} tests passed"
+        results = format_results(problem, run)
+
+    result = CODE_EVALUATION.invoke({"code": code_block, "results": results})
+    evaluation = result.content
     
-    chain = eval_prompt | llm
-    result = chain.invoke({"code": code_block})
+    # Compare with the stored submissions to the same problem from other
+    # sessions and candidates (MinHash/LSH), leaving out the code the bank's
+    # own solutions share. The result is for the interviewer's report only;
+    # the candidate's evaluation never mentions it.
+    code_similarity = None
+    base_code = [problem["reference_solution"]] + problem["canonical_solutions"] if problem else []
+    try:
+        content = get_client().call_tool("check_code_similarity", {
+            "session_id": state.get("session_id") or "",
+            "problem_id": state.get("current_problem_id") or "",
+            "code": code_block,
+            "candidate": candidate_key(state),
+            "base_code_json": json.dumps(base_code) if base_code else ""
+        })
+        code_similarity = json.loads(content[0]["text"])
+    except Exception as e:
+        print(f"Could not check code similarity: {e}")
     
-    # We treat the whole LLM response as the "output" for the user to see
+    # The test results score the answer (see feedback_generator_node)
     return {
-        "code_output": "LLM Simulated Execution", # Placeholder for state
-        "messages": [AIMessage(content=result.content)]
+        "code_output": code_output,
+        "code_tests": code_tests,
+        "code_similarity": code_similarity,
+        "messages": [ai(evaluation)]
     }
@@ -1,18 +1,17 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import AIMessage
 from typing import Dict, Any
+import json
 import os
 from dotenv import load_dotenv
 
+from .difficulty import get_stage_ability, update_ability, INITIAL_RATING
+from .question_bank import record_attempt
+from .prompts import ANSWER_FEEDBACK, FINAL_FEEDBACK
+from .state import Feedback, ai, as_feedback, message_text
+from utils.mcp_client import get_client
+
 # Load environment variables
 load_dotenv()
 
-# Initialize LLM with API key
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash-exp",
-    google_api_key=os.getenv("GOOGLE_API_KEY")
-)
 
 def feedback_generator_node(state):
     """
@@ -27,49 +26,39 @@ def feedback_generator_node(state):
     if len(messages) < 2:
         return {"feedbacks": []}
     
-    last_ai_msg = None
-    last_user_msg = None
-    
-    # Find the last AI and user messages
-    for msg in reversed(messages):
-        if hasattr(msg, 'type'):
-            if msg.type == "ai" and last_ai_msg is None:
-                last_ai_msg = msg.content
-            elif msg.type == "human" and last_user_msg is None:
-                last_user_msg = msg.content
-        if last_ai_msg and last_user_msg:
+    question_index = None
+    answer_index = None
+    
+    # Find the last user message and the AI message it answers (a code
+    # evaluation may follow the answer)
+    for index in range(len(messages) - 1, -1, -1):
+        msg_type = getattr(messages[index], "type", None)
+        if msg_type == "human" and answer_index is None:
+            answer_index = index
+        elif msg_type == "ai" and answer_index is not None:
+            question_index = index
             break
     
-    if not last_ai_msg or not last_user_msg:
+    if question_index is None or answer_index is None:
         return {"feedbacks": []}
     
-    # Generate feedback using LLM
-    feedback_prompt = ChatPromptTemplate.from_template(
-        """
-        You are an expert Technical Interviewer providing constructive feedback.
-        
-        Interview Stage: {stage}
-        Question: {question}
-        Candidate's Answer: {answer}
-        
-        Please provide:
-        1. Brief feedback (2-3 sentences) on the answer quality
-        2. A score from 1-10 based on:
-           - Clarity and completeness
-           - Technical accuracy
-           - Depth of understanding
-        
-        Format your response as:
-        **Feedback:** [Your feedback here]
-        **Score:** [X/10]
-        """
-    )
+    last_ai_msg = messages[question_index].content
+    last_user_msg = messages[answer_index].content
+    
+    # Code run against the problem's tests (see evaluator_node)
+    code_tests = state.get("code_tests") if stage == "dsa" else None
+    answer = last_user_msg
+    if code_tests:
+        answer += "\n\nTest run: " + (
+            f"the code could not run ({code_tests['error']})" if code_tests["error"]
+            else f"{code_tests['passed']}/{code_tests['total']} tests passed"
+        )
     
-    chain = feedback_prompt | llm
-    result = chain.invoke({
+    # Generate feedback using LLM
+    result = ANSWER_FEEDBACK.invoke({
         "stage": stage.upper(),
         "question": last_ai_msg,
-        "answer": last_user_msg
+        "answer": answer
     })
     
     feedback_text = result.content
@@ -83,15 +72,55 @@ def feedback_generator_node(state):
         except:
             score = 5
     
-    feedback_entry = {
-        "question": last_ai_msg,
-        "answer": last_user_msg,
-        "feedback": feedback_text,
-        "score": score,
-        "stage": stage
-    }
+    # A submission's score is its pass rate, not the LLM's opinion of it
+    if code_tests:
+        score = 1 if code_tests["error"] else round(1 + 9 * code_tests["passed"] / code_tests["total"])
+    
+    # Fold the score into the running ability estimate that drives the
+    # next question's difficulty and when the stage ends
+    question = state.get("current_question") or {}
+    question_rating = question.get("rating", INITIAL_RATING)
+    ability = dict(state.get("ability") or {})
+    ability[stage] = update_ability(
+        get_stage_ability(ability, stage),
+        score,
+        question_rating,
+        question.get("topic")
+    )
+
+    if stage == "dsa" and state.get("current_problem_id"):
+        try:
+            record_attempt(state["current_problem_id"], score)
+        except Exception as e:
+            print(f"Could not record attempt: {e}")
+    
+    # The question and answer are referenced by message index, not copied
+    feedback_entry = Feedback(
+        stage=stage,
+        score=score,
+        question=question_index,
+        answer=answer_index,
+        feedback=feedback_text,
+        topic=question.get("topic"),
+        difficulty=question.get("difficulty")
+    )
     
-    return {"feedbacks": [feedback_entry]}
+    # Structured score row for the cohort analytics export
+    try:
+        get_client().call_tool("insert_interview_log", {
+            "session_id": state.get("session_id") or "",
+            "question": last_ai_msg,
+            "answer": last_user_msg,
+            "evaluation": feedback_text,
+            "score": score,
+            "stage": stage,
+            "topic": question.get("topic") or "",
+            "difficulty": question.get("difficulty") or ""
+        })
+    except Exception as e:
+        print(f"Could not log interaction: {e}")
+    
+    return {"feedbacks": [feedback_entry], "ability": ability}
 
 
 def final_feedback_node(state):
@@ -99,17 +128,19 @@ def final_feedback_node(state):
     Aggregates all feedbacks and provides comprehensive final evaluation.
     """
     print("--- FINAL FEEDBACK ---")
-    feedbacks = state.get("feedbacks", [])
+    # Only scored entries count; the ambiguity checker also leaves clarity notes
+    messages = state.get("messages", [])
+    feedbacks = [f for f in map(as_feedback, state.get("feedbacks", [])) if f.score is not None]
     candidate_profile = state.get("candidate_profile", {})
     
     if not feedbacks:
         return {
-            "messages": [AIMessage(content="No feedback available to generate final evaluation.")],
+            "messages": [ai("No feedback available to generate final evaluation.")],
             "interview_stage": "completed"
         }
     
     # Calculate average score
-    total_score = sum(f.get("score", 0) for f in feedbacks)
+    total_score = sum(f.score for f in feedbacks)
     avg_score = total_score / len(feedbacks) if feedbacks else 0
     
     # Group feedbacks by stage
@@ -120,46 +151,19 @@ def final_feedback_node(state):
     }
     
     for fb in feedbacks:
-        stage = fb.get("stage", "unknown")
-        if stage in stage_feedbacks:
-            stage_feedbacks[stage].append(fb)
-    
-    # Generate comprehensive feedback
-    final_prompt = ChatPromptTemplate.from_template(
-        """
-        You are an expert Technical Interviewer providing a comprehensive final evaluation.
-        
-        Candidate: {candidate_name}
-        Total Questions: {total_questions}
-        Average Score: {avg_score:.1f}/10
-        
-        Individual Feedbacks:
-        {feedback_summary}
-        
-        Please provide a comprehensive final evaluation with:
-        1. **Overall Performance Summary** - High-level assessment
-        2. **Strengths** - Key strong points demonstrated
-        3. **Areas for Improvement** - Specific suggestions
-        4. **Stage-wise Analysis**:
-           - Self Introduction: Brief comments
-           - Technical Questions: Brief comments
-           - DSA/Coding: Brief comments (if applicable)
-        5. **Final Rating** - Overall score out of 10 and recommendation
-        
-        Be constructive, specific, and professional. Format in clear markdown.
-        """
-    )
+        if fb.stage in stage_feedbacks:
+            stage_feedbacks[fb.stage].append(fb)
     
     # Build feedback summary
     feedback_summary = ""
     for i, fb in enumerate(feedbacks, 1):
-        feedback_summary += f"\n{i}. [{fb['stage'].upper()}] Score: {fb['score']}/10\n"
-        feedback_summary += f"   Q: {fb['question'][:100]}...\n"
-        feedback_summary += f"   A: {fb['answer'][:100]}...\n"
-        feedback_summary += f"   Feedback: {fb['feedback'][:150]}...\n"
+        feedback_summary += f"\n{i}. [{(fb.stage or 'unknown').upper()}] Score: {fb.score}/10\n"
+        feedback_summary += f"   Q: {message_text(messages, fb.question)[:100]}...\n"
+        feedback_summary += f"   A: {message_text(messages, fb.answer)[:100]}...\n"
+        feedback_summary += f"   Feedback: {fb.feedback[:150]}...\n"
     
-    chain = final_prompt | llm
-    result = chain.invoke({
+    # Generate comprehensive feedback
+    result = FINAL_FEEDBACK.invoke({
         "candidate_name": candidate_profile.get("name", "Candidate"),
         "total_questions": len(feedbacks),
         "avg_score": avg_score,
@@ -173,14 +177,23 @@ def final_feedback_node(state):
         "overall_score": round(avg_score, 1),
         "total_questions": len(feedbacks),
         "stage_scores": {
-            "self_intro": round(sum(f["score"] for f in stage_feedbacks["self_intro"]) / len(stage_feedbacks["self_intro"]), 1) if stage_feedbacks["self_intro"] else 0,
-            "technical": round(sum(f["score"] for f in stage_feedbacks["technical"]) / len(stage_feedbacks["technical"]), 1) if stage_feedbacks["technical"] else 0,
-            "dsa": round(sum(f["score"] for f in stage_feedbacks["dsa"]) / len(stage_feedbacks["dsa"]), 1) if stage_feedbacks["dsa"] else 0
+            "self_intro": round(sum(f.score for f in stage_feedbacks["self_intro"]) / len(stage_feedbacks["self_intro"]), 1) if stage_feedbacks["self_intro"] else 0,
+            "technical": round(sum(f.score for f in stage_feedbacks["technical"]) / len(stage_feedbacks["technical"]), 1) if stage_feedbacks["technical"] else 0,
+            "dsa": round(sum(f.score for f in stage_feedbacks["dsa"]) / len(stage_feedbacks["dsa"]), 1) if stage_feedbacks["dsa"] else 0
         }
     }
     
+    try:
+        get_client().call_tool("record_session_result", {
+            "session_id": state.get("session_id") or "",
+            "candidate_name": candidate_profile.get("name", "Candidate"),
+            "final_score_json": json.dumps(final_score)
+        })
+    except Exception as e:
+        print(f"Could not record session result: {e}")
+    
     return {
-        "messages": [AIMessage(content=final_feedback_text)],
+        "messages": [ai(final_feedback_text)],
         "final_score": final_score,
         "interview_stage": "completed"
     }
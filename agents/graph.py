@@ -1,9 +1,12 @@
 from typing import TypedDict, List, Dict, Any, Annotated
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.sqlite import SqliteSaver
-from langchain_core.messages import BaseMessage
+from langgraph.types import Command
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
 import operator
+import sqlite3
 import os
+import threading
 
 from .interviewer import (
     self_intro_node,
@@ -14,31 +17,90 @@ from .interviewer import (
 from .feedback_generator import feedback_generator_node, final_feedback_node
 from .resume_analyst import analyze_resume
 from .evaluator import  evaluator_node
+from .state import Message, Feedback, human, SERDE_TYPES
+from utils.telemetry import traced_node
+from utils.recorder import RecordingGraph, recorded_node
+from utils.config import CHECKPOINT_PATH, CHECKPOINT_URL, RECORD_DIR, SQLITE_BUSY_TIMEOUT
 
 
 class AgentState(TypedDict):
-    messages: Annotated[List[BaseMessage], operator.add]
-    feedbacks: Annotated[List[Dict[str, Any]], operator.add]
+    messages: Annotated[List[Message], operator.add]
+    feedbacks: Annotated[List[Feedback], operator.add]
     candidate_profile: Dict[str, Any]
     interview_stage: str
     questions_asked: int
     ambiguity_detected: bool
     session_id: str
     resume_text: str
+    resume_hash: str
+    current_problem_id: str
+    current_question: Dict[str, Any]
+    ability: Dict[str, Any]
+    asked_problem_ids: Annotated[List[str], operator.add]
+    code_output: str
+    code_tests: Dict[str, Any]
+    code_similarity: Dict[str, Any]
+
+
+def route_answer(state):
+    """The node that handles a candidate answer in the current stage."""
+    stage = state.get("interview_stage")
 
+    if stage in (None, "self_intro"):
+        return "self_intro"
+    if stage == "technical":
+        return "ambiguity_checker"
+    if stage == "dsa":
+        return "code_evaluator"
+    if stage == "final_feedback":
+        return "final_feedback"
 
-def route_after_self_intro(state):
-    return "technical_questions" if state.get("interview_stage") == "technical" else "self_intro"
+    return END
 
 
-def route_after_technical(state):
-    messages = state["messages"]
+def turn_input(snapshot, message):
+    """
+    Graph input for a candidate answer, given the thread's state snapshot.
+    A run ends wherever the graph waits for the candidate, and the answer
+    resumes it with a Command that goes straight to the node handling it,
+    skipping the entry step and its checkpoint.
+    """
+    return Command(
+        update={"messages": [human(message)]},
+        goto=route_answer(snapshot.values)
+    )
+
+
+def route_entry(state):
+    """Fresh threads, and threads rebuilt from client history, start at the node for the current stage."""
+    stage = state.get("interview_stage")
+    messages = state.get("messages") or []
 
-    if not messages:
+    if not stage:
+        return "resume_analyst" if state.get("resume_text") else "self_intro"
+    if messages and messages[-1].type == "human":
+        return route_answer(state)
+    if stage == "technical":
+        return "technical_questions"
+    if stage == "dsa":
+        return "dsa_questions"
+    if stage == "final_feedback":
+        return "final_feedback"
+    if stage == "completed":
         return END
 
-    if messages[-1].type == "human":
-        return "ambiguity_checker"
+    return "self_intro"
+
+
+def route_after_self_intro(state):
+    # Anything other than moving on means we're waiting for the candidate
+    return "technical_questions" if state.get("interview_stage") == "technical" else END
+
+
+def route_after_technical(state):
+    # Stage ended early or hit its cap: ask the first DSA problem right away
+    if state.get("interview_stage") == "dsa":
+        return "dsa_questions"
 
     return END
 
@@ -63,83 +125,168 @@ def route_after_feedback(state):
 
 
 def route_after_dsa(state):
-    messages = state["messages"]
-
-    if messages and messages[-1].type == "human":
-        return "code_evaluator"
+    if state.get("interview_stage") == "final_feedback":
+        return "final_feedback"
 
     return END
 
 
-workflow = StateGraph(AgentState)
-
-workflow.add_node("resume_analyst", analyze_resume)
-workflow.add_node("self_intro", self_intro_node)
-workflow.add_node("technical_questions", technical_questions_node)
-workflow.add_node("ambiguity_checker", ambiguity_checker_node)
-workflow.add_node("technical_feedback", feedback_generator_node)
-workflow.add_node("dsa_questions", dsa_questions_node)
-workflow.add_node("code_evaluator", evaluator_node)
-workflow.add_node("final_feedback", final_feedback_node)
-
-workflow.set_entry_point("resume_analyst")
-
-workflow.add_edge("resume_analyst", "self_intro")
-
-workflow.add_conditional_edges(
-    "self_intro",
-    route_after_self_intro,
-    {
-        "self_intro": "self_intro",
-        "technical_questions": "technical_questions"
-    }
-)
-
-workflow.add_conditional_edges(
-    "technical_questions",
-    route_after_technical,
-    {
-        "ambiguity_checker": "ambiguity_checker",
-        END: END
-    }
-)
-
-workflow.add_conditional_edges(
-    "ambiguity_checker",
-    route_after_ambiguity,
-    {
-        "technical_feedback": "technical_feedback",
-        END: END
-    }
-)
-
-workflow.add_conditional_edges(
-    "technical_feedback",
-    route_after_feedback,
-    {
-        "technical_questions": "technical_questions",
-        "dsa_questions": "dsa_questions",
-        "final_feedback": "final_feedback",
-        END: END
-    }
-)
-
-workflow.add_conditional_edges(
-    "dsa_questions",
-    route_after_dsa,
-    {
-        "code_evaluator": "code_evaluator",
-        END: END
-    }
-)
-
-workflow.add_edge("final_feedback", END)
-
-checkpoint_dir = os.path.join(os.path.dirname(__file__), "checkpoints")
-os.makedirs(checkpoint_dir, exist_ok=True)
-
-memory = SqliteSaver.from_conn_string(
-    os.path.join(checkpoint_dir, "vintervu.db")
-)
-
-app_graph = workflow.compile(checkpointer=memory)
+def node(name, fn):
+    """A graph node, traced and (for runs being recorded) captured."""
+    return traced_node(name, recorded_node(name, fn))
+
+
+def build_workflow():
+    """
+    A run ends (END) wherever the graph waits for the candidate; turn_input
+    resumes it at the node that handles the answer, so every node that runs
+    in a turn does work. Submissions are run against their tests, then
+    scored, before dsa_questions runs, so the ability estimate is current
+    when it decides whether another problem is needed.
+    """
+    workflow = StateGraph(AgentState)
+
+    workflow.add_node("resume_analyst", node("resume_analyst", analyze_resume))
+    workflow.add_node("self_intro", node("self_intro", self_intro_node))
+    workflow.add_node("technical_questions", node("technical_questions", technical_questions_node))
+    workflow.add_node("ambiguity_checker", node("ambiguity_checker", ambiguity_checker_node))
+    workflow.add_node("technical_feedback", node("technical_feedback", feedback_generator_node))
+    workflow.add_node("dsa_questions", node("dsa_questions", dsa_questions_node))
+    workflow.add_node("code_evaluator", node("code_evaluator", evaluator_node))
+    workflow.add_node("final_feedback", node("final_feedback", final_feedback_node))
+
+    workflow.set_conditional_entry_point(
+        route_entry,
+        {
+            "resume_analyst": "resume_analyst",
+            "self_intro": "self_intro",
+            "technical_questions": "technical_questions",
+            "ambiguity_checker": "ambiguity_checker",
+            "dsa_questions": "dsa_questions",
+            "code_evaluator": "code_evaluator",
+            "technical_feedback": "technical_feedback",
+            "final_feedback": "final_feedback",
+            END: END
+        }
+    )
+
+    workflow.add_edge("resume_analyst", "self_intro")
+
+    workflow.add_conditional_edges(
+        "self_intro",
+        route_after_self_intro,
+        {
+            "technical_questions": "technical_questions",
+            END: END
+        }
+    )
+
+    workflow.add_conditional_edges(
+        "technical_questions",
+        route_after_technical,
+        {
+            "dsa_questions": "dsa_questions",
+            END: END
+        }
+    )
+
+    workflow.add_conditional_edges(
+        "ambiguity_checker",
+        route_after_ambiguity,
+        {
+            "technical_feedback": "technical_feedback",
+            END: END
+        }
+    )
+
+    workflow.add_conditional_edges(
+        "technical_feedback",
+        route_after_feedback,
+        {
+            "technical_questions": "technical_questions",
+            "dsa_questions": "dsa_questions",
+            "final_feedback": "final_feedback",
+            END: END
+        }
+    )
+
+    workflow.add_conditional_edges(
+        "dsa_questions",
+        route_after_dsa,
+        {
+            "final_feedback": "final_feedback",
+            END: END
+        }
+    )
+
+    workflow.add_edge("code_evaluator", "technical_feedback")
+
+    workflow.add_edge("final_feedback", END)
+
+    return workflow
+
+
+def build_serde():
+    # Allow the compact state records alongside LangChain's own types
+    return JsonPlusSerializer(allowed_msgpack_modules=SERDE_TYPES)
+
+
+def build_checkpointer():
+    """
+    Checkpoints are the shared session store: any worker can continue any
+    session. SQLite (WAL) covers several workers on one host; set
+    VINTERVU_CHECKPOINT_URL to a Postgres database to share across hosts.
+    """
+    if CHECKPOINT_URL:
+        try:
+            from langgraph.checkpoint.postgres import PostgresSaver
+            from psycopg import Connection
+            from psycopg.rows import dict_row
+        except ImportError as e:
+            raise RuntimeError(
+                "VINTERVU_CHECKPOINT_URL requires langgraph-checkpoint-postgres "
+                "(pip install langgraph-checkpoint-postgres psycopg)"
+            ) from e
+
+        conn = Connection.connect(CHECKPOINT_URL, autocommit=True, prepare_threshold=0, row_factory=dict_row)
+        saver = PostgresSaver(conn, serde=build_serde())
+        saver.setup()
+        return saver
+
+    os.makedirs(os.path.dirname(CHECKPOINT_PATH), exist_ok=True)
+
+    # from_conn_string is a context manager in current langgraph releases, so
+    # hold the connection for the lifetime of the process instead
+    conn = sqlite3.connect(CHECKPOINT_PATH, check_same_thread=False, timeout=SQLITE_BUSY_TIMEOUT)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return SqliteSaver(conn, serde=build_serde())
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_app_graph():
+    """
+    Compiles the interview graph and opens the checkpointer on first use.
+    Importing this module stays cheap, so the API process can start serving
+    health checks before (or while) the graph warms up.
+    """
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                graph = build_workflow().compile(checkpointer=build_checkpointer())
+                # Opt-in: capture sampled sessions' runs for offline replay
+                _graph = RecordingGraph(graph) if RECORD_DIR else graph
+    return _graph
+
+
+def __getattr__(name):
+    # Backwards compatible `from agents.graph import app_graph`
+    if name == "app_graph":
+        return get_app_graph()
+    if name == "memory":
+        return get_app_graph().checkpointer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
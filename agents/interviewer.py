@@ -1,15 +1,26 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import AIMessage
-import os
 from dotenv import load_dotenv
 
-load_dotenv()
-
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash-exp",
-    google_api_key=os.getenv("GOOGLE_API_KEY")
+from .state import Feedback, ai, candidate_key
+from .question_bank import get_bank, format_problem, DIFFICULTY_RATINGS
+from .prompts import (
+    INTRO_EXTRACTION,
+    TECHNICAL_QUESTION,
+    AMBIGUITY_CHECK,
+    FOLLOWUP_QUESTION,
+    DSA_QUESTION,
+    DSA_REPHRASE,
+    render_profile
 )
+from .difficulty import (
+    get_stage_ability,
+    pick_difficulty,
+    pick_topic,
+    profile_topics,
+    stage_complete
+)
+from utils.config import REPHRASE_DSA_PROBLEMS
+
+load_dotenv()
 
 
 def self_intro_node(state):
@@ -17,20 +28,21 @@ def self_intro_node(state):
     messages = state["messages"]
 
 
-    if state.get("interview_stage") != "self_intro":
+    if state.get("interview_stage") not in (None, "self_intro"):
         return {}
 
 
-    if not messages:
+    # Greet once, right after the resume analysis (or on a cold start)
+    if not any(m.type == "human" for m in messages):
         return {
-            "messages": [AIMessage(content=(
+            "messages": [ai(
                 "Welcome to VIntervu!\n\n"
                 "Please introduce yourself:\n"
                 "- Background\n"
                 "- Experience\n"
                 "- Skills\n"
                 "- Key projects"
-            ))],
+            )],
             "interview_stage": "self_intro",
             "questions_asked": 0
         }
@@ -41,29 +53,16 @@ def self_intro_node(state):
 
     intro_text = last_msg.content
 
-    prompt = ChatPromptTemplate.from_template(
-        """
-        Extract:
-        - Skills
-        - Experience
-        - Projects
-        - Domains
-
-        From:
-        {intro}
-
-        Return JSON.
-        """
-    )
-
-    profile = (prompt | llm).invoke({"intro": intro_text})
+    profile = INTRO_EXTRACTION.invoke({"intro": intro_text})
 
     return {
+        # Keep the resume profile; the intro only adds to it
         "candidate_profile": {
+            **(state.get("candidate_profile") or {}),
             "raw_intro": intro_text,
             "summary": profile.content
         },
-        "messages": [AIMessage(content="Thanks! Let’s begin the technical interview.")],
+        "messages": [ai("Thanks! Let’s begin the technical interview.")],
         "interview_stage": "technical",
         "questions_asked": 0
     }
@@ -71,41 +70,37 @@ def self_intro_node(state):
 
 def technical_questions_node(state):
     print("--- TECHNICAL QUESTION ASKER ---")
-    messages = state["messages"]
-
-    # 🚨 CRITICAL GUARD
-    if messages and messages[-1].type == "human":
-        return {}
 
+    # Only reached when a question is due: answers are routed from the entry
+    # point to the ambiguity checker, and scored answers come back here
     questions_asked = state.get("questions_asked", 0)
     profile = state.get("candidate_profile", {})
+    ability = get_stage_ability(state.get("ability"), "technical")
 
-    if questions_asked >= 10:
+    if stage_complete(ability, "technical", questions_asked):
         return {
             "interview_stage": "dsa",
             "questions_asked": 0,
-            "messages": [AIMessage(content="Great. Let’s move to DSA questions.")]
+            "messages": [ai("Great. Let’s move to DSA questions.")]
         }
 
-    system_prompt = f"""
-    You are a technical interviewer.
+    difficulty = pick_difficulty(ability)
+    topic = pick_topic(ability, profile_topics(profile)) or "their strongest skill"
 
-    Candidate profile:
-    {profile}
-
-    Ask ONE deep technical question
-    based on their skills or projects.
-    """
-
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_prompt)
-    ])
-
-    question = (prompt | llm).invoke({})
+    question = TECHNICAL_QUESTION.invoke({
+        "profile": render_profile(profile),
+        "topic": topic,
+        "difficulty": difficulty
+    })
 
     return {
-        "messages": [question],
-        "questions_asked": questions_asked + 1
+        "messages": [ai(question.content)],
+        "questions_asked": questions_asked + 1,
+        "current_question": {
+            "topic": topic,
+            "difficulty": difficulty,
+            "rating": DIFFICULTY_RATINGS[difficulty]
+        }
     }
 
 
@@ -121,39 +116,16 @@ def ambiguity_checker_node(state):
     if not last_user:
         return {"ambiguity_detected": False}
 
-    prompt = ChatPromptTemplate.from_template(
-        """
-        Answer:
-        {answer}
-
-        Is this vague or shallow?
-        Reply ONLY YES or NO.
-        """
-    )
-
-    result = (prompt | llm).invoke({"answer": last_user})
+    result = AMBIGUITY_CHECK.invoke({"answer": last_user})
     ambiguous = "YES" in result.content.upper()
 
     if ambiguous:
-        followup_prompt = ChatPromptTemplate.from_template(
-            """
-            Candidate said:
-            {answer}
-
-            Ask ONE deeper follow-up question
-            requiring implementation details.
-            """
-        )
-
-        followup = (followup_prompt | llm).invoke({"answer": last_user})
+        followup = FOLLOWUP_QUESTION.invoke({"answer": last_user})
 
         return {
-            "messages": [AIMessage(content=followup.content)],
+            "messages": [ai(followup.content)],
             "ambiguity_detected": True,
-            "feedbacks": [{
-                "type": "clarity",
-                "comment": "Answer lacked depth or specifics"
-            }]
+            "feedbacks": [Feedback(stage="technical", feedback="Answer lacked depth or specifics")]
         }
 
     return {"ambiguity_detected": False}
@@ -161,32 +133,54 @@ def ambiguity_checker_node(state):
 
 def dsa_questions_node(state):
     print("--- DSA QUESTIONS ---")
-    messages = state["messages"]
-
-    if messages and messages[-1].type == "human":
-        return {}
 
+    # Only reached when a problem is due: submissions are scored first and
+    # come back here through the code evaluator
     questions_asked = state.get("questions_asked", 0)
+    ability = get_stage_ability(state.get("ability"), "dsa")
 
-    if questions_asked >= 2:
+    if stage_complete(ability, "dsa", questions_asked):
         return {
             "interview_stage": "final_feedback",
-            "messages": [AIMessage(content="Thanks! Preparing final feedback.")]
+            "messages": [ai("Thanks! Preparing final feedback.")]
         }
 
-    prompt = ChatPromptTemplate.from_template(
-        """
-        Ask ONE medium-level DSA problem.
-        Include:
-        - Problem
-        - Example
-        - Constraints
-        """
-    )
+    difficulty = pick_difficulty(ability)
+
+    bank = get_bank()
+    candidate = candidate_key(state)
+    asked = set(state.get("asked_problem_ids", [])) | bank.served_to(candidate)
+    problem = bank.select(difficulty, exclude=asked)
+
+    if problem is None:
+        # Bank exhausted for this candidate: fall back to a generated problem
+        question = DSA_QUESTION.invoke({"difficulty": difficulty})
+
+        return {
+            "messages": [ai(question.content)],
+            "questions_asked": questions_asked + 1,
+            "current_problem_id": "",
+            "current_question": {
+                "topic": "dsa",
+                "difficulty": difficulty,
+                "rating": DIFFICULTY_RATINGS[difficulty]
+            }
+        }
 
-    question = (prompt | llm).invoke({})
+    bank.mark_served(candidate, problem["id"])
+    content = format_problem(problem)
+
+    if REPHRASE_DSA_PROBLEMS:
+        content = DSA_REPHRASE.invoke({"problem": content}).content
 
     return {
-        "messages": [question],
-        "questions_asked": questions_asked + 1
+        "messages": [ai(content)],
+        "questions_asked": questions_asked + 1,
+        "current_problem_id": problem["id"],
+        "asked_problem_ids": [problem["id"]],
+        "current_question": {
+            "topic": problem["topic"],
+            "difficulty": problem["difficulty"],
+            "rating": problem["rating"]
+        }
     }
@@ -0,0 +1,446 @@
+"""
+Central registry of the agents' prompts.
+
+Every template is compiled once, at import, instead of on every node call.
+Each prompt carries a version. Bump it whenever the text or its inputs change
+meaning: the version and a fingerprint of the text go into `cache_key`, so
+recorded responses (utils/recorder.py) and idempotent replies
+(backend/idempotency.py) from an older prompt are never reused.
+
+Inputs that can grow without bound (resumes, answers, code, profiles) have a
+token budget. Oversized inputs are cut to the budget, keeping the head and the
+tail, before rendering. The estimated size of every rendered prompt is
+recorded per node in telemetry.
+
+Calls go through utils.llm.invoke, which holds them to the node's latency
+SLO. Prompts on the candidate's critical path carry a canned `fallback` for
+when no model answers in time.
+
+Each prompt runs on a model tier (small, default or large; see
+utils.config.LLM_TIER_MODELS). A prompt with a `validate` check or a parser
+is retried on the next larger tier when its output fails them.
+"""
+import hashlib
+import json
+import re
+import textwrap
+import time
+
+from langchain_core.exceptions import OutputParserException
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from utils.llm import TIERS, invoke as invoke_llm, prompt_tier, tier_fallback_model, tier_model
+from utils.recorder import sending_prompt
+from utils.telemetry import record_escalation, record_prompt, record_tier_call
+
+# Characters per token, the usual rough figure for English and code. Gemini's
+# exact count needs an API call, which would defeat the point on the hot path.
+CHARS_PER_TOKEN = 4
+
+# Share of a truncated input kept from its beginning; the rest is the end
+HEAD_SHARE = 0.75
+
+
+def count_tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN) if text else 0
+
+
+def truncate_to_budget(text, max_tokens):
+    """Cuts `text` to about `max_tokens`, keeping its head and tail."""
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    head = int(limit * HEAD_SHARE)
+    tail = limit - head
+    omitted = len(text) - head - tail
+    return f"{text[:head]}\n[... {omitted} characters omitted ...]\n{text[len(text) - tail:]}"
+
+
+class Prompt:
+    """A compiled, versioned prompt template with per-input token budgets."""
+
+    def __init__(self, name, version, template, budgets=None, max_tokens=None, role=None, fallback=None,
+                 tier="default", validate=None):
+        self.name = name
+        self.version = version
+        self.text = textwrap.dedent(template).strip()
+        self.budgets = budgets or {}
+        self.max_tokens = max_tokens
+        self.tier = prompt_tier(name, tier)
+        # Output check; a response that fails it is retried on a larger tier
+        self.validate = validate
+        # Canned response (formatted with the inputs) used when no model
+        # answers within the node's latency SLO; None means the call fails
+        self.fallback = fallback
+        self.fingerprint = hashlib.sha256(self.text.encode("utf-8")).hexdigest()[:12]
+
+        if role:
+            self.template = ChatPromptTemplate.from_messages([(role, self.text)])
+        else:
+            self.template = ChatPromptTemplate.from_template(self.text)
+
+    @property
+    def key(self):
+        return f"{self.name}@{self.version}"
+
+    def cache_key(self, inputs):
+        """Stable key for a response to this prompt version with these inputs."""
+        payload = json.dumps(inputs, sort_keys=True, default=str)
+        digest = hashlib.sha256(f"{self.key}:{self.fingerprint}:{payload}".encode("utf-8")).hexdigest()
+        return f"{self.key}:{digest[:32]}"
+
+    def fit(self, inputs):
+        """
+        Applies the input budgets and, if the whole prompt is still over
+        `max_tokens`, trims the largest budgeted input further.
+        Returns (inputs, rendered messages, truncated input names).
+        """
+        inputs = dict(inputs)
+        truncated = []
+        for name, budget in self.budgets.items():
+            value = inputs.get(name)
+            if isinstance(value, str) and count_tokens(value) > budget:
+                inputs[name] = truncate_to_budget(value, budget)
+                truncated.append(name)
+
+        messages = self.template.format_messages(**inputs)
+        tokens = sum(count_tokens(str(m.content)) for m in messages)
+
+        if self.max_tokens and tokens > self.max_tokens and self.budgets:
+            name = max(self.budgets, key=lambda n: count_tokens(str(inputs.get(n) or "")))
+            value = str(inputs.get(name) or "")
+            budget = max(count_tokens(value) - (tokens - self.max_tokens), 1)
+            inputs[name] = truncate_to_budget(value, budget)
+            if name not in truncated:
+                truncated.append(name)
+            messages = self.template.format_messages(**inputs)
+            tokens = sum(count_tokens(str(m.content)) for m in messages)
+
+        record_prompt(self.name, self.version, tokens, truncated)
+        return inputs, messages, truncated
+
+    def invoke(self, inputs, parser=None, llm=None):
+        """
+        Renders the prompt within budget and calls the LLM on the prompt's
+        tier (then `parser`, if any). Output that fails `validate` or the
+        parser is retried on each larger tier in turn; the largest tier's
+        answer is used as is. An explicit `llm` is never escalated.
+        """
+        inputs, messages, _ = self.fit(inputs)
+        fallback = self.fallback.format(**inputs) if self.fallback is not None else None
+        tiers = TIERS[TIERS.index(self.tier):] if llm is None else (self.tier,)
+
+        # Recorded calls carry the key, so replay never matches an older prompt
+        with sending_prompt(self.cache_key(inputs)):
+            for i, tier in enumerate(tiers):
+                last = i == len(tiers) - 1
+                start = time.perf_counter()
+                result = invoke_llm(
+                    messages, llm=llm, model=tier_model(tier), fallback=fallback, fallback_model=tier_fallback_model(tier)
+                )
+                record_tier_call(tier, self.name, time.perf_counter() - start, result)
+
+                if self.validate is not None and not last and not self.validate(str(result.content)):
+                    record_escalation(self.name, tier)
+                    continue
+                if parser is None:
+                    return result
+                try:
+                    return parser.invoke(result)
+                except OutputParserException:
+                    if last:
+                        raise
+                    record_escalation(self.name, tier)
+
+
+PROMPTS = {}
+
+
+def register(prompt):
+    if prompt.name in PROMPTS:
+        raise ValueError(f"Prompt {prompt.name!r} is already registered")
+    PROMPTS[prompt.name] = prompt
+    return prompt
+
+
+def get_prompt(name):
+    return PROMPTS[name]
+
+
+def prompt_set_key():
+    """Version of every registered prompt at once; changes when any prompt's version or text does."""
+    keys = sorted(f"{p.key}:{p.fingerprint}" for p in PROMPTS.values())
+    return hashlib.sha256("\n".join(keys).encode("utf-8")).hexdigest()[:12]
+
+
+def is_yes_no(text):
+    return re.match(r"\W*(YES|NO)\b", text.strip().upper()) is not None
+
+
+def is_json(text):
+    try:
+        JsonOutputParser().parse(text)
+    except OutputParserException:
+        return False
+    return True
+
+
+def has_score(text):
+    # What feedback_generator_node parses; anything else silently scores 5
+    return re.search(r"Score:\**\s*\d+\s*/", text) is not None
+
+
+RESUME_ANALYSIS = register(Prompt(
+    "resume_analysis", "1",
+    """
+    You are an expert Technical Recruiter and Resume Analyst.
+    Analyze the following resume text and extract a structured candidate profile.
+
+    Resume Text:
+    {resume_text}
+
+    Return a JSON object with the following fields:
+    - name: Candidate's full name
+    - skills: List of technical skills
+    - experience_years: Estimated years of experience
+    - roles: List of previous job titles
+    - education: Highest degree and major
+    - strengths: Key strengths identified
+    - weaknesses: Potential gaps or areas to probe
+    - recommended_topics: List of 3-5 technical topics to ask about based on their specific experience.
+
+    Ensure the output is valid JSON.
+    """,
+    budgets={"resume_text": 6000},
+    tier="small"
+))
+
+# One section group of a resume too long for RESUME_ANALYSIS; the partial
+# profiles are merged in agents/resume_analyst.py
+RESUME_SECTION_ANALYSIS = register(Prompt(
+    "resume_section_analysis", "1",
+    """
+    You are an expert Technical Recruiter and Resume Analyst.
+    Below is part {part} of {parts} of a long resume. Extract a partial
+    candidate profile from what this part states; leave out fields it doesn't cover.
+
+    Resume Part:
+    {resume_text}
+
+    Return a JSON object with the following fields:
+    - name: Candidate's full name
+    - skills: List of technical skills
+    - experience_years: Years of professional experience shown in this part, as a number
+    - experience_from: Year the earliest position in this part started, as a number
+    - experience_to: Year the latest position in this part ended, as a number ("present" if ongoing)
+    - roles: List of job titles
+    - education: Degrees and majors
+    - strengths: Key strengths identified
+    - weaknesses: Potential gaps or areas to probe
+    - recommended_topics: List of technical topics to ask about based on this part.
+
+    Ensure the output is valid JSON.
+    """,
+    budgets={"resume_text": 3000},
+    tier="small",
+    validate=is_json
+))
+
+INTRO_EXTRACTION = register(Prompt(
+    "intro_extraction", "1",
+    """
+    Extract:
+    - Skills
+    - Experience
+    - Projects
+    - Domains
+
+    From:
+    {intro}
+
+    Return JSON.
+    """,
+    budgets={"intro": 1500},
+    tier="small",
+    validate=is_json
+))
+
+TECHNICAL_QUESTION = register(Prompt(
+    "technical_question", "1",
+    """
+    You are a technical interviewer.
+
+    Candidate profile:
+    {profile}
+
+    Ask ONE deep technical question
+    based on their skills or projects.
+    Focus on: {topic}
+    Difficulty: {difficulty}
+    """,
+    budgets={"profile": 1500},
+    role="system",
+    fallback="Tell me about a project where you worked with {topic}. What were the key design decisions, and what would you change today?"
+))
+
+AMBIGUITY_CHECK = register(Prompt(
+    "ambiguity_check", "1",
+    """
+    Answer:
+    {answer}
+
+    Is this vague or shallow?
+    Reply ONLY YES or NO.
+    """,
+    budgets={"answer": 2000},
+    # Better to skip one follow-up than to stall the turn
+    fallback="NO",
+    tier="small",
+    validate=is_yes_no
+))
+
+FOLLOWUP_QUESTION = register(Prompt(
+    "followup_question", "1",
+    """
+    Candidate said:
+    {answer}
+
+    Ask ONE deeper follow-up question
+    requiring implementation details.
+    """,
+    budgets={"answer": 2000},
+    fallback="Can you walk me through how you implemented that, step by step, including the data structures and edge cases?"
+))
+
+DSA_QUESTION = register(Prompt(
+    "dsa_question", "1",
+    """
+    Ask ONE {difficulty}-level DSA problem.
+    Include:
+    - Problem
+    - Example
+    - Constraints
+    """
+))
+
+DSA_REPHRASE = register(Prompt(
+    "dsa_rephrase", "1",
+    """
+    Rephrase this coding problem in your own words as an interviewer.
+    Keep the function name, example, and constraints unchanged.
+
+    {problem}
+    """,
+    fallback="{problem}",
+    tier="small"
+))
+
+ANSWER_FEEDBACK = register(Prompt(
+    "answer_feedback", "1",
+    """
+    You are an expert Technical Interviewer providing constructive feedback.
+
+    Interview Stage: {stage}
+    Question: {question}
+    Candidate's Answer: {answer}
+
+    Please provide:
+    1. Brief feedback (2-3 sentences) on the answer quality
+    2. A score from 1-10 based on:
+       - Clarity and completeness
+       - Technical accuracy
+       - Depth of understanding
+
+    Format your response as:
+    **Feedback:** [Your feedback here]
+    **Score:** [X/10]
+    """,
+    budgets={"question": 1500, "answer": 3000},
+    max_tokens=5000,
+    validate=has_score
+))
+
+FINAL_FEEDBACK = register(Prompt(
+    "final_feedback", "1",
+    """
+    You are an expert Technical Interviewer providing a comprehensive final evaluation.
+
+    Candidate: {candidate_name}
+    Total Questions: {total_questions}
+    Average Score: {avg_score:.1f}/10
+
+    Individual Feedbacks:
+    {feedback_summary}
+
+    Please provide a comprehensive final evaluation with:
+    1. **Overall Performance Summary** - High-level assessment
+    2. **Strengths** - Key strong points demonstrated
+    3. **Areas for Improvement** - Specific suggestions
+    4. **Stage-wise Analysis**:
+       - Self Introduction: Brief comments
+       - Technical Questions: Brief comments
+       - DSA/Coding: Brief comments (if applicable)
+    5. **Final Rating** - Overall score out of 10 and recommendation
+
+    Be constructive, specific, and professional. Format in clear markdown.
+    """,
+    budgets={"feedback_summary": 4000},
+    tier="large"
+))
+
+CODE_EVALUATION = register(Prompt(
+    "code_evaluation", "2",
+    """
+    You are an expert Python Code Evaluator.
+
+    User Code:
+    ```python
+    {code}
+    ```
+
+    Test Results (the code was run against the problem's tests):
+    {results}
+
+    Please perform the following:
+    1. **Correctness**: Explain what causes any failing test or error above. Don't predict results; they are real.
+    2. **Efficiency**: Time and space complexity, and whether they suit the problem.
+    3. **Evaluation**: Is the code readable and following best practices?
+
+    Format your response as:
+    **Test Results:**
+    [Summary of the passing and failing tests]
+
+    **Feedback:**
+    [Your detailed feedback here]
+    """,
+    budgets={"code": 4000, "results": 1500},
+    tier="large"
+))
+
+# Offline authoring of new bank problems (agents/question_bank.py)
+PROBLEM_GENERATION = register(Prompt(
+    "problem_generation", "2",
+    """
+    Write {count} original {difficulty} coding interview problems about {topic}.
+
+    Return a JSON list. Each item must have:
+    - id: short kebab-case slug
+    - title
+    - topic: "{topic}"
+    - difficulty: "{difficulty}"
+    - statement
+    - examples: one line such as "fn(args) -> result"
+    - constraints: list of strings
+    - function_name
+    - reference_solution: a complete Python function named function_name
+    - canonical_solutions: list of other common correct solutions, as most candidates would write them
+    - test_inputs: list of 5 argument lists covering edge cases
+    """,
+    validate=is_json
+))
+
+
+def render_profile(profile):
+    """Compact JSON for prompt inputs; a dict's repr wastes tokens on quoting and spacing."""
+    return json.dumps(profile or {}, separators=(",", ":"), default=str)
@@ -0,0 +1,407 @@
+import sqlite3
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+
+from utils.config import CODE_RUN_MEMORY_MB, CODE_RUN_TIMEOUT, QUESTION_BANK_PATH, SQLITE_BUSY_TIMEOUT
+
+SEED_PATH = os.path.join(os.path.dirname(__file__), "data", "dsa_questions.json")
+BANK_PATH = QUESTION_BANK_PATH
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+# Base Elo-style ratings per difficulty tag. Calibration moves a problem's
+# rating away from its base once enough candidates have attempted it.
+DIFFICULTY_RATINGS = {"easy": 1000.0, "medium": 1400.0, "hard": 1800.0}
+
+MIN_CALIBRATION_ATTEMPTS = 20
+
+# Reference solutions run in a child interpreter (they may be LLM-authored),
+# which is killed after this many seconds
+SOLUTION_TIMEOUT = 10.0
+
+# Runs a reference solution over its test inputs: the problem arrives as
+# JSON on stdin and the expected outputs leave as JSON on stdout
+SOLUTION_RUNNER = """
+import copy, json, sys
+problem = json.load(sys.stdin)
+namespace = {}
+exec(problem["reference_solution"], namespace)
+solution = namespace[problem["function_name"]]
+json.dump([solution(*copy.deepcopy(args)) for args in problem["test_inputs"]], sys.stdout)
+"""
+
+# Runs a candidate's code over a problem's tests. Same protocol, but the
+# code is untrusted: memory is capped, its prints are kept out of the
+# result, and each test's output or exception is reported separately.
+TEST_RUNNER = """
+import copy, io, json, sys
+problem = json.load(sys.stdin)
+try:
+    import resource
+    limit = problem["memory_mb"] * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+except (ImportError, ValueError, OSError):
+    pass
+out, sys.stdout = sys.stdout, io.StringIO()
+namespace = {}
+exec(problem["code"], namespace)
+if not callable(namespace.get(problem["function_name"])):
+    sys.exit(f"NameError: the code does not define {problem['function_name']}()")
+solution = namespace[problem["function_name"]]
+results = []
+for test in problem["tests"]:
+    try:
+        results.append({"output": solution(*copy.deepcopy(test["input"]))})
+    except Exception as e:
+        results.append({"error": f"{type(e).__name__}: {e}"})
+json.dump(results, out, default=repr)
+"""
+
+
+def get_bank_connection(path=None):
+    conn = sqlite3.connect(path or BANK_PATH, timeout=SQLITE_BUSY_TIMEOUT)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_bank(conn):
+    c = conn.cursor()
+
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS problems (
+            id TEXT PRIMARY KEY,
+            title TEXT,
+            topic TEXT,
+            difficulty TEXT,
+            rating REAL,
+            statement TEXT,
+            examples TEXT,
+            constraints_json TEXT,
+            function_name TEXT,
+            reference_solution TEXT,
+            canonical_json TEXT,
+            tests_json TEXT,
+            attempts INTEGER DEFAULT 0,
+            score_sum REAL DEFAULT 0
+        )
+    ''')
+    # Common correct solutions besides the reference, the base code of the
+    # similarity check (added after the original schema)
+    columns = {row["name"] for row in c.execute("PRAGMA table_info(problems)")}
+    if "canonical_json" not in columns:
+        c.execute("ALTER TABLE problems ADD COLUMN canonical_json TEXT")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_problems_topic_difficulty ON problems (topic, difficulty)")
+
+    # Problems already shown to a candidate, so retakes don't see repeats
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS served_problems (
+            candidate_key TEXT,
+            problem_id TEXT,
+            served_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (candidate_key, problem_id)
+        )
+    ''')
+
+    conn.commit()
+
+
+def generate_tests(problem):
+    """
+    Runs the reference solution over the problem's test inputs, in a child
+    interpreter limited to SOLUTION_TIMEOUT seconds, and returns the
+    resulting test suite as a list of {"input", "expected"} dicts. Raises
+    RuntimeError if the solution fails or runs too long.
+    """
+    source = {key: problem[key] for key in ("reference_solution", "function_name", "test_inputs")}
+    try:
+        result = subprocess.run(
+            [sys.executable, "-I", "-c", SOLUTION_RUNNER],
+            input=json.dumps(source), capture_output=True, text=True, timeout=SOLUTION_TIMEOUT
+        )
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"Reference solution of {problem.get('id')} ran longer than {SOLUTION_TIMEOUT:.0f}s")
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1:] or ["no output"]
+        raise RuntimeError(f"Reference solution of {problem.get('id')} failed: {error[0]}")
+
+    expected = json.loads(result.stdout)
+    return [{"input": args, "expected": value} for args, value in zip(problem["test_inputs"], expected)]
+
+
+def run_tests(problem, code):
+    """
+    Runs candidate `code` over the problem's tests in a child interpreter
+    limited to CODE_RUN_TIMEOUT seconds. Returns {"passed", "total",
+    "error", "results"}: `error` is set when the code could not run at all
+    (syntax error, missing function, timeout), and each result carries the
+    test's input, expected value, output or error, and whether it passed.
+    """
+    tests = problem["tests"]
+    source = {"code": code, "function_name": problem["function_name"], "tests": tests, "memory_mb": CODE_RUN_MEMORY_MB}
+    try:
+        result = subprocess.run(
+            [sys.executable, "-I", "-c", TEST_RUNNER],
+            input=json.dumps(source), capture_output=True, text=True, timeout=CODE_RUN_TIMEOUT
+        )
+    except subprocess.TimeoutExpired:
+        return {"passed": 0, "total": len(tests), "error": f"Ran longer than {CODE_RUN_TIMEOUT:.0f}s", "results": []}
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1:] or ["no output"]
+        return {"passed": 0, "total": len(tests), "error": error[0], "results": []}
+
+    results = []
+    for test, outcome in zip(tests, json.loads(result.stdout)):
+        outcome = {"input": test["input"], "expected": test["expected"], **outcome}
+        outcome["passed"] = "error" not in outcome and outcome["output"] == test["expected"]
+        results.append(outcome)
+    return {"passed": sum(r["passed"] for r in results), "total": len(tests), "error": None, "results": results}
+
+
+def build_bank(seed_path=SEED_PATH, bank_path=None, problems=None):
+    """
+    Builds (or refreshes) the on-disk question bank from the seed file.
+    Existing calibration counters are preserved for problems already present.
+    """
+    if problems is None:
+        with open(seed_path, "r", encoding="utf-8") as f:
+            problems = json.load(f)
+
+    conn = get_bank_connection(bank_path)
+    init_bank(conn)
+    c = conn.cursor()
+
+    for problem in problems:
+        tests = generate_tests(problem)
+        c.execute(
+            """
+            INSERT INTO problems (id, title, topic, difficulty, rating, statement, examples,
+                                  constraints_json, function_name, reference_solution, canonical_json, tests_json)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                title = excluded.title,
+                topic = excluded.topic,
+                statement = excluded.statement,
+                examples = excluded.examples,
+                constraints_json = excluded.constraints_json,
+                function_name = excluded.function_name,
+                reference_solution = excluded.reference_solution,
+                canonical_json = excluded.canonical_json,
+                tests_json = excluded.tests_json
+            """,
+            (
+                problem["id"], problem["title"], problem["topic"], problem["difficulty"],
+                DIFFICULTY_RATINGS[problem["difficulty"]], problem["statement"], problem["examples"],
+                json.dumps(problem.get("constraints", [])), problem["function_name"],
+                problem["reference_solution"], json.dumps(problem.get("canonical_solutions", [])), json.dumps(tests)
+            )
+        )
+
+    conn.commit()
+    conn.close()
+    return len(problems)
+
+
+def generate_problems(topic, difficulty, count=1):
+    """
+    Offline only: asks the LLM to author new problems in the seed format.
+    Problems whose reference solution fails to run are discarded.
+    """
+    from langchain_core.output_parsers import JsonOutputParser
+    from utils.telemetry import traced_node
+
+    from .prompts import PROBLEM_GENERATION
+
+    # Traced like a graph node, so the call gets its own SLO and telemetry
+    generate = traced_node("problem_generation", lambda inputs: PROBLEM_GENERATION.invoke(inputs, parser=JsonOutputParser()))
+    candidates = generate({"count": count, "topic": topic, "difficulty": difficulty})
+
+    problems = []
+    for problem in candidates:
+        try:
+            generate_tests(problem)
+            problems.append(problem)
+        except Exception as e:
+            print(f"Discarding generated problem {problem.get('id')}: {e}")
+    return problems
+
+
+def record_attempt(problem_id, score, bank_path=None):
+    """Records a graded attempt so the problem's difficulty can be recalibrated."""
+    conn = get_bank_connection(bank_path)
+    conn.execute(
+        "UPDATE problems SET attempts = attempts + 1, score_sum = score_sum + ? WHERE id = ?",
+        (score, problem_id)
+    )
+    conn.commit()
+    conn.close()
+
+
+def recalibrate(bank_path=None):
+    """
+    Offline job: re-rates problems from observed candidate scores (1-10) and
+    moves them to the difficulty tag whose base rating is closest.
+    """
+    conn = get_bank_connection(bank_path)
+    rows = conn.execute(
+        "SELECT id, difficulty, attempts, score_sum FROM problems WHERE attempts >= ?",
+        (MIN_CALIBRATION_ATTEMPTS,)
+    ).fetchall()
+
+    for row in rows:
+        mean_score = row["score_sum"] / row["attempts"]
+        # A mean of 5.5/10 keeps the base rating; each point away shifts it by 80
+        rating = DIFFICULTY_RATINGS[row["difficulty"]] + (5.5 - mean_score) * 80
+        difficulty = min(DIFFICULTIES, key=lambda d: abs(DIFFICULTY_RATINGS[d] - rating))
+        conn.execute(
+            "UPDATE problems SET rating = ?, difficulty = ? WHERE id = ?",
+            (rating, difficulty, row["id"])
+        )
+
+    conn.commit()
+    conn.close()
+    return len(rows)
+
+
+class QuestionBank:
+    """
+    In-memory view of the question bank, indexed by (topic, difficulty) so
+    selecting a problem doesn't touch the database.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or BANK_PATH
+        self.problems = {}
+        self.index = {}
+        self.topics = []
+        self.load()
+
+    def load(self):
+        conn = get_bank_connection(self.path)
+        init_bank(conn)
+        rows = conn.execute("SELECT * FROM problems ORDER BY id").fetchall()
+        conn.close()
+
+        problems = {}
+        index = {}
+        for row in rows:
+            problem = dict(row)
+            problem["constraints"] = json.loads(problem.pop("constraints_json") or "[]")
+            problem["canonical_solutions"] = json.loads(problem.pop("canonical_json") or "[]")
+            problem["tests"] = json.loads(problem.pop("tests_json") or "[]")
+            problems[problem["id"]] = problem
+            index.setdefault((problem["topic"], problem["difficulty"]), []).append(problem["id"])
+
+        self.problems = problems
+        self.index = index
+        self.topics = sorted({topic for topic, _ in index})
+
+    def get(self, problem_id):
+        return self.problems.get(problem_id)
+
+    def served_to(self, candidate_key):
+        conn = get_bank_connection(self.path)
+        rows = conn.execute(
+            "SELECT problem_id FROM served_problems WHERE candidate_key = ?",
+            (candidate_key,)
+        ).fetchall()
+        conn.close()
+        return {row["problem_id"] for row in rows}
+
+    def mark_served(self, candidate_key, problem_id):
+        conn = get_bank_connection(self.path)
+        conn.execute(
+            "INSERT OR IGNORE INTO served_problems (candidate_key, problem_id) VALUES (?, ?)",
+            (candidate_key, problem_id)
+        )
+        conn.commit()
+        conn.close()
+
+    def select(self, difficulty="medium", exclude=(), topic=None):
+        """
+        Picks a problem of the given difficulty that is not in `exclude`.
+        Topics already covered by excluded problems are tried last, and the
+        nearest difficulty is used when a bucket is exhausted.
+        """
+        exclude = set(exclude)
+        covered = {self.problems[pid]["topic"] for pid in exclude if pid in self.problems}
+
+        if topic:
+            topics = [topic]
+        else:
+            fresh = [t for t in self.topics if t not in covered]
+            stale = [t for t in self.topics if t in covered]
+            random.shuffle(fresh)
+            random.shuffle(stale)
+            topics = fresh + stale
+
+        order = sorted(
+            DIFFICULTIES,
+            key=lambda d: abs(DIFFICULTIES.index(d) - DIFFICULTIES.index(difficulty))
+        ) if difficulty in DIFFICULTIES else list(DIFFICULTIES)
+
+        for level in order:
+            for t in topics:
+                bucket = self.index.get((t, level))
+                if not bucket:
+                    continue
+                # Random start then probe: O(1) expected while few are excluded
+                start = random.randrange(len(bucket))
+                for i in range(len(bucket)):
+                    problem_id = bucket[(start + i) % len(bucket)]
+                    if problem_id not in exclude:
+                        return self.problems[problem_id]
+        return None
+
+
+def format_problem(problem):
+    """Renders a bank problem as the interviewer's question. Hidden tests are not shown."""
+    constraints = "\n".join(f"- {c}" for c in problem["constraints"])
+    return (
+        f"**{problem['title']}** ({problem['difficulty']})\n\n"
+        f"{problem['statement']}\n\n"
+        f"Implement `{problem['function_name']}` in Python.\n\n"
+        f"**Example:** `{problem['examples']}`\n\n"
+        f"**Constraints:**\n{constraints}"
+    )
+
+
+bank = None
+_bank_lock = threading.Lock()
+
+
+def get_bank():
+    global bank
+    if bank is None:
+        with _bank_lock:
+            if bank is None:
+                if not os.path.exists(BANK_PATH):
+                    build_bank()
+                bank = QuestionBank()
+    return bank
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the offline DSA question bank.")
+    parser.add_argument("--generate", type=int, default=0, help="LLM-author N extra problems per topic/difficulty")
+    parser.add_argument("--recalibrate", action="store_true", help="Re-rate problems from recorded attempts")
+    args = parser.parse_args()
+
+    count = build_bank()
+    print(f"Loaded {count} seed problems into {BANK_PATH}.")
+
+    if args.generate:
+        topics = QuestionBank().topics
+        for topic in topics:
+            for difficulty in DIFFICULTIES:
+                generated = generate_problems(topic, difficulty, args.generate)
+                build_bank(problems=generated)
+                print(f"Generated {len(generated)} {difficulty} {topic} problems.")
+
+    if args.recalibrate:
+        print(f"Recalibrated {recalibrate()} problems.")
@@ -1,11 +1,205 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
+from concurrent.futures import ThreadPoolExecutor
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.messages import AIMessage
+from utils.cancellation import RunCancelled
+from utils.config import RESUME_CHUNK_CONCURRENCY, RESUME_CHUNK_TOKENS
 from utils.mcp_client import get_client
+from utils.telemetry import record_resume_chunks
+import contextvars
+import datetime
+import json
+import re
+import textwrap
+
+from .prompts import CHARS_PER_TOKEN, RESUME_ANALYSIS, RESUME_SECTION_ANALYSIS, count_tokens
+from .state import ai, resume_hash
+
+SECTION_HEADINGS = re.compile(
+    r"(professional |work |research |teaching |industry )?(summary|profile|objective|experience|employment"
+    r"|work history|education|skills|technical skills|projects|publications|papers|research|teaching"
+    r"|certifications|awards|honors|achievements|patents|talks|presentations|service|activities"
+    r"|languages|interests|references|grants|volunteering|leadership)",
+    re.IGNORECASE
+)
+
+# Rank of a degree, for the highest education across chunks
+DEGREES = (
+    (re.compile(r"\b(ph\.?\s?d|doctor|d\.?phil)", re.IGNORECASE), 3),
+    (re.compile(r"\b(master|m\.?\s?s\b|m\.?\s?sc|m\.?\s?tech|m\.?\s?e\b|mba|m\.?\s?a\b)", re.IGNORECASE), 2),
+    (re.compile(r"\b(bachelor|b\.?\s?s\b|b\.?\s?sc|b\.?\s?tech|b\.?\s?e\b|b\.?\s?a\b)", re.IGNORECASE), 1),
+)
+
+LIST_FIELDS = ("skills", "roles", "strengths", "weaknesses", "recommended_topics")
+MAX_TOPICS = 5
+
+
+def is_heading(line):
+    text = line.strip().rstrip(":").strip()
+    if not text or len(text) > 40 or text[0] in "-*•":
+        return False
+    return SECTION_HEADINGS.fullmatch(text) is not None or (text.isupper() and any(c.isalpha() for c in text))
+
+
+def split_sections(resume_text):
+    """The resume as (heading, text) sections; the lines before the first heading have no heading."""
+    sections = [[None, []]]
+    for line in resume_text.splitlines():
+        if is_heading(line):
+            sections.append([line.strip().rstrip(":"), [line]])
+        else:
+            sections[-1][1].append(line)
+    return [(heading, "\n".join(lines).strip()) for heading, lines in sections if "\n".join(lines).strip()]
+
+
+def _split_long(heading, text, max_tokens):
+    """Cuts one oversized section at paragraph, then line, boundaries."""
+    pieces, current = [], ""
+    # Later pieces start with the heading, so each chunk knows what it is reading;
+    # any line must fit after it
+    continued = f"{heading} (continued)" if heading else ""
+    room = max_tokens - count_tokens(continued) - 1
+    for block in re.split(r"\n\s*\n", text):
+        lines = [block] if count_tokens(block) <= room else block.splitlines()
+        # Text extracted from a PDF may have no line breaks at all
+        lines = [piece for line in lines for piece in (
+            [line] if count_tokens(line) <= room else textwrap.wrap(line, room * CHARS_PER_TOKEN)
+        )]
+        for line in lines:
+            if current and count_tokens(f"{current}\n{line}") > max_tokens:
+                pieces.append(current)
+                current = continued
+            current = f"{current}\n{line}" if current else line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_resume(resume_text, max_tokens=RESUME_CHUNK_TOKENS):
+    """
+    Consecutive resume sections packed into chunks of at most `max_tokens`,
+    as many as the resume needs. No chunk is larger than the section
+    prompt's budget, which would cut it.
+    """
+    max_tokens = min(max_tokens, RESUME_SECTION_ANALYSIS.budgets["resume_text"])
+    chunks, current = [], ""
+    for heading, text in split_sections(resume_text):
+        for piece in _split_long(heading, text, max_tokens) if count_tokens(text) > max_tokens else [text]:
+            if current and count_tokens(f"{current}\n\n{piece}") > max_tokens:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _items(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(",") if v.strip()]
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if v is not None and str(v).strip()]
+    return [str(value)]
+
+
+def _years(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    match = re.search(r"\d+(\.\d+)?", str(value or ""))
+    return float(match.group()) if match else None
+
+
+def _degree_rank(education):
+    return max((rank for pattern, rank in DEGREES if pattern.search(education)), default=0)
+
+
+def merge_profiles(partials):
+    """
+    One profile from the chunks' partial profiles, independent of timing:
+    lists are unioned in chunk order (case-insensitively), experience is the
+    span from the earliest to the latest position (or the largest figure, if
+    larger), education the highest degree, and other fields come from the
+    first chunk that has them.
+    """
+    profile = {}
+    starts, ends = [], []
+    for partial in partials:
+        for key, value in partial.items():
+            if key in ("experience_from", "experience_to"):
+                year = datetime.date.today().year if str(value).strip().lower() == "present" else _years(value)
+                if year is not None:
+                    (starts if key == "experience_from" else ends).append(year)
+                continue
+            if key in LIST_FIELDS:
+                merged = profile.setdefault(key, [])
+                seen = {v.casefold() for v in merged}
+                for item in _items(value):
+                    if item.casefold() not in seen:
+                        seen.add(item.casefold())
+                        merged.append(item)
+            elif key == "experience_years":
+                years = _years(value)
+                if years is not None and years > profile.get(key, -1):
+                    profile[key] = int(years) if float(years).is_integer() else years
+            elif key == "education":
+                for education in _items(value) if isinstance(value, list) else [str(value or "").strip()]:
+                    if education and (key not in profile or _degree_rank(education) > _degree_rank(profile[key])):
+                        profile[key] = education
+            elif key == "name":
+                if value and str(value).strip().lower() not in ("unknown", "n/a", "none") and not profile.get(key):
+                    profile[key] = str(value).strip()
+            elif value not in (None, "", [], {}):
+                profile.setdefault(key, value)
+    if starts and ends and max(ends) >= min(starts):
+        span = max(ends) - min(starts)
+        if span > profile.get("experience_years", -1):
+            profile["experience_years"] = int(span) if float(span).is_integer() else span
+    if "recommended_topics" in profile:
+        profile["recommended_topics"] = profile["recommended_topics"][:MAX_TOPICS]
+    return profile
+
+
+def _extract_chunk(part, parts, text):
+    try:
+        partial = RESUME_SECTION_ANALYSIS.invoke(
+            {"resume_text": text, "part": part, "parts": parts}, parser=JsonOutputParser()
+        )
+    except RunCancelled:
+        raise
+    except Exception as e:
+        print(f"Resume part {part}/{parts} dropped: {e}")
+        return None
+    return partial if isinstance(partial, dict) else None
+
+
+def extract_profile(resume_text):
+    """
+    The candidate profile of a resume: one call for a short one, otherwise
+    one call per chunk, run concurrently, merged. A chunk whose output can't
+    be parsed is dropped rather than failing the analysis.
+    """
+    chunks = chunk_resume(resume_text)
+    if len(chunks) <= 1:
+        return RESUME_ANALYSIS.invoke({"resume_text": resume_text}, parser=JsonOutputParser())
+
+    # Each analysis has its own threads, so long resumes analysed at once
+    # (admission control bounds how many) don't queue behind each other.
+    # Each chunk runs in a copy of the node's context, so telemetry,
+    # cancellation and traffic capture still see the resume analyst.
+    pool = ThreadPoolExecutor(max_workers=min(len(chunks), RESUME_CHUNK_CONCURRENCY), thread_name_prefix="resume")
+    try:
+        futures = [
+            pool.submit(contextvars.copy_context().run, _extract_chunk, i + 1, len(chunks), chunk)
+            for i, chunk in enumerate(chunks)
+        ]
+        partials = [future.result() for future in futures]
+    finally:
+        # A cancelled analysis doesn't wait for the chunks it never started
+        pool.shutdown(wait=False, cancel_futures=True)
+    parsed = [partial for partial in partials if partial]
+    record_resume_chunks(len(parsed), len(partials) - len(parsed))
+    return merge_profiles(parsed) if parsed else None
 
-# Initialize LLM
-llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash-exp")
 
 def analyze_resume(state):
     """
@@ -15,38 +209,15 @@ def analyze_resume(state):
     resume_text = state.get("resume_text", "")
     print(resume_text)
     if not resume_text:
-        return {"messages": [AIMessage(content="Error: No resume text provided.")]}
+        return {"messages": [ai("Error: No resume text provided.")]}
 
-    prompt = ChatPromptTemplate.from_template(
-        """
-        You are an expert Technical Recruiter and Resume Analyst.
-        Analyze the following resume text and extract a structured candidate profile.
-        
-        Resume Text:
-        {resume_text}
-        
-        Return a JSON object with the following fields:
-        - name: Candidate's full name
-        - skills: List of technical skills
-        - experience_years: Estimated years of experience
-        - roles: List of previous job titles
-        - education: Highest degree and major
-        - strengths: Key strengths identified
-        - weaknesses: Potential gaps or areas to probe
-        - recommended_topics: List of 3-5 technical topics to ask about based on their specific experience.
-        
-        Ensure the output is valid JSON.
-        """
-    )
-    
-    chain = prompt | llm | JsonOutputParser()
     
     try:
-        profile = chain.invoke({"resume_text": resume_text})
+        profile = extract_profile(resume_text)
         print(profile)
         
         if not profile or not isinstance(profile, dict):
-            return {"messages": [AIMessage(content="Error: Failed to parse resume into a valid profile format.")]}
+            return {"messages": [ai("Error: Failed to parse resume into a valid profile format.")]}
         
         # Save to DB via MCP Client
         client = get_client()
@@ -59,10 +230,16 @@ def analyze_resume(state):
             "profile_json": json.dumps(profile)
         })
         
+        # The resume now lives in the database (keyed by the same hash); don't
+        # carry it in every checkpoint of the session
         return {
             "candidate_profile": profile,
-            "interview_stage": "introduction",
-            "messages": [AIMessage(content=f"Resume analyzed for {profile.get('name', 'Candidate')}. Ready to start interview.")]
+            "interview_stage": "self_intro",
+            "resume_hash": resume_hash(resume_text),
+            "resume_text": "",
+            "messages": [ai(f"Resume analyzed for {profile.get('name', 'Candidate')}. Ready to start interview.")]
         }
+    except RunCancelled:
+        raise
     except Exception as e:
-        return {"messages": [AIMessage(content=f"Error analyzing resume: {str(e)}")]}
+        return {"messages": [ai(f"Error analyzing resume: {str(e)}")]}
@@ -0,0 +1,103 @@
+"""
+Compact records for interview session state.
+
+A worker can host many sessions at once, so their state is kept small:
+
+* Messages are slotted `Message` records (role and text only) instead of
+  LangChain message objects with their ids and response metadata. They
+  provide the `.type` and `.content` the agents and API read.
+* Roles, stages, topics and difficulties repeat in every session and are
+  interned, so all sessions share one copy of each.
+* Feedback entries point at the question and answer by message index
+  instead of copying their text (see `message_text`).
+* The resume is stored once in the database, keyed by its hash; the state
+  keeps only `resume_hash` after the analysis.
+"""
+import hashlib
+import sys
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+@dataclass(slots=True)
+class Message:
+    type: str
+    content: str
+
+    def __post_init__(self):
+        # Runs on deserialisation too, so restored sessions share the strings
+        self.type = sys.intern(self.type)
+
+
+@dataclass(slots=True)
+class Feedback:
+    """A scored answer, or a clarity note (score None) from the ambiguity checker."""
+    stage: Optional[str] = None
+    score: Optional[int] = None
+    # Indices into the session's messages (the text itself in older sessions)
+    question: Any = None
+    answer: Any = None
+    feedback: str = ""
+    topic: Optional[str] = None
+    difficulty: Optional[str] = None
+
+    def __post_init__(self):
+        self.stage = intern(self.stage)
+        self.topic = intern(self.topic)
+        self.difficulty = intern(self.difficulty)
+
+
+def as_feedback(entry):
+    """Feedback record for an entry, including dicts saved by older versions."""
+    if isinstance(entry, Feedback):
+        return entry
+    if "score" not in entry:
+        return Feedback(feedback=entry.get("comment", ""))
+    return Feedback(
+        stage=entry.get("stage"),
+        score=entry.get("score"),
+        question=entry.get("question"),
+        answer=entry.get("answer"),
+        feedback=entry.get("feedback", ""),
+        topic=entry.get("topic"),
+        difficulty=entry.get("difficulty")
+    )
+
+
+def ai(content):
+    return Message("ai", content)
+
+
+def human(content):
+    return Message("human", content)
+
+
+def intern(value):
+    """Interns repeated labels (stage, topic, difficulty); passes None through."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def message_text(messages, ref):
+    """
+    Resolves a feedback entry's question/answer reference. Entries written
+    before references were introduced hold the text itself.
+    """
+    if isinstance(ref, int):
+        return messages[ref].content if 0 <= ref < len(messages) else ""
+    return ref or ""
+
+
+def candidate_key(state):
+    """
+    Identifies the candidate across sessions: by resume, else by session.
+    Names aren't unique, and every resume without one is "Unknown".
+    """
+    return state.get("resume_hash") or state.get("session_id", "anonymous")
+
+
+def resume_hash(resume_text):
+    return hashlib.sha256(resume_text.encode("utf-8")).hexdigest()
+
+
+# Checkpoint serialisation allowlist for the records above
+SERDE_TYPES = [(__name__, "Message"), (__name__, "Feedback")]
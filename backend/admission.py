@@ -0,0 +1,223 @@
+"""
+Admission control for interview sessions and graph runs.
+
+Each worker caps how many interviews it has in progress and how many graph
+runs (resume analyses and turns) execute at once. Runs over the cap wait in
+a queue ordered by arrival, where new resume analyses are handicapped:
+turns of interviews already in progress go ahead of them, yet a resume
+that has waited long enough is served next rather than starved. A run whose estimated wait
+exceeds MAX_QUEUE_WAIT, or that waits that long, is rejected with
+AdmissionRejected, which the API turns into 429 with Retry-After. Under
+overload the candidates already admitted keep a predictable latency, and
+the rest are told when to come back instead of timing out.
+
+Limits are per worker process, like /metrics; the whole deployment admits
+up to workers x the caps.
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from utils import config
+from utils.cancellation import RunCancelled
+from utils.telemetry import ADMISSION_REJECTIONS, QUEUE_WAIT
+
+# Queue handicap by kind of run (seconds): a waiting resume analysis goes
+# after turns that arrive up to this long after it
+HANDICAP = {"turn": 0.0, "resume": 3.0}
+
+# How often a queued run checks for cancellation and its wait limit (seconds)
+POLL_INTERVAL = 0.25
+
+# Weight of the newest observation in the moving averages below
+EWMA_WEIGHT = 0.2
+
+
+class AdmissionRejected(Exception):
+    """Over capacity; try again after `retry_after` seconds."""
+
+    def __init__(self, message, retry_after, queue_position=None):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.queue_position = queue_position
+
+
+class _Waiter:
+    def __init__(self, kind):
+        self.kind = kind
+        self.loop = asyncio.get_running_loop()
+        self.future = self.loop.create_future()
+        self.abandoned = False
+        # Set with the lock held when a slot is taken for this waiter; the
+        # future only wakes it up, on its own loop, some time later
+        self.granted = False
+
+
+class Admission:
+    def __init__(self, max_runs, max_sessions, max_wait, idle_timeout):
+        self.max_runs = max_runs
+        self.max_sessions = max_sessions
+        self.max_wait = max_wait
+        self.idle_timeout = idle_timeout
+        # Shared by every event loop and threadpool thread in the process
+        self.lock = threading.Lock()
+        self.running = 0
+        self.queue = []
+        self.order = itertools.count()
+        self.run_seconds = 2.0
+        self.sessions = {}
+        self.session_seconds = 900.0
+
+    # -- sessions ---------------------------------------------------------
+
+    def _prune(self, now):
+        for session_id, (_, last_seen) in list(self.sessions.items()):
+            if now - last_seen > self.idle_timeout:
+                del self.sessions[session_id]
+
+    def admit_session(self, session_id):
+        """
+        Registers an interview, or raises AdmissionRejected at the session
+        cap. Returns True if the session is new to this worker.
+        """
+        now = time.monotonic()
+        with self.lock:
+            if session_id in self.sessions or not self.max_sessions:
+                new = session_id not in self.sessions
+                self.sessions[session_id] = (self.sessions.get(session_id, (now, now))[0], now)
+                return new
+            self._prune(now)
+            if len(self.sessions) >= self.max_sessions:
+                # The oldest interview is the likeliest to finish first
+                oldest = min(started for started, _ in self.sessions.values())
+                wait = max(self.session_seconds - (now - oldest), POLL_INTERVAL)
+                ADMISSION_REJECTIONS.inc(kind="resume", reason="sessions")
+                raise AdmissionRejected("All interview slots are taken.", wait)
+            self.sessions[session_id] = (now, now)
+            return True
+
+    def touch_session(self, session_id):
+        """Marks an interview as active (turns are never refused for the session cap)."""
+        now = time.monotonic()
+        with self.lock:
+            started = self.sessions.get(session_id, (now, now))[0]
+            self.sessions[session_id] = (started, now)
+
+    def end_session(self, session_id, completed=True):
+        """Frees the interview's slot; `completed` counts it towards the average length."""
+        with self.lock:
+            entry = self.sessions.pop(session_id, None)
+            if entry is not None and completed:
+                seconds = time.monotonic() - entry[0]
+                self.session_seconds += EWMA_WEIGHT * (seconds - self.session_seconds)
+
+    # -- runs -------------------------------------------------------------
+
+    def _position(self, due):
+        """Live waiters ahead of a run due at `due`."""
+        return sum(1 for d, _, waiter in self.queue if not waiter.abandoned and d <= due)
+
+    def estimate_wait(self, position):
+        """Seconds until the run at `position` in the queue (1 = next) starts."""
+        return math.ceil(position / max(self.max_runs, 1)) * self.run_seconds
+
+    def _grant_next(self):
+        # Called with the lock held after a slot frees up
+        while self.queue and (self.running < self.max_runs or not self.max_runs):
+            _, _, waiter = heapq.heappop(self.queue)
+            if waiter.abandoned:
+                continue
+            self.running += 1
+            waiter.granted = True
+            waiter.loop.call_soon_threadsafe(_grant, waiter)
+
+    def _release(self, seconds=None):
+        with self.lock:
+            self.running -= 1
+            if seconds is not None:
+                self.run_seconds += EWMA_WEIGHT * (seconds - self.run_seconds)
+            self._grant_next()
+
+    @asynccontextmanager
+    async def slot(self, kind, token=None, on_queued=None):
+        """
+        Holds one of the max_runs run slots for the duration of the block,
+        queueing by priority if none is free. `on_queued(position, wait)` is
+        awaited when the run has to queue; `position` counts from 1. Raises AdmissionRejected if the
+        wait is, or turns out to be, longer than max_wait, and RunCancelled
+        if `token` is cancelled while queued.
+        """
+        start = time.monotonic()
+        due = start + HANDICAP[kind]
+        with self.lock:
+            position = self._position(due)
+            if not self.max_runs or (self.running < self.max_runs and not position):
+                self.running += 1
+                waiter = None
+            else:
+                wait = self.estimate_wait(position + 1)
+                if wait > self.max_wait:
+                    ADMISSION_REJECTIONS.inc(kind=kind, reason="queue")
+                    raise AdmissionRejected("The interviewer is at capacity.", wait, position + 1)
+                waiter = _Waiter(kind)
+                heapq.heappush(self.queue, (due, next(self.order), waiter))
+
+        if waiter is not None:
+            try:
+                if on_queued is not None:
+                    await on_queued(position + 1, wait)
+                while not waiter.granted:
+                    await asyncio.wait({waiter.future}, timeout=POLL_INTERVAL)
+                    if waiter.granted:
+                        break
+                    if token is not None and token.cancelled:
+                        raise RunCancelled("Run cancelled: the client disconnected.")
+                    if time.monotonic() - start > self.max_wait:
+                        with self.lock:
+                            position = self._position(due)
+                        ADMISSION_REJECTIONS.inc(kind=kind, reason="timeout")
+                        raise AdmissionRejected("The interviewer is at capacity.", self.estimate_wait(position), position)
+            except BaseException:
+                with self.lock:
+                    waiter.abandoned = True
+                    granted = waiter.granted
+                if granted:
+                    self._release()
+                raise
+        QUEUE_WAIT.observe(time.monotonic() - start, kind=kind)
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+    def status(self):
+        with self.lock:
+            self._prune(time.monotonic())
+            queued = sum(1 for _, _, waiter in self.queue if not waiter.abandoned)
+            return {
+                "running": self.running,
+                "max_runs": self.max_runs,
+                "queued": queued,
+                "estimated_wait": self.estimate_wait(queued + 1) if queued else 0.0,
+                "active_sessions": len(self.sessions),
+                "max_sessions": self.max_sessions,
+            }
+
+
+def _grant(waiter):
+    if not waiter.future.done():
+        waiter.future.set_result(None)
+
+
+admission = Admission(
+    config.MAX_INFLIGHT_RUNS,
+    config.MAX_ACTIVE_SESSIONS,
+    config.MAX_QUEUE_WAIT,
+    config.SESSION_IDLE_TIMEOUT
+)
@@ -0,0 +1,208 @@
+"""
+Idempotency keys and cancellation for interview turns.
+
+A request carrying an idempotency key runs at most once. The key is claimed in
+SQLite, so duplicates arriving at any worker wait for the first execution and
+replay its stored response. Within one process, duplicates attach to the
+running execution directly instead of polling.
+
+Each execution gets a CancelToken. When every client waiting on it has
+disconnected, the token is cancelled and the graph stops at its next node or
+LLM call.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import time
+
+from fastapi.concurrency import run_in_threadpool
+
+from mcp_server.database import get_db_connection
+from utils.cancellation import CancelToken, RunCancelled
+from utils.telemetry import record_cache
+
+# Completed responses are replayable for this long
+KEY_TTL = 24 * 3600
+
+# A "running" claim older than this is assumed orphaned (its worker died)
+STALE_AFTER = 600
+
+# How often waiters check for disconnects and remote completion (seconds)
+POLL_INTERVAL = 0.25
+
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a different request."""
+
+
+class ClientDisconnected(Exception):
+    """Every client waiting on the execution went away."""
+
+
+def fingerprint(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def claim(key, request_fingerprint):
+    """
+    Claims `key` for this execution. Returns ("claimed", None), ("done",
+    response) or ("running", None) when another execution holds it.
+    """
+    now = time.time()
+    conn = get_db_connection()
+    try:
+        # Opportunistic expiry keeps the table bounded without a cron job
+        if random.random() < 0.01:
+            conn.execute("DELETE FROM idempotency_keys WHERE updated_at < ?", (now - KEY_TTL,))
+
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO idempotency_keys (key, fingerprint, status, updated_at) VALUES (?, ?, 'running', ?)",
+            (key, request_fingerprint, now)
+        )
+        if cursor.rowcount == 1:
+            conn.commit()
+            return "claimed", None
+
+        row = conn.execute("SELECT * FROM idempotency_keys WHERE key = ?", (key,)).fetchone()
+        if row["fingerprint"] != request_fingerprint:
+            raise IdempotencyConflict("Idempotency key was already used for a different request.")
+        if row["status"] == "done":
+            return "done", json.loads(row["response_json"])
+
+        if now - row["updated_at"] > STALE_AFTER:
+            taken = conn.execute(
+                "UPDATE idempotency_keys SET updated_at = ? WHERE key = ? AND status = 'running' AND updated_at = ?",
+                (now, key, row["updated_at"])
+            ).rowcount
+            conn.commit()
+            if taken:
+                return "claimed", None
+        return "running", None
+    finally:
+        conn.close()
+
+
+def complete(key, response):
+    conn = get_db_connection()
+    conn.execute(
+        "UPDATE idempotency_keys SET status = 'done', response_json = ?, updated_at = ? WHERE key = ?",
+        (json.dumps(response), time.time(), key)
+    )
+    conn.commit()
+    conn.close()
+
+
+def release(key):
+    """Drops a claim whose execution failed or was cancelled, so a retry runs again."""
+    conn = get_db_connection()
+    conn.execute("DELETE FROM idempotency_keys WHERE key = ? AND status = 'running'", (key,))
+    conn.commit()
+    conn.close()
+
+
+def lookup(key):
+    conn = get_db_connection()
+    row = conn.execute("SELECT status, response_json FROM idempotency_keys WHERE key = ?", (key,)).fetchone()
+    conn.close()
+    if row is None:
+        return "missing", None
+    if row["status"] == "done":
+        return "done", json.loads(row["response_json"])
+    return "running", None
+
+
+class Execution:
+    def __init__(self, request_fingerprint):
+        self.fingerprint = request_fingerprint
+        self.token = CancelToken()
+        self.task = None
+        self.waiters = 0
+
+
+_inflight = {}
+
+
+async def _wait_remote(key, request_fingerprint, work, token, admit):
+    """Another worker holds the key: poll until it finishes, or take over if its claim is dropped."""
+    while True:
+        await asyncio.sleep(POLL_INTERVAL)
+        if token.cancelled:
+            raise RunCancelled("Run cancelled: the client disconnected.")
+        status, response = await run_in_threadpool(lookup, key)
+        if status == "done":
+            return response
+        if status == "missing":
+            # The other execution failed or was cancelled; run it here instead
+            return await _run(key, request_fingerprint, work, token, admit)
+
+
+async def _run(key, request_fingerprint, work, token, admit):
+    if key is not None:
+        status, response = await run_in_threadpool(claim, key, request_fingerprint)
+        record_cache("idempotency", status != "claimed")
+        if status == "done":
+            return response
+        if status == "running":
+            return await _wait_remote(key, request_fingerprint, work, token, admit)
+
+    try:
+        if admit is None:
+            response = await run_in_threadpool(work, token)
+        else:
+            # Only the execution that actually runs takes an admission slot
+            async with admit(token):
+                response = await run_in_threadpool(work, token)
+    except BaseException:
+        if key is not None:
+            await run_in_threadpool(release, key)
+        raise
+
+    if key is not None:
+        await run_in_threadpool(complete, key, response)
+    return response
+
+
+def _finished(key, execution):
+    def callback(task):
+        if _inflight.get(key) is execution:
+            del _inflight[key]
+        # Nobody may be left to await a cancelled run; retrieve its error here
+        if not task.cancelled():
+            task.exception()
+    return callback
+
+
+async def execute(key, request_fingerprint, work, is_disconnected=None, admit=None):
+    """
+    Runs `work(token)` in the threadpool at most once per idempotency key
+    (None disables deduplication) and returns its JSON-serialisable result.
+    `is_disconnected` is an async callable polled while waiting; when every
+    waiter has disconnected the run is cancelled and ClientDisconnected raised.
+    `admit(token)`, if given, is an async context manager held around the
+    run (see backend/admission.py); what it raises propagates unchanged.
+    """
+    execution = _inflight.get(key) if key is not None else None
+    if execution is not None and execution.fingerprint != request_fingerprint:
+        raise IdempotencyConflict("Idempotency key was already used for a different request.")
+    if execution is None or execution.token.cancelled:
+        execution = Execution(request_fingerprint)
+        execution.task = asyncio.ensure_future(_run(key, request_fingerprint, work, execution.token, admit))
+        execution.task.add_done_callback(_finished(key, execution))
+        if key is not None:
+            _inflight[key] = execution
+    else:
+        record_cache("idempotency", True)
+
+    execution.waiters += 1
+    try:
+        while True:
+            done, _ = await asyncio.wait({execution.task}, timeout=POLL_INTERVAL)
+            if done:
+                return execution.task.result()
+            if is_disconnected is not None and await is_disconnected():
+                raise ClientDisconnected()
+    finally:
+        execution.waiters -= 1
+        if execution.waiters == 0 and not execution.task.done():
+            execution.token.cancel()
@@ -1,24 +1,81 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
+from contextlib import asynccontextmanager
+import asyncio
 import sys
 import os
+import threading
+import time
+import traceback
+import uuid
 from dotenv import load_dotenv
 
 # Add project root to path to import agents
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from agents.graph import app_graph
-from mcp_server.database import init_db
-from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
+from utils.telemetry import render_prometheus, get_session_trace
+from utils.cancellation import CancellationCallback
+from agents.state import Message, ai, human
+from utils import config
+from backend import idempotency
+from backend.admission import AdmissionRejected, admission
+from backend.scorecard import hub as scorecards
 
 load_dotenv()
-init_db()
 
-app = FastAPI(title="VIntervu 2.0 API")
+# The graph, LangChain/Gemini clients, checkpointer and database are set up
+# by warm_up(), not at import, so the process can answer health checks while
+# they load. See VINTERVU_WARMUP in utils/config.py.
+warmup_state = {"status": "cold", "seconds": None, "error": None}
+_warmup_lock = threading.Lock()
+
+def warm_up():
+    """Initialises the database and compiles the interview graph. Idempotent."""
+    with _warmup_lock:
+        if warmup_state["status"] == "ready":
+            return
+        warmup_state["status"] = "warming"
+        start = time.perf_counter()
+        try:
+            from mcp_server.database import init_db
+            from agents.graph import get_app_graph
+            
+            init_db()
+            get_app_graph()
+        except Exception as e:
+            warmup_state.update(status="failed", error=str(e))
+            raise
+        warmup_state.update(status="ready", seconds=time.perf_counter() - start, error=None)
+
+def background_warm_up():
+    try:
+        warm_up()
+    except Exception:
+        # Reported by /readyz; the next request retries
+        traceback.print_exc()
+
+def get_graph():
+    if warmup_state["status"] != "ready":
+        warm_up()
+    from agents.graph import get_app_graph
+    return get_app_graph()
+
+@asynccontextmanager
+async def lifespan(app):
+    if config.WARMUP == "eager":
+        await run_in_threadpool(warm_up)
+    elif config.WARMUP == "background":
+        threading.Thread(target=background_warm_up, name="graph-warmup", daemon=True).start()
+    yield
+
+app = FastAPI(title="VIntervu 2.0 API", lifespan=lifespan)
 
 class ResumeRequest(BaseModel):
     resume_text: str
+    session_id: Optional[str] = None
 
 class ChatRequest(BaseModel):
     message: str
@@ -30,69 +87,444 @@ class ChatResponse(BaseModel):
     response: str
     candidate_profile: Optional[Dict[str, Any]] = None
     code_output: Optional[str] = None
+    code_similarity: Optional[Dict[str, Any]] = None
+    session_id: Optional[str] = None
 
-def dict_to_messages(history: List[Dict[str, str]]) -> List[BaseMessage]:
+def dict_to_messages(history: List[Dict[str, str]]) -> List[Message]:
     messages = []
     for msg in history:
         if msg["role"] == "user":
-            messages.append(HumanMessage(content=msg["content"]))
+            messages.append(human(msg["content"]))
         elif msg["role"] == "assistant":
-            messages.append(AIMessage(content=msg["content"]))
+            messages.append(ai(msg["content"]))
     return messages
 
-@app.post("/analyze-resume", response_model=ChatResponse)
-async def analyze_resume(request: ResumeRequest):
+def thread_config(session_id: str, token=None, endpoint="unknown") -> Dict[str, Any]:
+    # Each interview session is a checkpointed graph thread
+    run_config = {"configurable": {"thread_id": session_id}}
+    if token is not None:
+        # Propagates to every node and LLM call in the run
+        run_config["callbacks"] = [CancellationCallback(token, endpoint)]
+    return run_config
+
+# State fields pushed to WebSocket clients when they change
+DELTA_KEYS = ("candidate_profile", "interview_stage", "code_output", "code_similarity")
+
+def message_to_dict(message: Message) -> Dict[str, str]:
+    return {"role": "user" if message.type == "human" else "assistant", "content": message.content}
+
+def agent_messages(result: Dict[str, Any], seen: int) -> List[Message]:
+    """Agent messages produced after the first `seen` messages."""
+    new = [m for m in result["messages"][seen:] if m.type != "human"]
+    return new or result["messages"][-1:]
+
+def new_messages_text(result: Dict[str, Any], seen: int) -> str:
+    """Joins the agent messages produced after the first `seen` messages."""
+    return "\n\n".join(m.content if hasattr(m, "content") else str(m) for m in agent_messages(result, seen))
+
+def start_interview(session_id: str, resume_text: str, token=None):
+    """Runs resume analysis for a new session. Returns (result, messages seen before)."""
+    initial_state = {
+        "messages": [],
+        "resume_text": resume_text,
+        "candidate_profile": None,
+        "session_id": session_id
+    }
+    return get_graph().invoke(initial_state, thread_config(session_id, token, "analyze-resume")), 0
+
+def is_pending_answer(messages: List[Message], message: str) -> bool:
+    """True if `message` is the thread's last message, i.e. an earlier attempt at this turn never answered it."""
+    return bool(messages) and messages[-1].type == "human" and messages[-1].content == message
+
+def answer_turn(session_id: str, message: str, history=None, candidate_profile=None, token=None):
+    """Runs one candidate turn. Returns (result, messages seen before the new agent output)."""
+    from agents.graph import turn_input
+    
+    app_graph = get_graph()
+    config = thread_config(session_id, token, "chat")
+    snapshot = app_graph.get_state(config)
+    existing = snapshot.values.get("messages", [])
+    
+    if existing and is_pending_answer(existing, message):
+        # A failed or cancelled attempt at this answer left its writes (the
+        # answer included) pending on the pre-turn checkpoint, where a new run
+        # would replay them. Run the retry from a clean copy of that checkpoint.
+        app_graph.update_state(config, None, as_node="__copy__")
+        snapshot = app_graph.get_state(config)
+        existing = snapshot.values.get("messages", [])
+    
+    if existing:
+        # The checkpoint already holds the history; only send the new answer
+        return app_graph.invoke(turn_input(snapshot, message), config), len(existing) + 1
+    
+    # No checkpoint for this session: reconstruct state from the client
+    update = {
+        "messages": dict_to_messages(history or []) + [human(message)],
+        "candidate_profile": candidate_profile,
+        "interview_stage": "technical" if candidate_profile else "self_intro",
+        "session_id": session_id
+    }
+    return app_graph.invoke(update, config), len(update["messages"])
+
+def delta_payload(result: Dict[str, Any], messages: List[Message]) -> Dict[str, Any]:
+    return {
+        "offset": len(result.get("messages", [])) - len(messages),
+        "messages": [message_to_dict(m) for m in messages],
+        "state": {k: result.get(k) for k in DELTA_KEYS}
+    }
+
+async def ensure_ready():
+    # Idempotency keys are claimed in the database before the graph runs
+    if warmup_state["status"] != "ready":
+        await run_in_threadpool(warm_up)
+
+def admit(kind, on_queued=None):
+    """Admission for execute(): holds a run slot of `kind` ("turn" or "resume")."""
+    return lambda token: admission.slot(kind, token, on_queued)
+
+def finish_if_completed(session_id: str, result: Dict[str, Any]):
+    if result.get("interview_stage") == "completed":
+        admission.end_session(session_id)
+
+def too_busy(e: AdmissionRejected) -> HTTPException:
+    # Over capacity: tell the client when to come back instead of timing out
+    return HTTPException(
+        status_code=429,
+        detail={"message": str(e), "retry_after": e.retry_after, "queue_position": e.queue_position},
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+def versioned_key(key):
+    """
+    `key` scoped to the current prompts (agents.prompts.prompt_set_key), so
+    a reply produced by older prompts is never replayed after a deploy
+    changes them. Imports the agents, so call it after ensure_ready().
+    """
+    if key is None:
+        return None
+    from agents.prompts import prompt_set_key
+    return f"{key}:{prompt_set_key()}"
+
+async def run_idempotent(key, request_fingerprint, work, is_disconnected, kind):
+    """Maps execute() outcomes onto HTTP errors. Returns None if the client went away."""
+    await ensure_ready()
     try:
-        initial_state = {
-            "messages": [],
-            "resume_text": request.resume_text,
-            "candidate_profile": None
-        }
-        result = app_graph.invoke(initial_state)
-        
-        last_msg = result["messages"][-1]
-        content = last_msg.content if isinstance(last_msg, BaseMessage) else str(last_msg)
-        
+        return await idempotency.execute(versioned_key(key), request_fingerprint, work, is_disconnected, admit(kind))
+    except idempotency.ClientDisconnected:
+        return None
+    except idempotency.IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except AdmissionRejected as e:
+        raise too_busy(e)
+
+# 499 (nginx's "client closed request"): nobody is left to read the response
+CLIENT_CLOSED = 499
+
+@app.post("/analyze-resume", response_model=ChatResponse)
+async def analyze_resume(request: ResumeRequest, http_request: Request, idempotency_key: Optional[str] = Header(None)):
+    session_id = request.session_id or str(uuid.uuid4())
+    
+    def work(token):
+        result, seen = start_interview(session_id, request.resume_text, token)
         return ChatResponse(
-            response=content,
-            candidate_profile=result.get("candidate_profile")
+            response=new_messages_text(result, seen),
+            candidate_profile=result.get("candidate_profile"),
+            session_id=session_id
+        ).model_dump()
+    
+    # Without a client session id, a retry would start a new session anyway
+    key = f"analyze-resume:{request.session_id}:{idempotency_key}" if idempotency_key and request.session_id else None
+    new_session, response = False, None
+    try:
+        new_session = admission.admit_session(session_id)
+        response = await run_idempotent(
+            key,
+            idempotency.fingerprint(request.session_id, request.resume_text),
+            work,
+            http_request.is_disconnected,
+            "resume"
         )
+    except AdmissionRejected as e:
+        raise too_busy(e)
+    except HTTPException:
+        raise
     except Exception as e:
-        import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if new_session and response is None:
+            # Failed, refused or abandoned: don't hold an interview slot for it
+            admission.end_session(session_id, completed=False)
+    
+    if response is None:
+        return Response(status_code=CLIENT_CLOSED)
+    return response
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
-    try:
-        # Reconstruct state
-        current_messages = dict_to_messages(request.history)
-        current_messages.append(HumanMessage(content=request.message))
-        
-        initial_state = {
-            "messages": current_messages,
-            "candidate_profile": request.candidate_profile,
-            "interview_stage": "introduction" if not request.candidate_profile else "technical", # Simplified logic
-            "session_id": request.session_id
-        }
-        
-        result = app_graph.invoke(initial_state)
-        
-        # Get the new response (last message)
-        # Note: In a real app, we might get multiple new messages. For now, taking the last one.
-        new_messages = result["messages"][len(current_messages)-1:] # -1 because we added one above
-        # Actually, let's just take the very last message generated by the agent
-        last_agent_msg = result["messages"][-1]
-        content = last_agent_msg.content if isinstance(last_agent_msg, BaseMessage) else str(last_agent_msg)
-        
+async def chat(request: ChatRequest, http_request: Request, idempotency_key: Optional[str] = Header(None)):
+    def work(token):
+        result, seen = answer_turn(
+            request.session_id,
+            request.message,
+            request.history,
+            request.candidate_profile,
+            token
+        )
+        finish_if_completed(request.session_id, result)
         return ChatResponse(
-            response=content,
+            response=new_messages_text(result, seen),
             candidate_profile=result.get("candidate_profile"),
-            code_output=result.get("code_output")
+            code_output=result.get("code_output"),
+            code_similarity=result.get("code_similarity"),
+            session_id=request.session_id
+        ).model_dump()
+    
+    key = f"chat:{request.session_id}:{idempotency_key}" if idempotency_key else None
+    # Turns of interviews already in progress are never refused for the
+    # session cap, and queue ahead of new resumes
+    admission.touch_session(request.session_id)
+    try:
+        response = await run_idempotent(
+            key,
+            idempotency.fingerprint(request.session_id, request.message),
+            work,
+            http_request.is_disconnected,
+            "turn"
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    if response is None:
+        return Response(status_code=CLIENT_CLOSED)
+    await scorecards.notify(request.session_id)
+    return response
+
+@app.websocket("/ws/{session_id}")
+async def interview_socket(websocket: WebSocket, session_id: str):
+    """
+    Persistent interview channel. The client sends only its new input and
+    receives only new agent messages plus the state fields that changed:
+
+        -> {"type": "resume", "resume_text": "...", "idempotency_key": "..."}
+        -> {"type": "answer", "message": "...", "idempotency_key": "..."}
+        -> {"type": "sync", "offset": 12}   (after a reconnect)
+        <- {"type": "delta", "offset": 12, "messages": [...], "state": {...}}
+        <- {"type": "queued", "position": 3, "estimated_wait": 10.0}
+        <- {"type": "busy", "detail": "...", "retry_after": 30, "queue_position": 9}
+
+    Disconnecting while a turn runs cancels it (unless a duplicate request
+    with the same idempotency key is still waiting on it). Over capacity, a
+    run first reports its place in the queue, and is refused with "busy"
+    if the wait would be too long; the client may send it again later.
+    """
+    await websocket.accept()
+    sent_state = {}
+    next_event = None
+    try:
+        while True:
+            event = next_event or await websocket.receive_json()
+            next_event = None
+            
+            kind = event.get("type")
+            key = event.get("idempotency_key")
+            if kind == "resume":
+                def work(token, resume_text=event.get("resume_text", "")):
+                    result, seen = start_interview(session_id, resume_text, token)
+                    return delta_payload(result, agent_messages(result, seen))
+                key = f"analyze-resume:{session_id}:{key}" if key else None
+                request_fingerprint = idempotency.fingerprint(session_id, event.get("resume_text"))
+                run_kind = "resume"
+            elif kind == "answer":
+                def work(token, message=event.get("message", "")):
+                    result, seen = answer_turn(session_id, message, token=token)
+                    finish_if_completed(session_id, result)
+                    return delta_payload(result, agent_messages(result, seen))
+                key = f"chat:{session_id}:{key}" if key else None
+                request_fingerprint = idempotency.fingerprint(session_id, event.get("message"))
+                run_kind = "turn"
+            elif kind == "sync":
+                def work(token, offset=event.get("offset", 0)):
+                    result = get_graph().get_state(thread_config(session_id)).values
+                    return delta_payload(result, result.get("messages", [])[offset:])
+                # Reads a checkpoint; no graph run, so no admission
+                key, request_fingerprint, run_kind = None, None, None
+            else:
+                await websocket.send_json({"type": "error", "detail": f"Unknown event type: {kind}"})
+                continue
+            
+            # Keep reading while the turn runs so a disconnect is noticed
+            # immediately; an early next message is kept for the next loop
+            receiver = asyncio.ensure_future(websocket.receive_json())
+            
+            async def is_disconnected():
+                return receiver.done() and (receiver.cancelled() or receiver.exception() is not None)
+            
+            async def on_queued(position, wait):
+                await websocket.send_json({"type": "queued", "position": position, "estimated_wait": wait})
+            
+            new_session, payload = False, None
+            try:
+                if run_kind == "resume":
+                    new_session = admission.admit_session(session_id)
+                elif run_kind == "turn":
+                    admission.touch_session(session_id)
+                await ensure_ready()
+                payload = await idempotency.execute(
+                    versioned_key(key), request_fingerprint, work, is_disconnected,
+                    admit(run_kind, on_queued) if run_kind else None
+                )
+            except idempotency.ClientDisconnected:
+                return
+            except AdmissionRejected as e:
+                await websocket.send_json({"type": "busy", "detail": str(e), "retry_after": e.retry_after, "queue_position": e.queue_position})
+            except Exception as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+            finally:
+                if new_session and payload is None:
+                    # Failed, refused or abandoned: don't hold an interview slot for it
+                    admission.end_session(session_id, completed=False)
+                if not receiver.done():
+                    receiver.cancel()
+                elif receiver.exception() is None:
+                    next_event = receiver.result()
+            
+            if payload is None:
+                continue
+            changed = {k: v for k, v in payload["state"].items() if sent_state.get(k) != v}
+            sent_state.update(changed)
+            await websocket.send_json({
+                "type": "delta",
+                "offset": payload["offset"],
+                "messages": payload["messages"],
+                "state": changed
+            })
+            if kind == "answer":
+                await scorecards.notify(session_id)
+    except WebSocketDisconnect:
+        pass
+
+@app.websocket("/ws/{session_id}/scorecard")
+async def scorecard_socket(websocket: WebSocket, session_id: str):
+    """
+    Live scorecard for observers: the current one on connect, then each
+    change as answers are scored. Observers share one poll per worker, so
+    adding more adds no database or LLM load.
+
+        <- {"type": "scorecard", "session_id": "...", "answers": 7, "overall": 6.4,
+            "stages": {"technical": {"answers": 5, "scored": 5, "mean": 6.2, "min": 4, "max": 8, "last": 7}}}
+    """
+    await websocket.accept()
+    queue = await scorecards.subscribe(session_id)
+    # Only to notice the observer leaving; nothing is expected from it
+    receiver = asyncio.ensure_future(websocket.receive())
+    try:
+        while True:
+            update = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({update, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                if receiver.result()["type"] == "websocket.disconnect":
+                    update.cancel()
+                    break
+                receiver = asyncio.ensure_future(websocket.receive())
+            if update in done:
+                await websocket.send_json({"type": "scorecard", **update.result()})
+            else:
+                update.cancel()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        scorecards.unsubscribe(session_id, queue)
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: the interview graph is compiled (or will be on first use in lazy mode)."""
+    status = warmup_state["status"]
+    ready = status == "ready" or (config.WARMUP == "lazy" and status != "failed")
+    return JSONResponse(
+        {"status": status, "mode": config.WARMUP, "warmup_seconds": warmup_state["seconds"], "error": warmup_state["error"]},
+        status_code=200 if ready else 503
+    )
+
+@app.get("/admission")
+async def admission_status():
+    """This worker's load: runs executing and queued, estimated wait, interviews in progress."""
+    return admission.status()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/analytics/cohort")
+async def analytics_cohort(since: Optional[str] = None, until: Optional[str] = None, top: int = 20):
+    """Cohort percentiles, per-stage z-scores and ranking from the columnar score store."""
+    from mcp_server import analytics
+    
+    return await run_in_threadpool(analytics.cohort_report, since, until, top)
+
+@app.get("/sessions/{session_id}/scorecard")
+async def session_scorecard(session_id: str):
+    """Per-stage answer counts and score mean/min/max so far, from the live aggregates."""
+    from mcp_server.database import get_scorecard
+    
+    return await run_in_threadpool(get_scorecard, session_id)
+
+@app.get("/sessions/{session_id}/trace")
+async def session_trace(session_id: str):
+    spans = get_session_trace(session_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail="No trace recorded for this session.")
+    return {"session_id": session_id, "spans": spans}
+
+def start_shared_mcp_server():
+    """Starts the single MCP server (streamable HTTP) that all workers share."""
+    import subprocess
+    import time
+
+    server_path = os.path.join(config.ROOT, "mcp_server", "server.py")
+    process = subprocess.Popen([sys.executable, server_path, "--transport", "streamable-http"])
+    url = f"http://{config.MCP_HOST}:{config.MCP_PORT}/mcp"
+
+    # Wait until it accepts connections so the first tool call doesn't fail
+    import socket
+    for _ in range(50):
+        try:
+            socket.create_connection((config.MCP_HOST, config.MCP_PORT), timeout=0.2).close()
+            break
+        except OSError:
+            time.sleep(0.2)
+    return process, url
 
 if __name__ == "__main__":
+    import argparse
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+
+    parser = argparse.ArgumentParser(description="VIntervu API server")
+    parser.add_argument("--workers", type=int, default=config.WORKERS)
+    parser.add_argument("--host", default=config.HOST)
+    parser.add_argument("--port", type=int, default=config.PORT)
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        uvicorn.run(app, host=args.host, port=args.port)
+    else:
+        # Workers share sessions through the checkpoint store, so no affinity is
+        # needed; they also share one MCP server instead of spawning one each
+        mcp_process = None
+        # In-process tools need no server; they share the SQLite file directly
+        if config.MCP_TRANSPORT == "stdio":
+            mcp_process, url = start_shared_mcp_server()
+            os.environ["VINTERVU_MCP_URL"] = url
+            os.environ["VINTERVU_MCP_TRANSPORT"] = "http"
+        try:
+            uvicorn.run("backend.main:app", host=args.host, port=args.port, workers=args.workers)
+        finally:
+            if mcp_process:
+                mcp_process.terminate()
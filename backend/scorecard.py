@@ -0,0 +1,82 @@
+"""
+Live scorecards pushed to observers of running interviews.
+
+Scores come from the session_scorecard aggregates (mcp_server/database.py),
+which a trigger updates with every logged answer. Each worker runs one
+poller for all the sessions its observers watch: one query per
+POLL_INTERVAL, however many observers there are, and only while someone is
+watching. A turn that finishes in this worker is published at once via
+notify(). Observers get the latest scorecard; a slow one skips versions
+rather than queueing them.
+"""
+import asyncio
+import time
+
+from fastapi.concurrency import run_in_threadpool
+
+from mcp_server.database import get_scorecard, scorecards_updated_since
+
+# How often watched sessions are checked for answers logged by other workers (seconds)
+POLL_INTERVAL = 1.0
+
+
+class ScorecardHub:
+    def __init__(self):
+        self.watchers = {}
+        self.latest = {}
+        self.since = 0.0
+        self.poller = None
+
+    async def subscribe(self, session_id):
+        """A queue that receives the session's scorecard now and after every change."""
+        queue = asyncio.Queue(maxsize=1)
+        self.watchers.setdefault(session_id, set()).add(queue)
+        scorecard = self.latest.get(session_id)
+        if scorecard is None:
+            scorecard = await run_in_threadpool(get_scorecard, session_id)
+            self.latest[session_id] = scorecard
+        _offer(queue, scorecard)
+        if self.poller is None or self.poller.done():
+            self.poller = asyncio.ensure_future(self._poll())
+        return queue
+
+    def unsubscribe(self, session_id, queue):
+        queues = self.watchers.get(session_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.watchers[session_id]
+                self.latest.pop(session_id, None)
+
+    def publish(self, scorecard):
+        session_id = scorecard["session_id"]
+        previous = self.latest.get(session_id)
+        if previous is not None and previous["updated_at"] == scorecard["updated_at"]:
+            return
+        self.latest[session_id] = scorecard
+        for queue in self.watchers.get(session_id, ()):
+            _offer(queue, scorecard)
+
+    async def notify(self, session_id):
+        """Publishes a session's scorecard right after one of its turns, if anyone watches it."""
+        if session_id in self.watchers:
+            self.publish(await run_in_threadpool(get_scorecard, session_id))
+
+    async def _poll(self):
+        while self.watchers:
+            await asyncio.sleep(POLL_INTERVAL)
+            # Overlap a little, so a row committed during the query isn't missed
+            since, self.since = self.since, time.time() - POLL_INTERVAL
+            changed = await run_in_threadpool(scorecards_updated_since, list(self.watchers), since)
+            for scorecard in changed.values():
+                self.publish(scorecard)
+
+
+def _offer(queue, scorecard):
+    # Keep only the newest scorecard for an observer that hasn't caught up
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(scorecard)
+
+
+hub = ScorecardHub()
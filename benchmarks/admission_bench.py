@@ -0,0 +1,133 @@
+"""
+Benchmarks admission control (backend/admission.py) under overload.
+
+`--active` interviews are already in progress and keep answering questions
+while `--arrivals` new candidates upload resumes at once, against a fake
+LLM that slows down past `--capacity` concurrent requests like a provider
+quota. The run is repeated with admission disabled (every request
+accepted) and with the configured caps, reporting turn latency of the
+interviews in progress, how new resumes fared, and how many requests were
+turned away with 429.
+
+    python benchmarks/admission_bench.py --active 20 --arrivals 60 --max-runs 8
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from benchmarks.run_benchmarks import setup_environment, latency_summary
+
+
+def run(app, admission, args, limits, label):
+    from fastapi.testclient import TestClient
+    from benchmarks.candidates import ScriptedCandidate
+
+    admission.max_runs, admission.max_sessions = 0, 0
+    admission.sessions.clear()
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, "client"):
+            local.client = TestClient(app)
+        return local.client
+
+    # Interviews already in progress before the surge (admitted before the limits apply)
+    active = [f"{label}-active-{i}" for i in range(args.active)]
+    with ThreadPoolExecutor(max_workers=args.active) as pool:
+        list(pool.map(
+            lambda i: client().post("/analyze-resume", json={"resume_text": ScriptedCandidate(i).resume, "session_id": active[i]}).raise_for_status(),
+            range(args.active)
+        ))
+    admission.max_runs, admission.max_sessions = limits
+
+    deadline = time.perf_counter() + args.duration
+    turns, turn_codes = [], []
+    resumes, resume_codes = [], []
+
+    def interview(i):
+        candidate = ScriptedCandidate(i)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = client().post("/chat", json={"session_id": active[i], "message": candidate.respond("technical")})
+            turn_codes.append(response.status_code)
+            if response.status_code == 200:
+                turns.append(time.perf_counter() - start)
+                time.sleep(args.think)
+            else:
+                time.sleep(float(response.headers.get("Retry-After", 1)))
+
+    def arrive(i):
+        start = time.perf_counter()
+        response = client().post("/analyze-resume", json={"resume_text": ScriptedCandidate(i).resume, "session_id": f"{label}-new-{i}"})
+        resume_codes.append(response.status_code)
+        if response.status_code == 200:
+            resumes.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.active + args.arrivals) as pool:
+        futures = [pool.submit(interview, i) for i in range(args.active)]
+        futures += [pool.submit(arrive, i) for i in range(args.arrivals)]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "elapsed_seconds": elapsed,
+        "turns_per_second": len(turns) / elapsed,
+        "turn_latency": latency_summary(turns),
+        "turns_rejected": sum(code == 429 for code in turn_codes),
+        "turn_errors": sum(code not in (200, 429) for code in turn_codes),
+        "resumes_admitted": len(resumes),
+        "resumes_rejected": sum(code == 429 for code in resume_codes),
+        "resume_errors": sum(code not in (200, 429) for code in resume_codes),
+        "resume_latency": latency_summary(resumes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Admission control overload benchmark.")
+    parser.add_argument("--active", type=int, default=20, help="Interviews in progress")
+    parser.add_argument("--arrivals", type=int, default=60, help="New resumes arriving at once")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds the interviews keep answering")
+    parser.add_argument("--think", type=float, default=1.0, help="Seconds a candidate takes to answer")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM latency when under capacity (s)")
+    parser.add_argument("--capacity", type=int, default=8, help="Concurrent LLM requests before the fake provider slows down")
+    parser.add_argument("--max-runs", type=int, default=8)
+    parser.add_argument("--max-sessions", type=int, default=40)
+    parser.add_argument("--max-queue-wait", type=float, default=5.0)
+    parser.add_argument("--verbose", action="store_true", help="Show the agents' own progress output")
+    args = parser.parse_args()
+
+    setup_environment(tempfile.mkdtemp(prefix="vintervu-admission-"))
+    os.environ["VINTERVU_MAX_QUEUE_WAIT"] = str(args.max_queue_wait)
+
+    from utils.llm import set_llm_factory
+    from benchmarks.fake_llm import fake_llm_factory
+
+    set_llm_factory(fake_llm_factory(latency=args.latency, capacity=args.capacity))
+
+    from fastapi.testclient import TestClient
+    from backend.main import app
+    from backend.admission import admission
+
+    results = {}
+    with open(os.devnull, "w") as devnull, contextlib.ExitStack() as stack:
+        if not args.verbose:
+            stack.enter_context(contextlib.redirect_stdout(devnull))
+        stack.enter_context(TestClient(app))
+        results["unlimited"] = run(app, admission, args, (0, 0), "unlimited")
+        results["admission"] = run(app, admission, args, (args.max_runs, args.max_sessions), "admission")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Hot database size and query latency before and after archiving old
+interviews to cold storage (mcp_server/database.py, archive_older_than).
+
+Fills interview_logs, candidates and resumes with `--sessions` synthetic interviews
+spread over `--months` months, then archives everything idle for more than
+`--older-than` days and compacts the hot file. Reports the hot file size, a full
+analytics-style scan, per-session lookups of recent interviews, a backup of
+the hot file, and read-through latency for archived sessions.
+
+    python benchmarks/archive_bench.py --sessions 20000
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from benchmarks.run_benchmarks import setup_environment, latency_summary
+
+STAGES = ("self_intro", "technical", "dsa")
+
+
+def make_words(rng, count=3000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(2, 10))) for _ in range(count)]
+
+
+def text(rng, words, chars):
+    out, size = [], 0
+    while size < chars:
+        word = rng.choice(words)
+        out.append(word)
+        size += len(word) + 1
+    return " ".join(out)
+
+
+def populate(conn, rng, sessions, rows, months):
+    from mcp_server.database import save_candidate
+
+    words = make_words(rng)
+    now = datetime.now(timezone.utc)
+    for s in range(sessions):
+        started = now - timedelta(days=rng.uniform(0, months * 30))
+        created_at = started.strftime("%Y-%m-%d %H:%M:%S")
+        # Saved the way the resume analyst saves them, then backdated
+        resume = text(rng, words, 4000)
+        candidate_id = save_candidate(f"Candidate {s}", resume, {"skills": text(rng, words, 600)})
+        conn.execute("UPDATE candidates SET created_at = ? WHERE id = ?", (created_at, candidate_id))
+        conn.execute("UPDATE resumes SET created_at = ? WHERE hash = ?", (created_at, hashlib.sha256(resume.encode("utf-8")).hexdigest()))
+        conn.executemany(
+            """
+            INSERT INTO interview_logs (session_id, question, answer, evaluation, score, stage, topic, difficulty, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (f"session-{s}", text(rng, words, 300), text(rng, words, 800), text(rng, words, 500),
+                 rng.randint(1, 10), rng.choice(STAGES), "topic", "medium",
+                 (started + timedelta(minutes=3 * i)).strftime("%Y-%m-%d %H:%M:%S"))
+                for i in range(rows)
+            ]
+        )
+        # save_candidate writes on its own connection
+        conn.commit()
+
+
+def measure(db_path, recent, queries):
+    from mcp_server.database import get_db_connection, get_session_logs
+
+    conn = get_db_connection()
+    start = time.perf_counter()
+    conn.execute("SELECT stage, COUNT(*), AVG(score), MAX(length(answer)) FROM interview_logs GROUP BY stage").fetchall()
+    scan = time.perf_counter() - start
+    conn.close()
+
+    lookups = []
+    for session_id in queries(recent):
+        start = time.perf_counter()
+        get_session_logs(session_id)
+        lookups.append(time.perf_counter() - start)
+
+    backup_path = db_path + ".backup"
+    start = time.perf_counter()
+    source, target = sqlite3.connect(db_path), sqlite3.connect(backup_path)
+    source.backup(target)
+    source.close()
+    target.close()
+    backup = time.perf_counter() - start
+    os.remove(backup_path)
+
+    ms = lambda summary: {k: (v * 1000 if k != "count" else v) for k, v in summary.items()}
+    return {
+        "hot_db_bytes": os.path.getsize(db_path),
+        "full_scan_ms": scan * 1000,
+        "recent_session_lookup_ms": ms(latency_summary(lookups)),
+        "backup_ms": backup * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot/cold archival benchmark.")
+    parser.add_argument("--sessions", type=int, default=20000)
+    parser.add_argument("--rows", type=int, default=12, help="Logged answers per session")
+    parser.add_argument("--months", type=int, default=24, help="History spread over this many months")
+    parser.add_argument("--older-than", type=int, default=90, help="Archive sessions idle this many days")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="vintervu-archive-")
+    setup_environment(workdir)
+
+    from mcp_server.database import init_db, get_db_connection, archive_older_than, compact, get_session_logs
+
+    init_db()
+    rng = random.Random(args.seed)
+    conn = get_db_connection()
+    populate(conn, rng, args.sessions, args.rows, args.months)
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=args.older_than)).strftime("%Y-%m-%d %H:%M:%S")
+    sessions = conn.execute("SELECT session_id, MAX(timestamp) AS last FROM interview_logs GROUP BY session_id").fetchall()
+    conn.close()
+
+    recent = [row["session_id"] for row in sessions if row["last"] >= cutoff]
+    old = [row["session_id"] for row in sessions if row["last"] < cutoff]
+    queries = lambda ids: rng.sample(ids, min(args.queries, len(ids)))
+
+    db_path = os.environ["VINTERVU_DB_PATH"]
+    before = measure(db_path, recent, queries)
+
+    start = time.perf_counter()
+    archived = archive_older_than(args.older_than)
+    archive_seconds = time.perf_counter() - start
+    compact()
+
+    after = measure(db_path, recent, queries)
+
+    sample = queries(old)
+    cold, warm = [], []
+    for session_id in sample:
+        start = time.perf_counter()
+        get_session_logs(session_id)
+        cold.append(time.perf_counter() - start)
+    for session_id in sample:
+        start = time.perf_counter()
+        get_session_logs(session_id)
+        warm.append(time.perf_counter() - start)
+
+    archive_dir = os.environ["VINTERVU_ARCHIVE_DIR"]
+    archive_bytes = sum(os.path.getsize(os.path.join(archive_dir, f)) for f in os.listdir(archive_dir))
+    ms = lambda summary: {k: (v * 1000 if k != "count" else v) for k, v in summary.items()}
+    print(json.dumps({
+        "sessions": args.sessions,
+        "recent_sessions": len(recent),
+        "archived": archived,
+        "archive_seconds": archive_seconds,
+        "archive_bytes": archive_bytes,
+        "before": before,
+        "after": after,
+        "archived_lookup_ms": ms(latency_summary(cold)),
+        "archived_lookup_cached_ms": ms(latency_summary(warm)),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+RESUME = """
+Bench Candidate
+Backend Engineer, 4 years
+
+Experience
+- Built a payments API in FastAPI and PostgreSQL handling 2k req/s.
+- Migrated batch jobs to Kafka consumers with exactly-once processing.
+
+Skills
+Python, FastAPI, AsyncIO, PostgreSQL, Kafka, Docker, Redis
+
+Education
+B.Tech Computer Science
+"""
+
+INTRO = (
+    "Hi, I'm a backend engineer with four years of experience. I mostly work in Python "
+    "with FastAPI and PostgreSQL, and recently moved our batch pipeline onto Kafka. "
+    "My main project was a payments API that handles webhooks from three providers."
+)
+
+TECHNICAL_ANSWERS = [
+    "I would store an idempotency key per webhook in PostgreSQL with a unique constraint, "
+    "insert it in the same transaction as the side effect, and treat a conflict as a replay.",
+    "Partitions are the unit of parallelism; I key messages by account id so ordering holds per "
+    "account, and size the partition count to the consumer group's peak parallelism.",
+    "For indexing I look at the query plan first, then add a composite index matching the "
+    "WHERE clause order and the sort, keeping write amplification in mind.",
+    "AsyncIO helps with I/O-bound fan-out; I bound concurrency with a semaphore and push "
+    "CPU-heavy work to a process pool so the event loop never blocks.",
+]
+
+CODE_SUBMISSION = (
+    "Here is my solution.\n\n```python\n"
+    "def solve(nums, target):\n"
+    "    seen = {}\n"
+    "    for i, n in enumerate(nums):\n"
+    "        if target - n in seen:\n"
+    "            return [seen[target - n], i]\n"
+    "        seen[n] = i\n"
+    "    return []\n"
+    "```"
+)
+
+
+class ScriptedCandidate:
+    """Answers whatever stage the interview is in with canned responses."""
+
+    def __init__(self, index=0):
+        self.index = index
+        self.resume = RESUME
+        self.answers_given = 0
+
+    def respond(self, stage):
+        if stage in (None, "self_intro"):
+            return INTRO
+        if stage == "dsa":
+            return CODE_SUBMISSION
+        answer = TECHNICAL_ANSWERS[(self.index + self.answers_given) % len(TECHNICAL_ANSWERS)]
+        self.answers_given += 1
+        return answer
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token), good enough for load modelling."""
+    return max(1, len(text) // 4)
+
+
+def _stable_int(text, modulo):
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest(), 16) % modulo
+
+
+def scripted_responder(prompt, vague_rate=0.1):
+    """
+    Deterministic stand-in for Gemini: recognises each agent's prompt and
+    returns a well-formed answer of a realistic size.
+    """
+    if "structured candidate profile" in prompt:
+        return json.dumps({
+            "name": "Bench Candidate",
+            "skills": ["Python", "FastAPI", "PostgreSQL", "Kafka", "Docker"],
+            "experience_years": 4,
+            "roles": ["Backend Engineer", "Software Engineer"],
+            "education": "B.Tech Computer Science",
+            "strengths": ["API design", "Async Python"],
+            "weaknesses": ["Distributed systems depth"],
+            "recommended_topics": ["AsyncIO", "Database indexing", "Kafka partitioning", "Caching"]
+        })
+    if "of a long resume" in prompt:
+        part = prompt.split("Resume Part:", 1)[-1].split("Return a JSON object", 1)[0]
+        partial = {
+            "skills": [s for s in ("Python", "FastAPI", "PostgreSQL", "Kafka", "Docker", "Redis") if s in part],
+            "recommended_topics": ["Database indexing"] if "PostgreSQL" in part else [],
+        }
+        if "Bench Candidate" in part:
+            partial.update(name="Bench Candidate", experience_years=4, roles=["Backend Engineer"])
+        if "B.Tech" in part:
+            partial["education"] = "B.Tech Computer Science"
+        return json.dumps(partial)
+    if "Return JSON." in prompt and "Extract:" in prompt:
+        return json.dumps({
+            "skills": ["Python", "FastAPI"],
+            "experience": "4 years backend",
+            "projects": ["Payments API"],
+            "domains": ["Fintech"]
+        })
+    if "Is this vague or shallow?" in prompt:
+        return "YES" if _stable_int(prompt, 1000) < vague_rate * 1000 else "NO"
+    if "Ask ONE deeper follow-up question" in prompt:
+        return "Can you walk me through the exact implementation, including the data structures you used?"
+    if "Ask ONE deep technical question" in prompt:
+        return "How would you design idempotent retries for a payment webhook consumer, and what storage guarantees do you need?"
+    if "constructive feedback" in prompt:
+        score = 4 + _stable_int(prompt, 6)
+        return (
+            "**Feedback:** The answer covers the main idea and gives a concrete example, "
+            "but misses failure modes and trade-offs around consistency.\n"
+            f"**Score:** {score}/10"
+        )
+    if "Python Code Evaluator" in prompt:
+        return (
+            "**Test Results:**\nAll tests passed.\n\n"
+            "**Feedback:**\nCorrect single-pass hash map solution in O(n) time and space."
+        )
+    if "comprehensive final evaluation" in prompt:
+        return (
+            "## Overall Performance Summary\nSolid backend fundamentals.\n\n"
+            "## Strengths\n- Clear API design reasoning\n\n"
+            "## Areas for Improvement\n- Go deeper on failure handling\n\n"
+            "## Final Rating\n7/10 - Recommend for next round"
+        )
+    if "Rephrase this coding problem" in prompt:
+        return prompt.split("unchanged.", 1)[-1].strip()
+    if "DSA problem" in prompt:
+        return "Given an array of integers, return the length of the longest strictly increasing subsequence."
+    return "OK"
+
+
+# Requests in flight across every FakeChatModel, for `capacity`
+_inflight = 0
+_inflight_lock = threading.Lock()
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline chat model for benchmarks. Latency is modelled as a fixed
+    time-to-first-token, plus prompt tokens at `prompt_tokens_per_second`
+    (prefill) and completion tokens at `tokens_per_second`.
+    A `stall_rate` share of requests, drawn independently per request (so
+    a retry or hedge of the same prompt may be fast), takes `stall_latency`
+    longer, like the provider's occasional slow responses. With a
+    `capacity`, more concurrent requests than that share it and each slows
+    down in proportion, like a rate-limited provider quota.
+    """
+
+    model: str = "fake"
+    latency: float = 0.05
+    jitter: float = 0.0
+    stall_rate: float = 0.0
+    stall_latency: float = 20.0
+    capacity: int = 0
+    tokens_per_second: float = 0.0
+    prompt_tokens_per_second: float = 0.0
+    vague_rate: float = 0.1
+    responder: Optional[Callable[..., str]] = None
+    seed: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        prompt = "\n".join(str(m.content) for m in messages)
+        responder = self.responder or scripted_responder
+        text = responder(prompt, vague_rate=self.vague_rate)
+
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(text)
+
+        delay = self.latency
+        if self.jitter:
+            delay += random.Random(_stable_int(f"{self.seed}:{prompt}", 2 ** 32)).uniform(0, self.jitter)
+        if self.stall_rate and random.random() < self.stall_rate:
+            delay += self.stall_latency
+        if self.tokens_per_second:
+            delay += completion_tokens / self.tokens_per_second
+        if self.prompt_tokens_per_second:
+            delay += prompt_tokens / self.prompt_tokens_per_second
+        global _inflight
+        with _inflight_lock:
+            _inflight += 1
+            if self.capacity:
+                delay *= max(1.0, _inflight / self.capacity)
+        try:
+            if delay > 0:
+                time.sleep(delay)
+        finally:
+            with _inflight_lock:
+                _inflight -= 1
+
+        message = AIMessage(content=text, usage_metadata={
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        })
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def fake_llm_factory(latency=0.05, jitter=0.0, tokens_per_second=0.0, vague_rate=0.1, responder=None,
+                     stall_rate=0.0, stall_latency=20.0, capacity=0, prompt_tokens_per_second=0.0):
+    """Returns a utils.llm factory that builds FakeChatModels with these settings."""
+    def factory(model, callbacks):
+        return FakeChatModel(
+            model=model,
+            latency=latency,
+            jitter=jitter,
+            stall_rate=stall_rate,
+            stall_latency=stall_latency,
+            capacity=capacity,
+            tokens_per_second=tokens_per_second,
+            prompt_tokens_per_second=prompt_tokens_per_second,
+            vague_rate=vague_rate,
+            responder=responder,
+            callbacks=callbacks
+        )
+    return factory
@@ -0,0 +1,137 @@
+"""
+Counts the work the interview graph does per candidate turn: node executions
+(by node), checkpoints and pending writes saved, and checkpoint bytes, over
+scripted interviews with the fake LLM.
+
+    python benchmarks/graph_trace.py --sessions 10 --save baseline
+    python benchmarks/graph_trace.py --sessions 10 --compare baseline
+
+Node executions include runs that only pause for the candidate's answer and
+runs that return no update, so no-op dispatches show up in the count.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import uuid
+from collections import Counter
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+sys.path.append(ROOT)
+
+from benchmarks.run_benchmarks import setup_environment, file_size
+
+
+def count_calls(counter, name, fn):
+    def wrapper(*args, **kwargs):
+        counter[name] += 1
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def run_turn(graph, config, graph_input, nodes):
+    for event in graph.stream(graph_input, config, stream_mode="tasks"):
+        # Task start events carry the input; results arrive as separate events
+        if "input" in event:
+            nodes[event["name"]] += 1
+
+
+def trace_session(graph, index, max_turns, nodes):
+    from agents.graph import turn_input
+    from benchmarks.candidates import ScriptedCandidate
+
+    candidate = ScriptedCandidate(index)
+    config = {"configurable": {"thread_id": f"trace-{uuid.uuid4()}"}}
+    turns = 1
+    run_turn(graph, config, {
+        "messages": [],
+        "resume_text": candidate.resume,
+        "candidate_profile": None,
+        "session_id": config["configurable"]["thread_id"]
+    }, nodes)
+
+    for _ in range(max_turns):
+        stage = graph.get_state(config).values.get("interview_stage")
+        if stage == "completed":
+            break
+        answer = candidate.respond(stage)
+        run_turn(graph, config, turn_input(graph.get_state(config), answer), nodes)
+        turns += 1
+
+    completed = graph.get_state(config).values.get("interview_stage") == "completed"
+    return turns, completed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-turn node executions and checkpoint writes.")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--max-turns", type=int, default=40)
+    parser.add_argument("--vague-rate", type=float, default=0.1)
+    parser.add_argument("--save", help="Save results as benchmarks/results/trace_<name>.json")
+    parser.add_argument("--compare", help="Compare against benchmarks/results/trace_<name>.json")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="vintervu-trace-")
+    setup_environment(workdir)
+
+    from utils.llm import set_llm_factory
+    from benchmarks.fake_llm import fake_llm_factory
+    set_llm_factory(fake_llm_factory(latency=0, vague_rate=args.vague_rate))
+
+    from mcp_server.database import init_db
+    from agents.graph import get_app_graph
+    init_db()
+    graph = get_app_graph()
+
+    # Count what actually reaches the store, not just the steps taken
+    writes = Counter()
+    saver = graph.checkpointer
+    saver.put = count_calls(writes, "checkpoints", saver.put)
+    saver.put_writes = count_calls(writes, "pending_writes", saver.put_writes)
+
+    nodes = Counter()
+    turns = completed = 0
+    before = file_size(os.environ["VINTERVU_CHECKPOINT_PATH"])
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for i in range(args.sessions):
+            t, done = trace_session(graph, i, args.max_turns, nodes)
+            turns += t
+            completed += done
+    growth = file_size(os.environ["VINTERVU_CHECKPOINT_PATH"]) - before
+
+    results = {
+        "sessions": args.sessions,
+        "completed_sessions": completed,
+        "turns": turns,
+        "node_executions_per_turn": sum(nodes.values()) / turns,
+        "checkpoints_per_turn": writes["checkpoints"] / turns,
+        "pending_writes_per_turn": writes["pending_writes"] / turns,
+        "checkpoint_bytes_per_turn": growth / turns,
+        "node_executions": dict(sorted(nodes.items())),
+    }
+    print(json.dumps(results, indent=2))
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    if args.save:
+        with open(os.path.join(RESULTS_DIR, f"trace_{args.save}.json"), "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(os.path.join(RESULTS_DIR, f"trace_{args.compare}.json"), "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        for name in ("node_executions_per_turn", "checkpoints_per_turn", "pending_writes_per_turn", "checkpoint_bytes_per_turn"):
+            change = (results[name] - baseline[name]) / baseline[name] if baseline[name] else 0.0
+            print(f"{name:30s} {baseline[name]:12.2f} -> {results[name]:12.2f} ({change:+.1%})")
+        for node in sorted(set(baseline["node_executions"]) | set(results["node_executions"])):
+            print(f"  {node:28s} {baseline['node_executions'].get(node, 0):8d} -> {results['node_executions'].get(node, 0):8d}")
+
+    from utils.mcp_client import client
+    if client is not None:
+        client.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Per-call latency of the MCP transports.
+
+Calls a pure tool (fetch_job_market_data) and a SQLite write
+(insert_interview_log) through each transport's call_tool. The stdio and
+http transports go through JSON-RPC to a server process; inprocess calls
+the tool functions directly.
+
+    python benchmarks/mcp_transport_bench.py --calls 500
+    python benchmarks/mcp_transport_bench.py --transports stdio,inprocess,http
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from benchmarks.run_benchmarks import setup_environment, latency_summary
+
+CALLS = {
+    "fetch_job_market_data": lambda i: {"role": "python backend"},
+    "insert_interview_log": lambda i: {
+        "session_id": f"mcp-bench-{i % 10}",
+        "question": "How do you index a JSON column?",
+        "answer": "With a generated column and a B-tree index on it.",
+        "evaluation": "**Score:** 7/10",
+        "score": 7,
+        "stage": "technical",
+        "topic": "databases",
+        "difficulty": "medium"
+    },
+}
+
+
+def make_client(transport):
+    from utils import mcp_client
+
+    if transport == "stdio":
+        client = mcp_client.MCPClient(os.path.join(ROOT, "mcp_server", "server.py"))
+    elif transport == "inprocess":
+        client = mcp_client.InProcessMCPClient()
+    elif transport == "http":
+        from backend.main import start_shared_mcp_server
+        process, url = start_shared_mcp_server()
+        client = mcp_client.HTTPMCPClient(url)
+        client.server_process = process
+    else:
+        raise ValueError(f"Unknown transport: {transport}")
+    client.start()
+    return client
+
+
+def bench_transport(transport, calls, warmup):
+    client = make_client(transport)
+    results = {}
+    try:
+        for tool, arguments in CALLS.items():
+            for i in range(warmup):
+                client.call_tool(tool, arguments(i))
+            latencies = []
+            for i in range(calls):
+                start = time.perf_counter()
+                client.call_tool(tool, arguments(i))
+                latencies.append(time.perf_counter() - start)
+            results[tool] = {k: v * 1000 if k != "count" else v for k, v in latency_summary(latencies).items()}
+    finally:
+        client.stop()
+        process = getattr(client, "server_process", None)
+        if process:
+            process.terminate()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-call latency of the MCP transports.")
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--transports", default="stdio,inprocess")
+    args = parser.parse_args()
+
+    setup_environment(tempfile.mkdtemp(prefix="vintervu-mcp-bench-"))
+
+    results = {}
+    for transport in args.transports.split(","):
+        results[transport] = bench_transport(transport, args.calls, args.warmup)
+
+    print(f"{'transport':12s} {'tool':24s} {'mean ms':>9s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}")
+    for transport, tools in results.items():
+        for tool, s in tools.items():
+            print(f"{transport:12s} {tool:24s} {s['mean']:9.3f} {s['p50']:9.3f} {s['p95']:9.3f} {s['p99']:9.3f}")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Replays recorded interview sessions (utils/recorder.py cassettes) against the
+current graph, offline, to check that a change keeps interview behaviour and
+to measure what it does to per-node latency.
+
+Each session runs from its first recorded run in a temporary environment.
+Every LLM request is answered with the response recorded for it: the same
+node and prompt if the prompt's version, text and inputs are unchanged
+(Prompt.cache_key), else the node's next recorded response. Question bank picks are pinned to the recorded problems. Each
+node's output is compared with the recorded one, and node time excluding the
+LLM is compared with production's. --realtime also waits the recorded LLM
+latency, so whole-turn times compare directly.
+
+    python benchmarks/replay.py cassettes/
+    python benchmarks/replay.py cassettes/abc.jsonl.gz --diffs 5 --strict
+"""
+import argparse
+import contextlib
+import difflib
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, List, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from benchmarks.run_benchmarks import setup_environment, latency_summary
+
+# Outputs that depend on other sessions in the database, not on this one
+IGNORED_KEYS = ("code_similarity",)
+
+
+class ReplayMiss(LookupError):
+    """The replayed graph made an LLM request the recording has no response for."""
+
+
+class Player:
+    """Recorded LLM responses and question bank picks for the run being replayed."""
+
+    def __init__(self):
+        self.turn = None
+        self.used = set()
+        self.problems = []
+        self.matched = 0
+        self.changed = 0
+        self.missed = 0
+
+    def load(self, turn):
+        self.turn = turn
+        self.used = set()
+        self.problems = [
+            n["output"]["current_problem_id"] for n in turn["nodes"]
+            if isinstance(n.get("output"), dict) and n["output"].get("current_problem_id")
+        ]
+
+    def same_request(self, entry, digest, cache_key):
+        # Redacted cassettes keyed the unredacted inputs; only the rendered prompts compare
+        if entry.get("cache_key") and cache_key and not self.turn.get("redacted", False):
+            return entry["cache_key"] == cache_key
+        return entry["prompt_hash"] == digest
+
+    def take(self, node, digest, cache_key=None):
+        entries = list(enumerate(self.turn["llm"]))
+        for exact in (True, False):
+            for i, entry in entries:
+                if i in self.used or entry["node"] != node:
+                    continue
+                if exact and not self.same_request(entry, digest, cache_key):
+                    continue
+                self.used.add(i)
+                if exact:
+                    self.matched += 1
+                else:
+                    self.changed += 1
+                return entry
+        self.missed += 1
+        raise ReplayMiss(f"No recorded LLM response left for {node}")
+
+
+player = Player()
+
+
+def replay_chat_model(realtime):
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage, BaseMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+    from utils.recorder import message_dicts, prompt_hash, prompt_key
+    from utils.telemetry import current_span
+
+    class ReplayChatModel(BaseChatModel):
+        """Answers each request with its recorded response."""
+
+        model: str = "replay"
+
+        @property
+        def _llm_type(self) -> str:
+            return "replay"
+
+        def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                      run_manager: Any = None, **kwargs: Any) -> ChatResult:
+            span = current_span()
+            digest = prompt_hash(message_dicts(messages, player.turn.get("redacted", False)))
+            entry = player.take(span["node"] if span else "none", digest, prompt_key())
+            if realtime:
+                time.sleep(entry["seconds"])
+            prompt_tokens, completion_tokens = entry.get("tokens", (0, 0))
+            message = AIMessage(content=entry["response"], usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            })
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+    return lambda model, callbacks: ReplayChatModel(model=model, callbacks=callbacks)
+
+
+def pin_bank_choices():
+    """Makes the question bank serve the recorded problem, where the bank has it."""
+    from agents.question_bank import QuestionBank
+
+    select = QuestionBank.select
+
+    def pinned(self, difficulty="medium", exclude=(), topic=None):
+        while player.problems:
+            problem_id = player.problems.pop(0)
+            if problem_id in self.problems and problem_id not in exclude:
+                return self.problems[problem_id]
+        return select(self, difficulty, exclude, topic)
+
+    QuestionBank.select = pinned
+
+
+def load_sessions(paths):
+    from utils.recorder import read_cassette
+
+    files = []
+    for path in paths:
+        files.extend(sorted(glob.glob(os.path.join(path, "*.jsonl.gz"))) if os.path.isdir(path) else [path])
+    return {os.path.basename(f)[:-len(".jsonl.gz")]: read_cassette(f) for f in files}
+
+
+def state_from_json(state, session_id):
+    from agents.state import Feedback, Message
+
+    state = dict(state, session_id=session_id)
+    state["messages"] = [Message(m["type"], m["content"]) for m in state.get("messages", [])]
+    if "feedbacks" in state:
+        state["feedbacks"] = [Feedback(**f) for f in state["feedbacks"]]
+    return state
+
+
+def graph_input(graph, config, session_id, turn):
+    from agents.graph import turn_input
+
+    if turn["kind"] == "resume":
+        # As backend.main.start_interview builds it
+        return {"messages": [], "resume_text": turn["resume_text"], "candidate_profile": None, "session_id": session_id}
+    if turn["kind"] == "answer":
+        return turn_input(graph.get_state(config), turn["message"])
+    return state_from_json(turn["state"], session_id)
+
+
+def normalise(output, redacted):
+    from utils.recorder import REDACTIONS, _scrub
+
+    if isinstance(output, dict):
+        output = {k: v for k, v in output.items() if k not in IGNORED_KEYS}
+    return _scrub(output, REDACTIONS) if redacted else output
+
+
+def diff_text(recorded, replayed):
+    a = json.dumps(recorded, indent=1, sort_keys=True).splitlines()
+    b = json.dumps(replayed, indent=1, sort_keys=True).splitlines()
+    return "\n".join(difflib.unified_diff(a, b, "recorded", "replayed", lineterm="", n=1))
+
+
+def replay_session(graph, session_id, turns, stats, diffs):
+    from utils.recorder import capture, to_jsonable
+
+    config = {"configurable": {"thread_id": session_id}}
+    for index, recorded in enumerate(turns):
+        player.load(recorded)
+        replayed = {"nodes": [], "llm": []}
+        try:
+            with capture(replayed):
+                graph.invoke(graph_input(graph, config, session_id, recorded), config)
+        except Exception as e:
+            stats["errors"].append({"session_id": session_id, "turn": index, "error": f"{type(e).__name__}: {e}"})
+            # Later runs build on this one; the rest of the session can't be compared
+            return
+
+        redacted = recorded.get("redacted", False)
+        path_recorded = [n["node"] for n in recorded["nodes"]]
+        path_replayed = [n["node"] for n in replayed["nodes"]]
+        if path_recorded != path_replayed:
+            stats["path_changes"] += 1
+            diffs.append({"session_id": session_id, "turn": index, "nodes": {"recorded": path_recorded, "replayed": path_replayed}})
+
+        for old, new in zip(recorded["nodes"], replayed["nodes"]):
+            node = stats["nodes"].setdefault(old["node"], {
+                "runs": 0, "output_diffs": 0,
+                "recorded": [], "recorded_overhead": [], "replayed": [], "replayed_overhead": []
+            })
+            node["runs"] += 1
+            node["recorded"].append(old["seconds"])
+            node["recorded_overhead"].append(old["seconds"] - old.get("llm_seconds", 0.0))
+            if new["node"] != old["node"]:
+                continue
+            node["replayed"].append(new["seconds"])
+            node["replayed_overhead"].append(new["seconds"] - new.get("llm_seconds", 0.0))
+            before = normalise(old.get("output"), redacted)
+            after = normalise(to_jsonable(new.get("output")), redacted)
+            if before != after:
+                node["output_diffs"] += 1
+                diffs.append({"session_id": session_id, "turn": index, "node": old["node"], "diff": diff_text(before, after)})
+        stats["turns"] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded sessions against the current graph.")
+    parser.add_argument("paths", nargs="+", help="Cassette files or directories of them")
+    parser.add_argument("--realtime", action="store_true", help="Wait the recorded LLM latency on each call")
+    parser.add_argument("--diffs", type=int, default=3, help="Output diffs to print")
+    parser.add_argument("--strict", action="store_true", help="Exit 1 if any node output or path changed")
+    parser.add_argument("--save", help="Write the full report (every diff) to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="Show the agents' own progress output")
+    args = parser.parse_args()
+
+    # Replay must not record itself, and each request gets exactly one answer
+    os.environ.pop("VINTERVU_RECORD_DIR", None)
+    os.environ["VINTERVU_LLM_HEDGING"] = "0"
+    os.environ.setdefault("VINTERVU_MCP_TRANSPORT", "inprocess")
+    setup_environment(tempfile.mkdtemp(prefix="vintervu-replay-"))
+
+    from utils.llm import set_llm_factory
+    from mcp_server.database import init_db
+    from agents.graph import get_app_graph
+
+    set_llm_factory(replay_chat_model(args.realtime))
+    pin_bank_choices()
+    init_db()
+    graph = get_app_graph()
+
+    sessions = load_sessions(args.paths)
+    stats = {"turns": 0, "path_changes": 0, "errors": [], "nodes": {}}
+    diffs = []
+    with open(os.devnull, "w") as devnull, contextlib.ExitStack() as stack:
+        if not args.verbose:
+            stack.enter_context(contextlib.redirect_stdout(devnull))
+        for session_id, turns in sessions.items():
+            replay_session(graph, session_id, turns, stats, diffs)
+
+    ms = lambda values: {k: round(latency_summary(values)[k] * 1000, 3) for k in ("p50", "p95")}
+    report = {
+        "sessions": len(sessions),
+        "turns": stats["turns"],
+        "llm": {"matched": player.matched, "prompt_changed": player.changed, "missing": player.missed},
+        "path_changes": stats["path_changes"],
+        "output_diffs": sum(n["output_diffs"] for n in stats["nodes"].values()),
+        "errors": stats["errors"],
+        "nodes_ms": {
+            name: {
+                "runs": node["runs"],
+                "output_diffs": node["output_diffs"],
+                "recorded": ms(node["recorded"]),
+                "replayed": ms(node["replayed"]),
+                "recorded_without_llm": ms(node["recorded_overhead"]),
+                "replayed_without_llm": ms(node["replayed_overhead"]),
+            }
+            for name, node in sorted(stats["nodes"].items())
+        },
+    }
+    print(json.dumps(report, indent=2))
+    for entry in diffs[:args.diffs]:
+        where = f"{entry['session_id']} run {entry['turn']}"
+        if "nodes" in entry:
+            print(f"\n{where}: node path changed\n  recorded: {entry['nodes']['recorded']}\n  replayed: {entry['nodes']['replayed']}")
+        else:
+            print(f"\n{where} {entry['node']}:\n{entry['diff']}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(dict(report, diffs=diffs), f, indent=2)
+
+    if args.strict and (diffs or stats["errors"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
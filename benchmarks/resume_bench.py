@@ -0,0 +1,191 @@
+"""
+Chunked resume analysis (agents/resume_analyst.py) versus a single prompt,
+on long synthetic academic CVs.
+
+The fake LLM charges for prompt tokens (prefill) as well as output, and
+returns malformed JSON with a probability that grows with prompt length, as
+long prompts do in production. Each CV is analysed both ways; the report has
+latency, responses retried on a larger tier for bad JSON, analyses that
+failed, and how much of the CV made it into the profile (skill and role
+recall, experience).
+
+    python benchmarks/resume_bench.py --pages 40 --runs 20
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from benchmarks.run_benchmarks import setup_environment, latency_summary
+
+SKILLS = [
+    "Python", "C++", "Rust", "Go", "Java", "Scala", "CUDA", "PyTorch", "TensorFlow", "JAX", "Spark", "Hadoop",
+    "Kafka", "PostgreSQL", "Redis", "Kubernetes", "Docker", "Terraform", "GraphQL", "gRPC", "MPI", "OpenMP",
+    "LLVM", "Haskell", "OCaml", "Julia", "MATLAB", "R", "SQL", "Flink", "Ray", "Triton",
+]
+ROLES = [
+    "Research Scientist", "Postdoctoral Fellow", "Assistant Professor", "Associate Professor", "Visiting Researcher",
+    "Software Engineer", "Staff Engineer", "Research Intern", "Lecturer", "Principal Investigator",
+]
+FILLER = (
+    "studied scalable systems for learning and inference across heterogeneous clusters with careful "
+    "attention to reproducibility latency and cost while mentoring students and leading collaborations"
+).split()
+
+# Chance of malformed JSON per 1k prompt tokens
+MALFORMED_PER_1K = 0.03
+
+_rng = random.Random(0)
+_malformed = {"per_1k": MALFORMED_PER_1K}
+
+
+def make_cv(rng, pages):
+    """A long academic CV (about 280 tokens a page) and what a perfect profile would contain."""
+    skills, roles = set(), []
+    sentence = lambda n: " ".join(rng.choice(FILLER) for _ in range(n))
+
+    lines = ["Dr. Alex Morgan", "alex.morgan@example.edu", "", "RESEARCH SUMMARY", sentence(60), ""]
+    lines.append("EXPERIENCE")
+    year = 2024
+    for _ in range(max(3, pages // 2)):
+        role = rng.choice(ROLES)
+        start = year - rng.randint(1, 3)
+        used = rng.sample(SKILLS, 2)
+        skills.update(used)
+        roles.append(role)
+        lines += [f"{role}, Institute {rng.randint(1, 99)} ({start}-{year})",
+                  f"- Built systems in {used[0]} and {used[1]}; {sentence(50)}", ""]
+        year = start
+    experience = 2024 - year
+
+    lines.append("PUBLICATIONS")
+    for i in range(pages * 6):
+        used = rng.choice(SKILLS)
+        skills.add(used)
+        lines.append(f"[{i + 1}] A. Morgan et al. {sentence(10).title()} with {used}. Proceedings {2000 + i % 24}.")
+    lines += ["", "TEACHING", sentence(80), "", "EDUCATION", "PhD Computer Science, State University",
+              "MSc Computer Science, State University", "BSc Mathematics, City College"]
+    return "\n".join(lines), {"skills": skills, "roles": set(roles), "experience_years": experience}
+
+
+def cv_responder(prompt, vague_rate=0.1):
+    """Extracts from the CV text in the prompt what a model would, malformed now and then."""
+    from benchmarks.fake_llm import estimate_tokens, scripted_responder
+
+    marker = "Resume Text:" if "structured candidate profile" in prompt else "Resume Part:" if "of a long resume" in prompt else None
+    if marker is None:
+        return scripted_responder(prompt, vague_rate)
+    text = prompt.split(marker, 1)[-1].split("Return a JSON object", 1)[0]
+    profile = {
+        "skills": [s for s in SKILLS if re.search(rf"(?<![\w+]){re.escape(s)}(?![\w+])", text)],
+        "roles": [],
+        "recommended_topics": [],
+    }
+    spans = re.findall(r"^(.+?), Institute \d+ \((\d{4})-(\d{4})\)", text, re.MULTILINE)
+    for role, start, end in spans:
+        if role not in profile["roles"]:
+            profile["roles"].append(role)
+    if spans:
+        profile["experience_years"] = max(int(e) for _, _, e in spans) - min(int(s) for _, s, _ in spans)
+        if marker == "Resume Part:":
+            profile["experience_from"] = min(int(s) for _, s, _ in spans)
+            profile["experience_to"] = max(int(e) for _, _, e in spans)
+    if "Dr. Alex Morgan" in text:
+        profile["name"] = "Alex Morgan"
+    degree = re.search(r"^(PhD|MSc|BSc) .+$", text, re.MULTILINE)
+    if degree:
+        profile["education"] = degree.group()
+    if _rng.random() < _malformed["per_1k"] * estimate_tokens(prompt) / 1000:
+        # A Python dict instead of JSON, which the parser rejects
+        return repr(profile)
+    return json.dumps(profile)
+
+
+def score(profile, truth):
+    if not profile:
+        return {"skills": 0.0, "roles": 0.0, "experience": 0.0}
+    return {
+        "skills": len(truth["skills"] & set(profile.get("skills", []))) / len(truth["skills"]),
+        "roles": len(truth["roles"] & set(profile.get("roles", []))) / len(truth["roles"]),
+        "experience": float(profile.get("experience_years") == truth["experience_years"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunked vs single-prompt resume analysis on long CVs.")
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.3, help="Fake LLM time to first token (s)")
+    parser.add_argument("--prefill", type=float, default=4000.0, help="Fake LLM prompt tokens per second")
+    parser.add_argument("--decode", type=float, default=100.0, help="Fake LLM completion tokens per second")
+    parser.add_argument("--malformed", type=float, default=MALFORMED_PER_1K, help="Chance of malformed JSON per 1k prompt tokens")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--verbose", action="store_true", help="Show the agents' own progress output")
+    args = parser.parse_args()
+
+    # One answer per request, so latency is the pipeline's own
+    os.environ["VINTERVU_LLM_HEDGING"] = "0"
+    setup_environment(tempfile.mkdtemp(prefix="vintervu-resume-"))
+    _rng.seed(args.seed)
+    _malformed["per_1k"] = args.malformed
+
+    from langchain_core.output_parsers import JsonOutputParser
+    from utils.llm import set_llm_factory
+    from benchmarks.fake_llm import fake_llm_factory
+    from agents.prompts import RESUME_ANALYSIS, count_tokens
+    from agents.resume_analyst import chunk_resume, extract_profile
+    from utils.telemetry import LLM_ESCALATIONS
+
+    escalations = lambda: sum(LLM_ESCALATIONS.series.values())
+
+    set_llm_factory(fake_llm_factory(
+        latency=args.latency, tokens_per_second=args.decode,
+        prompt_tokens_per_second=args.prefill, responder=cv_responder
+    ))
+
+    def single(cv):
+        return RESUME_ANALYSIS.invoke({"resume_text": cv}, parser=JsonOutputParser())
+
+    rng = random.Random(args.seed)
+    cvs = [make_cv(rng, args.pages) for _ in range(args.runs)]
+    results = {}
+    with open(os.devnull, "w") as devnull, contextlib.ExitStack() as stack:
+        if not args.verbose:
+            stack.enter_context(contextlib.redirect_stdout(devnull))
+        for name, analyse in (("single", single), ("chunked", extract_profile)):
+            seconds, failures, scores = [], 0, []
+            retried = escalations()
+            for cv, truth in cvs:
+                start = time.perf_counter()
+                try:
+                    profile = analyse(cv)
+                except Exception:
+                    profile = None
+                seconds.append(time.perf_counter() - start)
+                failures += not profile
+                scores.append(score(profile, truth))
+            results[name] = {
+                "latency": latency_summary(seconds),
+                "escalations": escalations() - retried,
+                "failed": failures,
+                **{f"{k}_recall": sum(s[k] for s in scores) / len(scores) for k in ("skills", "roles")},
+                "experience_correct": sum(s["experience"] for s in scores) / len(scores),
+            }
+
+    print(json.dumps({
+        "cv_tokens": sum(count_tokens(cv) for cv, _ in cvs) / len(cvs),
+        "chunks": sum(len(chunk_resume(cv)) for cv, _ in cvs) / len(cvs),
+        **results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
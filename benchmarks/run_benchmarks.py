@@ -0,0 +1,336 @@
+"""
+Offline end-to-end benchmark for the interview graph and the FastAPI app.
+
+Everything runs locally: a fake LLM stands in for Gemini, scripted candidates
+answer the questions, and the MCP server, database, checkpoints and question
+bank all live in a temporary directory.
+
+    python benchmarks/run_benchmarks.py --sessions 20 --concurrency 4
+    python benchmarks/run_benchmarks.py --save baseline
+    python benchmarks/run_benchmarks.py --compare baseline
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+sys.path.append(ROOT)
+
+# Metrics where a larger value is a regression; everything else compared is
+# "higher is better" (throughput).
+LOWER_IS_BETTER = ("p50", "p95", "p99", "mean", "bytes_per_session", "bytes_per_turn")
+
+
+def setup_environment(workdir):
+    """Points every on-disk store at `workdir`. Must run before importing agents."""
+    os.environ["VINTERVU_DB_PATH"] = os.path.join(workdir, "vintervu.db")
+    os.environ["VINTERVU_CHECKPOINT_PATH"] = os.path.join(workdir, "checkpoints.db")
+    os.environ["VINTERVU_QUESTION_BANK"] = os.path.join(workdir, "question_bank.db")
+    os.environ["VINTERVU_ANALYTICS_DIR"] = os.path.join(workdir, "analytics")
+    os.environ["VINTERVU_ARCHIVE_DIR"] = os.path.join(workdir, "archive")
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def latency_summary(values):
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+    }
+
+
+def file_size(path):
+    # SQLite in WAL mode keeps recent pages in the -wal file
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+
+class GraphDriver:
+    """Drives app_graph directly, one checkpoint thread per session."""
+
+    name = "graph"
+
+    def __init__(self):
+        from agents.graph import app_graph
+        self.graph = app_graph
+
+    def _config(self, session_id):
+        return {"configurable": {"thread_id": session_id}}
+
+    def start(self, session_id, resume):
+        self.graph.invoke({
+            "messages": [],
+            "resume_text": resume,
+            "candidate_profile": None,
+            "session_id": session_id
+        }, self._config(session_id))
+
+    def answer(self, session_id, text):
+        from agents.graph import turn_input
+        config = self._config(session_id)
+        self.graph.invoke(turn_input(self.graph.get_state(config), text), config)
+
+    def stage(self, session_id):
+        return self.graph.get_state(self._config(session_id)).values.get("interview_stage")
+
+
+class ApiDriver(GraphDriver):
+    """Drives the FastAPI app in-process over HTTP semantics (TestClient)."""
+
+    name = "api"
+
+    def __init__(self):
+        super().__init__()
+        from fastapi.testclient import TestClient
+        from backend.main import app
+        self.app = app
+        self.local = threading.local()
+        self.client_cls = TestClient
+
+    def _client(self):
+        if not hasattr(self.local, "client"):
+            self.local.client = self.client_cls(self.app)
+        return self.local.client
+
+    def start(self, session_id, resume):
+        response = self._client().post("/analyze-resume", json={"resume_text": resume, "session_id": session_id})
+        response.raise_for_status()
+
+    def answer(self, session_id, text):
+        response = self._client().post("/chat", json={"message": text, "session_id": session_id})
+        response.raise_for_status()
+
+
+def run_session(driver, index, max_turns):
+    """Runs one scripted interview to completion; returns per-turn latencies."""
+    from benchmarks.candidates import ScriptedCandidate
+
+    candidate = ScriptedCandidate(index)
+    session_id = f"bench-{driver.name}-{uuid.uuid4()}"
+    latencies = []
+
+    start = time.perf_counter()
+    driver.start(session_id, candidate.resume)
+    latencies.append(time.perf_counter() - start)
+
+    for _ in range(max_turns):
+        stage = driver.stage(session_id)
+        if stage == "completed":
+            break
+        start = time.perf_counter()
+        driver.answer(session_id, candidate.respond(stage))
+        latencies.append(time.perf_counter() - start)
+
+    return {"session_id": session_id, "latencies": latencies, "completed": driver.stage(session_id) == "completed"}
+
+
+def bench_driver(driver, sessions, concurrency, max_turns, checkpoint_path):
+    before = file_size(checkpoint_path)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda i: run_session(driver, i, max_turns), range(sessions)))
+    elapsed = time.perf_counter() - start
+    growth = file_size(checkpoint_path) - before
+
+    latencies = [t for r in results for t in r["latencies"]]
+    turns = len(latencies)
+    return {
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "completed_sessions": sum(r["completed"] for r in results),
+        "turns": turns,
+        "elapsed_seconds": elapsed,
+        "turn_latency": latency_summary(latencies),
+        "throughput": {
+            "turns_per_second": turns / elapsed if elapsed else 0.0,
+            "sessions_per_second": sessions / elapsed if elapsed else 0.0,
+        },
+        "checkpoint_growth": {
+            "bytes_per_session": growth / sessions if sessions else 0,
+            "bytes_per_turn": growth / turns if turns else 0,
+        },
+    }
+
+
+def llm_counts():
+    """
+    LLM requests, hedges, SLO timeouts, fallbacks and escalations so far,
+    plus prompt calls and tokens per model tier (all cumulative).
+    """
+    from utils.telemetry import (
+        LLM_DURATION, LLM_HEDGES, LLM_TIMEOUTS, LLM_FALLBACKS, LLM_ESCALATIONS,
+        LLM_TIER_DURATION, LLM_TIER_TOKENS
+    )
+
+    total = lambda metric: sum(metric.series.values())
+    tiers = {}
+    for (tier, _), series in LLM_TIER_DURATION.series.items():
+        tiers.setdefault(tier, {"calls": 0, "tokens": 0})["calls"] += series["count"]
+    for (tier, _), tokens in LLM_TIER_TOKENS.series.items():
+        tiers.setdefault(tier, {"calls": 0, "tokens": 0})["tokens"] += tokens
+    return {
+        "requests": sum(series["count"] for series in LLM_DURATION.series.values()),
+        "hedges": total(LLM_HEDGES),
+        "timeouts": total(LLM_TIMEOUTS),
+        "fallbacks": total(LLM_FALLBACKS),
+        "escalations": total(LLM_ESCALATIONS),
+        "tiers": dict(sorted(tiers.items())),
+    }
+
+
+def bench_memory(driver, sessions, max_turns):
+    """Python heap retained per completed session (tracemalloc, after GC)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(sessions):
+        run_session(driver, i, max_turns)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {"sessions": sessions, "bytes_per_session": (after - before) / sessions if sessions else 0}
+
+
+def flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(current, baseline, threshold):
+    """Prints metric deltas against a saved run; returns the regressed metric names."""
+    cur = flatten(current["results"])
+    base = flatten(baseline["results"])
+    regressions = []
+    for name in sorted(cur):
+        if name not in base or not base[name] or not name.endswith(LOWER_IS_BETTER + ("per_second",)):
+            continue
+        change = (cur[name] - base[name]) / base[name]
+        worse = change > threshold if name.endswith(LOWER_IS_BETTER) else change < -threshold
+        flag = "  REGRESSION" if worse else ""
+        print(f"{name:60s} {base[name]:12.4f} -> {cur[name]:12.4f} ({change:+.1%}){flag}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline VIntervu benchmark (fake LLM, scripted candidates).")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--memory-sessions", type=int, default=5)
+    parser.add_argument("--max-turns", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake LLM time to first token (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra uniform random latency (s)")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="Share of LLM requests that stall")
+    parser.add_argument("--stall-latency", type=float, default=20.0, help="Extra latency of a stalled request (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Fake LLM decode rate (0 = instant)")
+    parser.add_argument("--vague-rate", type=float, default=0.1, help="Share of answers flagged as vague")
+    parser.add_argument("--drivers", default="graph,api")
+    parser.add_argument("--save", help="Save results as benchmarks/results/<name>.json")
+    parser.add_argument("--compare", help="Compare against benchmarks/results/<name>.json")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change flagged as a regression")
+    parser.add_argument("--verbose", action="store_true", help="Show the agents' own progress output")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="vintervu-bench-")
+    setup_environment(workdir)
+
+    from utils.llm import set_llm_factory
+    from benchmarks.fake_llm import fake_llm_factory
+
+    set_llm_factory(fake_llm_factory(
+        latency=args.latency,
+        jitter=args.jitter,
+        stall_rate=args.stall_rate,
+        stall_latency=args.stall_latency,
+        tokens_per_second=args.tokens_per_second,
+        vague_rate=args.vague_rate
+    ))
+
+    from mcp_server.database import init_db
+    init_db()
+
+    drivers = {"graph": GraphDriver, "api": ApiDriver}
+    results = {}
+    for name in args.drivers.split(","):
+        print(f"Running {name} benchmark...")
+        with open(os.devnull, "w") as devnull, contextlib.ExitStack() as stack:
+            # The agents print progress for every node; keep it out of the report
+            if not args.verbose:
+                stack.enter_context(contextlib.redirect_stdout(devnull))
+            driver = drivers[name]()
+            results[name] = bench_driver(
+                driver, args.sessions, args.concurrency, args.max_turns,
+                os.environ["VINTERVU_CHECKPOINT_PATH"]
+            )
+            results[name]["llm"] = llm_counts()
+            results[name]["memory"] = bench_memory(driver, args.memory_sessions, args.max_turns)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "python": sys.version.split()[0],
+            "config": vars(args),
+        },
+        "results": results,
+    }
+    print(json.dumps(report["results"], indent=2))
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(os.path.join(RESULTS_DIR, "latest.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    if args.save:
+        with open(os.path.join(RESULTS_DIR, f"{args.save}.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(os.path.join(RESULTS_DIR, f"{args.compare}.json"), "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed beyond {args.threshold:.0%}.")
+            sys.exit(1)
+
+    from utils.mcp_client import client
+    if client is not None:
+        client.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Live scorecards from the session_scorecard aggregates (mcp_server/database.py)
+versus re-aggregating interview_logs for every read.
+
+Fills interview_logs with `--rows` synthetic answers, `--answers` per
+session, then reads `--reads` scorecards of random sessions both ways. Also
+reports what the aggregate trigger costs each insert, and the per-worker
+poll that serves `--watched` live sessions to any number of observers,
+against re-aggregating each of those sessions' logs.
+
+    python benchmarks/scorecard_bench.py --rows 1000000 --watched 200
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from benchmarks.run_benchmarks import setup_environment, latency_summary
+
+STAGES = ("self_intro", "technical", "dsa")
+
+
+def populate(conn, rng, rows, answers, start_id=0, batch=10000):
+    start = time.perf_counter()
+    for offset in range(start_id, start_id + rows, batch):
+        conn.executemany(
+            "INSERT INTO interview_logs (session_id, question, answer, evaluation, score, stage) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (f"session-{i // answers}", "q", "a", "e", rng.randint(1, 10), STAGES[min(i % answers * 3 // answers, 2)])
+                for i in range(offset, min(offset + batch, start_id + rows))
+            ]
+        )
+        conn.commit()
+    return rows / (time.perf_counter() - start)
+
+
+def aggregate_from_logs(session_id):
+    """The scorecard as a query over the raw logs, the way a reader without the aggregates computes it."""
+    from mcp_server.database import get_db_connection, scorecard_from_rows
+
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(
+            """SELECT session_id, stage, COUNT(*) AS answers, COUNT(score) AS scored, SUM(score) AS score_sum,
+                      MIN(score) AS score_min, MAX(score) AS score_max, AVG(score) AS mean_score,
+                      NULL AS last_score, 0.0 AS updated_at
+               FROM interview_logs WHERE session_id = ? GROUP BY stage""",
+            (session_id,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return scorecard_from_rows(session_id, rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Materialized scorecards vs aggregating interview logs.")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--answers", type=int, default=12, help="Answers per session")
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--watched", type=int, default=200, help="Live sessions in one poll")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    setup_environment(tempfile.mkdtemp(prefix="vintervu-scorecard-"))
+
+    from mcp_server.database import init_db, get_db_connection, get_scorecard, scorecards_updated_since
+
+    init_db()
+    rng = random.Random(args.seed)
+    conn = get_db_connection()
+    populate(conn, rng, args.rows, args.answers)
+
+    sessions = [f"session-{rng.randrange(args.rows // args.answers)}" for _ in range(args.reads)]
+    materialized, aggregated = [], []
+    for session_id in sessions:
+        start = time.perf_counter()
+        scorecard = get_scorecard(session_id)
+        materialized.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        recomputed = aggregate_from_logs(session_id)
+        aggregated.append(time.perf_counter() - start)
+        assert scorecard["answers"] == recomputed["answers"] and scorecard["overall"] == recomputed["overall"]
+
+    watched = sessions[:args.watched]
+    polls, log_polls = [], []
+    for _ in range(50):
+        start = time.perf_counter()
+        scorecards_updated_since(watched, time.time() - 1.0)
+        polls.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        for session_id in watched:
+            aggregate_from_logs(session_id)
+        log_polls.append(time.perf_counter() - start)
+
+    # The same inserts without the aggregate triggers, for their cost
+    sample = min(args.rows, 100000)
+    with_triggers = populate(conn, rng, sample, args.answers, start_id=args.rows)
+    conn.execute("DROP TRIGGER session_scorecard_insert")
+    conn.execute("DROP TRIGGER session_scorecard_delete")
+    without_triggers = populate(conn, rng, sample, args.answers, start_id=args.rows + sample)
+    conn.close()
+
+    ms = lambda summary: {k: (v * 1000 if k != "count" else v) for k, v in summary.items()}
+    print(json.dumps({
+        "rows": args.rows,
+        "sessions": args.rows // args.answers,
+        "insert_rows_per_second_without_triggers": without_triggers,
+        "insert_rows_per_second_with_triggers": with_triggers,
+        "scorecard_ms": ms(latency_summary(materialized)),
+        "aggregate_ms": ms(latency_summary(aggregated)),
+        "watched": len(watched),
+        "poll_ms": ms(latency_summary(polls)),
+        "poll_from_logs_ms": ms(latency_summary(log_polls)),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
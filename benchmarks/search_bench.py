@@ -0,0 +1,124 @@
+"""
+Full-text search over interview logs (mcp_server/search.py) versus the
+LIKE '%...%' queries recruiters used to run through query_db.
+
+Fills interview_logs with `--rows` synthetic answers (indexed by the FTS5
+triggers as they are inserted), then runs the same multi-word queries both
+ways and reports latency, plus the insert throughput with the triggers on.
+
+    python benchmarks/search_bench.py --rows 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from benchmarks.run_benchmarks import setup_environment, latency_summary
+
+# Topic phrases planted in answers at different rates, from common to rare
+PHRASES = {
+    "database indexing": 0.02,
+    "kafka partitioning": 0.005,
+    "consistent hashing": 0.001,
+    "bloom filter": 0.0002,
+    "raft leader election": 0.00005,
+}
+QUERIES = ["kafka partitioning", "consistent hashing", "bloom filter", "raft leader election", "database indexing", "quantum sharding"]
+
+
+def make_words(rng, count=20000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(count)]
+
+
+def sentence(rng, words, count):
+    return " ".join(rng.choices(words, k=count))
+
+
+def populate(conn, rng, rows, batch=10000):
+    words = make_words(rng)
+    start = time.perf_counter()
+    for offset in range(0, rows, batch):
+        data = []
+        for i in range(offset, min(offset + batch, rows)):
+            answer = sentence(rng, words, 45)
+            for phrase, rate in PHRASES.items():
+                if rng.random() < rate:
+                    answer += f" we relied on {phrase} here"
+            data.append((f"session-{i // 12}", sentence(rng, words, 18), answer, sentence(rng, words, 22), rng.randint(1, 10), "technical"))
+        conn.executemany(
+            "INSERT INTO interview_logs (session_id, question, answer, evaluation, score, stage) VALUES (?, ?, ?, ?, ?, ?)",
+            data
+        )
+        conn.commit()
+    return rows / (time.perf_counter() - start)
+
+
+def like_search(conn, query, limit):
+    words = query.split()
+    clause = " AND ".join("(question LIKE ? OR answer LIKE ? OR evaluation LIKE ?)" for _ in words)
+    params = [f"%{w}%" for w in words for _ in range(3)]
+    return conn.execute(
+        f"SELECT id, session_id, score FROM interview_logs WHERE {clause} LIMIT ?", params + [limit]
+    ).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FTS5 search vs LIKE scans over interview logs.")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs of each query per method")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    setup_environment(tempfile.mkdtemp(prefix="vintervu-search-"))
+
+    from mcp_server.database import init_db, get_db_connection
+    from mcp_server.search import search_interviews, maintain
+
+    init_db()
+    rng = random.Random(args.seed)
+    conn = get_db_connection()
+    insert_rate = populate(conn, rng, args.rows)
+    maintain()
+
+    per_query = {}
+    fts_all, like_all = [], []
+    for query in QUERIES:
+        fts, like = [], []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            hits = search_interviews(query, args.limit, sources=("interviews",))["interviews"]
+            fts.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            like_hits = like_search(conn, query, args.limit)
+            like.append(time.perf_counter() - start)
+        fts_all += fts
+        like_all += like
+        per_query[query] = {
+            "hits": len(hits),
+            "like_hits": len(like_hits),
+            "fts_ms": min(fts) * 1000,
+            "like_ms": min(like) * 1000,
+        }
+    conn.close()
+
+    ms = lambda summary: {k: (v * 1000 if k != "count" else v) for k, v in summary.items()}
+    print(json.dumps({
+        "rows": args.rows,
+        "insert_rows_per_second": insert_rate,
+        "db_bytes": os.path.getsize(os.environ["VINTERVU_DB_PATH"]),
+        "fts_ms": ms(latency_summary(fts_all)),
+        "like_ms": ms(latency_summary(like_all)),
+        "queries": per_query,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Memory held per interview session when a worker hosts many at once.
+
+Runs a few scripted interviews to completion with the fake LLM, then loads
+their checkpointed state `--sessions` times over (each load deserialises its
+own copy, as separate sessions would) and reports the Python heap retained
+per session, plus the serialised size of one session's state.
+
+    python benchmarks/session_memory.py --sessions 1000 --save baseline
+    python benchmarks/session_memory.py --sessions 1000 --compare baseline
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+sys.path.append(ROOT)
+
+from benchmarks.run_benchmarks import setup_environment, GraphDriver, run_session
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes of session state per concurrently hosted interview.")
+    parser.add_argument("--sessions", type=int, default=1000, help="Sessions held in memory at once")
+    parser.add_argument("--interviews", type=int, default=10, help="Distinct scripted interviews to load from")
+    parser.add_argument("--max-turns", type=int, default=40)
+    parser.add_argument("--save", help="Save results as benchmarks/results/memory_<name>.json")
+    parser.add_argument("--compare", help="Compare against benchmarks/results/memory_<name>.json")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="vintervu-memory-")
+    setup_environment(workdir)
+
+    from utils.llm import set_llm_factory
+    from benchmarks.fake_llm import fake_llm_factory
+    set_llm_factory(fake_llm_factory(latency=0))
+
+    from mcp_server.database import init_db
+    init_db()
+
+    driver = GraphDriver()
+    threads = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for i in range(args.interviews):
+            result = run_session(driver, i, args.max_turns)
+            threads.append(result["session_id"])
+
+    configs = [driver._config(t) for t in threads]
+    serde = driver.graph.checkpointer.serde
+    state_bytes = sum(len(serde.dumps_typed(driver.graph.get_state(c).values)[1]) for c in configs) / len(configs)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = [driver.graph.get_state(configs[i % len(configs)]).values for i in range(args.sessions)]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    results = {
+        "sessions": len(sessions),
+        "interviews": len(configs),
+        "messages_per_session": sum(len(s.get("messages", [])) for s in sessions) / len(sessions),
+        "bytes_per_session": (after - before) / len(sessions),
+        "serialized_bytes_per_session": state_bytes,
+    }
+    print(json.dumps(results, indent=2))
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    if args.save:
+        with open(os.path.join(RESULTS_DIR, f"memory_{args.save}.json"), "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(os.path.join(RESULTS_DIR, f"memory_{args.compare}.json"), "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        for name in ("bytes_per_session", "serialized_bytes_per_session"):
+            change = (results[name] - baseline[name]) / baseline[name] if baseline[name] else 0.0
+            print(f"{name:30s} {baseline[name]:12.0f} -> {results[name]:12.0f} ({change:+.1%})")
+
+    from utils.mcp_client import client
+    if client is not None:
+        client.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmarks the code similarity check (mcp_server/similarity.py) on real
+solutions to bank problems.
+
+benchmarks/solutions.py holds independently written solutions: textbook
+ones in the candidates' own names, and ones that take their own route. Each
+is submitted by a different candidate, with the bank's reference and
+canonical solutions as base code, so none should be flagged. Disguised
+copies of each (identifiers renamed, comments added, a statement inserted)
+are then submitted by new candidates. A copy of code that has enough beyond
+the base to compare should be flagged; a copy of a textbook solution can't
+be told from an honest one and isn't.
+
+For reference, the same solutions are also compared without base code or
+per-problem scoping, on whole signatures across every problem. `--filler`
+first indexes that many submissions to other problems, which a lookup
+doesn't touch.
+
+    python benchmarks/similarity_bench.py --filler 100000
+"""
+import argparse
+import ast
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from benchmarks.run_benchmarks import setup_environment, latency_summary
+from benchmarks.solutions import SOLUTIONS
+
+SEED_PATH = os.path.join(ROOT, "agents", "data", "dsa_questions.json")
+
+
+def disguise(code, rng):
+    """A copy with new identifiers, a comment and one extra statement."""
+    tree = ast.parse(code)
+    names = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store)}
+    names |= {node.arg for node in ast.walk(tree) if isinstance(node, ast.arg)}
+    for name in sorted(names):
+        code = re.sub(rf"\b{re.escape(name)}\b", f"{name}_{rng.randint(0, 999)}", code)
+
+    lines = code.strip("\n").split("\n")
+    body = [i for i, line in enumerate(lines) if line.startswith("    ") and not line.rstrip().endswith(":")]
+    at = rng.choice(body)
+    indent = lines[at][:len(lines[at]) - len(lines[at].lstrip())]
+    lines[at:at] = [f"{indent}# keep track of progress", f"{indent}checked = True"]
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Code similarity check on real solutions.")
+    parser.add_argument("--filler", type=int, default=20000, help="Submissions to other problems indexed first")
+    parser.add_argument("--batch", type=int, default=5000, help="Filler submissions indexed per transaction")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    setup_environment(tempfile.mkdtemp(prefix="vintervu-similarity-"))
+
+    from mcp_server.database import init_db
+    from mcp_server import similarity
+
+    init_db()
+    rng = random.Random(args.seed)
+    with open(SEED_PATH, "r", encoding="utf-8") as f:
+        bank = {problem["id"]: problem for problem in json.load(f)}
+    base_code = {
+        problem_id: [bank[problem_id]["reference_solution"]] + bank[problem_id].get("canonical_solutions", [])
+        for problem_id in SOLUTIONS
+    }
+
+    # Without base code: whole signatures, every problem in one pool
+    unscoped = []
+    for problem_id, solutions in SOLUTIONS.items():
+        for code in base_code[problem_id] + solutions:
+            unscoped.append((problem_id, code, similarity.signature(code)))
+    without_base = 0
+    for problem_id, solutions in SOLUTIONS.items():
+        for code in solutions:
+            sig = similarity.signature(code)
+            without_base += sig is not None and any(
+                other is not None and other_code != code and similarity.similarity(sig, other) >= similarity.THRESHOLD
+                for _, other_code, other in unscoped
+            )
+
+    # Other problems' submissions, which share no bucket with these
+    filler = [code for solutions in SOLUTIONS.values() for code in solutions]
+    start = time.perf_counter()
+    for offset in range(0, args.filler, args.batch):
+        similarity.add_submissions(
+            (f"filler-session-{i}", f"filler-{i % 500}", f"filler-candidate-{i}", disguise(rng.choice(filler), rng))
+            for i in range(offset, min(offset + args.batch, args.filler))
+        )
+    index_seconds = time.perf_counter() - start
+
+    latencies, honest_flagged, honest = [], 0, 0
+    copies_flagged, comparable, textbook_copies_flagged = 0, 0, 0
+    for problem_id, solutions in SOLUTIONS.items():
+        for i, code in enumerate(solutions):
+            start = time.perf_counter()
+            report = similarity.check_submission(f"honest-{problem_id}-{i}", problem_id, code,
+                                                 f"honest-{problem_id}-{i}", base_code=base_code[problem_id])
+            latencies.append(time.perf_counter() - start)
+            honest += 1
+            honest_flagged += report["flagged"]
+
+        base = similarity.base_shingles(base_code[problem_id])
+        for i, code in enumerate(solutions):
+            copy = disguise(code, rng)
+            start = time.perf_counter()
+            report = similarity.check_submission(f"copy-{problem_id}-{i}", problem_id, copy,
+                                                 f"copy-{problem_id}-{i}", base_code=base_code[problem_id])
+            latencies.append(time.perf_counter() - start)
+            if similarity.signature(code, base) is not None:
+                comparable += 1
+                copies_flagged += any(m["session_id"] == f"honest-{problem_id}-{i}" for m in report["matches"])
+            else:
+                textbook_copies_flagged += report["flagged"]
+
+    ms = lambda summary: {k: (v * 1000 if k != "count" else v) for k, v in summary.items()}
+    print(json.dumps({
+        "problems": len(SOLUTIONS),
+        "honest_solutions": honest,
+        "filler_submissions": args.filler,
+        "filler_submissions_per_second": args.filler / index_seconds if index_seconds else None,
+        "check_ms": ms(latency_summary(latencies)),
+        "honest_flagged_without_base": without_base / honest,
+        "honest_flagged": honest_flagged / honest,
+        "copies_comparable": comparable / honest,
+        "copies_flagged": copies_flagged / comparable if comparable else None,
+        "textbook_copies_flagged": textbook_copies_flagged / (honest - comparable) if honest > comparable else None,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
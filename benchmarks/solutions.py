@@ -0,0 +1,716 @@
+"""
+Independently written solutions to question bank problems, in the styles
+candidates actually submit. The first two of each problem reproduce a
+textbook solution (the bank's reference or a canonical one) in the
+candidate's own names; the rest take their own route to the same answer.
+None was derived from another submission, so a similarity check should
+flag none of them.
+"""
+
+SOLUTIONS = {
+    "two-sum": [
+        '''
+def two_sum(nums, target):
+    lookup = {}
+    for index, number in enumerate(nums):
+        if target - number in lookup:
+            return [lookup[target - number], index]
+        lookup[number] = index
+    return []
+''',
+        '''
+def two_sum(nums, target):
+    for first in range(len(nums)):
+        for second in range(first + 1, len(nums)):
+            if nums[first] + nums[second] == target:
+                return [first, second]
+    return []
+''',
+        '''
+def two_sum(nums, target):
+    index_of = {}
+    for idx in range(len(nums)):
+        complement = target - nums[idx]
+        if complement in index_of:
+            return [index_of[complement], idx]
+        index_of[nums[idx]] = idx
+    return [-1, -1]
+''',
+        '''
+def two_sum(nums, target):
+    # sort indices by value, then walk two pointers inwards
+    order = sorted(range(len(nums)), key=lambda k: nums[k])
+    i, j = 0, len(order) - 1
+    while i < j:
+        total = nums[order[i]] + nums[order[j]]
+        if total == target:
+            return sorted([order[i], order[j]])
+        if total < target:
+            i += 1
+        else:
+            j -= 1
+    return []
+''',
+        '''
+from typing import List
+
+
+def two_sum(nums: List[int], target: int) -> List[int]:
+    """Single pass with a value -> position map."""
+    positions = dict()
+    for position, value in enumerate(nums):
+        wanted = target - value
+        if wanted in positions:
+            return [positions[wanted], position]
+        if value not in positions:
+            positions[value] = position
+    raise ValueError("no pair adds up to target")
+''',
+        '''
+def two_sum(nums, target):
+    n = len(nums)
+    for a in range(n):
+        for b in range(a + 1, n):
+            if nums[a] + nums[b] == target:
+                return [a, b]
+    return None
+''',
+    ],
+    "climbing-stairs": [
+        '''
+def climb_stairs(n):
+    one, two = 1, 1
+    for _ in range(n):
+        one, two = two, one + two
+    return one
+''',
+        '''
+def climb_stairs(n):
+    if n <= 2:
+        return n
+    steps = [0] * (n + 1)
+    steps[1], steps[2] = 1, 2
+    for k in range(3, n + 1):
+        steps[k] = steps[k - 1] + steps[k - 2]
+    return steps[n]
+''',
+        '''
+def climb_stairs(n):
+    if n <= 2:
+        return n
+    ways = [0] * (n + 1)
+    ways[1], ways[2] = 1, 2
+    for step in range(3, n + 1):
+        ways[step] = ways[step - 1] + ways[step - 2]
+    return ways[n]
+''',
+        '''
+from functools import lru_cache
+
+
+def climb_stairs(n):
+    @lru_cache(maxsize=None)
+    def count(remaining):
+        if remaining < 0:
+            return 0
+        if remaining == 0:
+            return 1
+        return count(remaining - 1) + count(remaining - 2)
+    return count(n)
+''',
+        '''
+def climb_stairs(n: int) -> int:
+    prev, curr = 0, 1
+    i = 0
+    while i < n:
+        prev, curr = curr, prev + curr
+        i += 1
+    return curr
+''',
+        '''
+def climb_stairs(n):
+    memo = {0: 1, 1: 1}
+
+    def go(k):
+        if k not in memo:
+            memo[k] = go(k - 1) + go(k - 2)
+        return memo[k]
+
+    return go(n)
+''',
+    ],
+    "valid-parentheses": [
+        '''
+def is_valid(s):
+    brackets = {')': '(', ']': '[', '}': '{'}
+    st = []
+    for c in s:
+        if c in brackets:
+            if not st or st.pop() != brackets[c]:
+                return False
+        else:
+            st.append(c)
+    return not st
+''',
+        '''
+def is_valid(s):
+    st = []
+    pairs = {'(': ')', '[': ']', '{': '}'}
+    for c in s:
+        if c in pairs:
+            st.append(pairs[c])
+        elif not st or st.pop() != c:
+            return False
+    return not st
+''',
+        '''
+def is_valid(s):
+    stack = []
+    for c in s:
+        if c in "([{":
+            stack.append(c)
+        elif c == ")":
+            if not stack or stack[-1] != "(":
+                return False
+            stack.pop()
+        elif c == "]":
+            if not stack or stack[-1] != "[":
+                return False
+            stack.pop()
+        elif c == "}":
+            if not stack or stack[-1] != "{":
+                return False
+            stack.pop()
+    return len(stack) == 0
+''',
+        '''
+def is_valid(s: str) -> bool:
+    closing = {"(": ")", "[": "]", "{": "}"}
+    expected = []
+    for char in s:
+        if char in closing:
+            expected.append(closing[char])
+        elif not expected or expected.pop() != char:
+            return False
+    return not expected
+''',
+        '''
+def is_valid(s):
+    # repeatedly strip innermost pairs until nothing changes
+    previous = None
+    while previous != s:
+        previous = s
+        s = s.replace("()", "").replace("[]", "").replace("{}", "")
+    return s == ""
+''',
+        '''
+def is_valid(s):
+    match = {")": "(", "]": "[", "}": "{"}
+    opened = []
+    for token in s:
+        if token in match.values():
+            opened.append(token)
+            continue
+        if token in match:
+            if len(opened) == 0:
+                return False
+            top = opened.pop()
+            if top != match[token]:
+                return False
+    return len(opened) == 0
+''',
+    ],
+    "max-subarray": [
+        '''
+def max_subarray(nums):
+    best = current = nums[0]
+    for x in nums[1:]:
+        current = max(x, current + x)
+        best = max(best, current)
+    return best
+''',
+        '''
+def max_subarray(nums):
+    result = nums[0]
+    total = 0
+    for num in nums:
+        total += num
+        result = max(result, total)
+        if total < 0:
+            total = 0
+    return result
+''',
+        '''
+def max_subarray(nums):
+    best = float("-inf")
+    running = 0
+    for x in nums:
+        running += x
+        if running > best:
+            best = running
+        if running < 0:
+            running = 0
+    return best
+''',
+        '''
+def max_subarray(nums):
+    def solve(lo, hi):
+        if lo == hi:
+            return nums[lo]
+        mid = (lo + hi) // 2
+        left_best = cur = nums[mid]
+        for i in range(mid - 1, lo - 1, -1):
+            cur += nums[i]
+            left_best = max(left_best, cur)
+        right_best = cur = nums[mid + 1]
+        for i in range(mid + 2, hi + 1):
+            cur += nums[i]
+            right_best = max(right_best, cur)
+        return max(solve(lo, mid), solve(mid + 1, hi), left_best + right_best)
+    return solve(0, len(nums) - 1)
+''',
+        '''
+from typing import List
+
+
+def max_subarray(nums: List[int]) -> int:
+    dp = nums[:]
+    for i in range(1, len(nums)):
+        if dp[i - 1] > 0:
+            dp[i] = dp[i - 1] + nums[i]
+    return max(dp)
+''',
+        '''
+def max_subarray(nums):
+    prefix = 0
+    lowest_prefix = 0
+    answer = nums[0]
+    for value in nums:
+        prefix += value
+        answer = max(answer, prefix - lowest_prefix)
+        lowest_prefix = min(lowest_prefix, prefix)
+    return answer
+''',
+    ],
+    "number-of-islands": [
+        '''
+def num_islands(grid):
+    if not grid:
+        return 0
+    m, n = len(grid), len(grid[0])
+
+    def dfs(i, j):
+        if i < 0 or j < 0 or i >= m or j >= n or grid[i][j] != '1':
+            return
+        grid[i][j] = '0'
+        dfs(i + 1, j)
+        dfs(i - 1, j)
+        dfs(i, j + 1)
+        dfs(i, j - 1)
+
+    islands = 0
+    for i in range(m):
+        for j in range(n):
+            if grid[i][j] == '1':
+                dfs(i, j)
+                islands += 1
+    return islands
+''',
+        '''
+from collections import deque
+
+
+def num_islands(grid):
+    m, n = len(grid), len(grid[0])
+    seen = set()
+    islands = 0
+    for i in range(m):
+        for j in range(n):
+            if grid[i][j] == '1' and (i, j) not in seen:
+                islands += 1
+                q = deque([(i, j)])
+                seen.add((i, j))
+                while q:
+                    x, y = q.popleft()
+                    for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                        a, b = x + dx, y + dy
+                        if 0 <= a < m and 0 <= b < n and grid[a][b] == '1' and (a, b) not in seen:
+                            seen.add((a, b))
+                            q.append((a, b))
+    return islands
+''',
+        '''
+def num_islands(grid):
+    if not grid:
+        return 0
+    h, w = len(grid), len(grid[0])
+    visited = [[False] * w for _ in range(h)]
+
+    def sink(i, j):
+        if i < 0 or j < 0 or i >= h or j >= w:
+            return
+        if visited[i][j] or grid[i][j] != "1":
+            return
+        visited[i][j] = True
+        sink(i + 1, j)
+        sink(i - 1, j)
+        sink(i, j + 1)
+        sink(i, j - 1)
+
+    islands = 0
+    for i in range(h):
+        for j in range(w):
+            if grid[i][j] == "1" and not visited[i][j]:
+                islands += 1
+                sink(i, j)
+    return islands
+''',
+        '''
+from collections import deque
+
+
+def num_islands(grid):
+    rows = len(grid)
+    cols = len(grid[0]) if rows else 0
+    seen = [[False for _ in range(cols)] for _ in range(rows)]
+    total = 0
+    for r in range(rows):
+        for c in range(cols):
+            if grid[r][c] != "1" or seen[r][c]:
+                continue
+            total += 1
+            queue = deque([(r, c)])
+            seen[r][c] = True
+            while queue:
+                cr, cc = queue.popleft()
+                for dr, dc in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                    nr, nc = cr + dr, cc + dc
+                    if 0 <= nr < rows and 0 <= nc < cols and not seen[nr][nc] and grid[nr][nc] == "1":
+                        seen[nr][nc] = True
+                        queue.append((nr, nc))
+    return total
+''',
+        '''
+def num_islands(grid):
+    parent = {}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(a, b):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[ra] = rb
+
+    for r, row in enumerate(grid):
+        for c, cell in enumerate(row):
+            if cell == "1":
+                parent[(r, c)] = (r, c)
+                if (r - 1, c) in parent:
+                    union((r, c), (r - 1, c))
+                if (r, c - 1) in parent:
+                    union((r, c), (r, c - 1))
+    return len({find(cell) for cell in parent})
+''',
+        '''
+def num_islands(grid):
+    land = {(r, c) for r, row in enumerate(grid) for c, v in enumerate(row) if v == "1"}
+    count = 0
+    while land:
+        count += 1
+        todo = [land.pop()]
+        while todo:
+            r, c = todo.pop()
+            for cell in ((r + 1, c), (r - 1, c), (r, c + 1), (r, c - 1)):
+                if cell in land:
+                    land.remove(cell)
+                    todo.append(cell)
+    return count
+''',
+    ],
+    "coin-change": [
+        '''
+def coin_change(coins, amount):
+    dp = [float('inf')] * (amount + 1)
+    dp[0] = 0
+    for total in range(1, amount + 1):
+        for c in coins:
+            if c <= total:
+                dp[total] = min(dp[total], dp[total - c] + 1)
+    return dp[amount] if dp[amount] != float('inf') else -1
+''',
+        '''
+def coin_change(coins, amount):
+    inf = amount + 1
+    dp = [0] + [inf] * amount
+    for x in range(1, amount + 1):
+        for coin in coins:
+            if coin <= x and dp[x - coin] + 1 < dp[x]:
+                dp[x] = dp[x - coin] + 1
+    return dp[amount] if dp[amount] != inf else -1
+''',
+        '''
+def coin_change(coins, amount):
+    dp = [float("inf")] * (amount + 1)
+    dp[0] = 0
+    for coin in coins:
+        for total in range(coin, amount + 1):
+            dp[total] = min(dp[total], dp[total - coin] + 1)
+    return -1 if dp[amount] == float("inf") else dp[amount]
+''',
+        '''
+from collections import deque
+
+
+def coin_change(coins, amount):
+    if amount == 0:
+        return 0
+    visited = {0}
+    frontier = deque([(0, 0)])
+    while frontier:
+        value, steps = frontier.popleft()
+        for coin in coins:
+            nxt = value + coin
+            if nxt == amount:
+                return steps + 1
+            if nxt < amount and nxt not in visited:
+                visited.add(nxt)
+                frontier.append((nxt, steps + 1))
+    return -1
+''',
+        '''
+from functools import lru_cache
+
+
+def coin_change(coins, amount):
+    @lru_cache(None)
+    def fewest(rest):
+        if rest == 0:
+            return 0
+        options = [fewest(rest - c) for c in coins if c <= rest]
+        options = [o for o in options if o >= 0]
+        return min(options) + 1 if options else -1
+    return fewest(amount)
+''',
+        '''
+def coin_change(coins, amount):
+    INF = 10 ** 9
+    best = [INF] * (amount + 1)
+    best[0] = 0
+    for x in range(1, amount + 1):
+        for c in coins:
+            if x - c >= 0:
+                best[x] = min(best[x], 1 + best[x - c])
+    return best[amount] if best[amount] < INF else -1
+''',
+    ],
+    "merge-intervals": [
+        '''
+def merge(intervals):
+    intervals.sort(key=lambda iv: iv[0])
+    out = [intervals[0]]
+    for cur in intervals[1:]:
+        prev = out[-1]
+        if cur[0] <= prev[1]:
+            prev[1] = max(prev[1], cur[1])
+        else:
+            out.append(cur)
+    return out
+''',
+        '''
+def merge(intervals):
+    res = []
+    for s, e in sorted(intervals):
+        if res and s <= res[-1][1]:
+            res[-1][1] = max(res[-1][1], e)
+        else:
+            res.append([s, e])
+    return res
+''',
+        '''
+def merge(intervals):
+    intervals.sort(key=lambda iv: iv[0])
+    result = [intervals[0][:]]
+    for lo, hi in intervals[1:]:
+        last = result[-1]
+        if lo > last[1]:
+            result.append([lo, hi])
+        elif hi > last[1]:
+            last[1] = hi
+    return result
+''',
+        '''
+def merge(intervals):
+    events = sorted(intervals)
+    out = []
+    cur_start, cur_end = events[0]
+    for s, e in events[1:]:
+        if s <= cur_end:
+            cur_end = max(cur_end, e)
+        else:
+            out.append([cur_start, cur_end])
+            cur_start, cur_end = s, e
+    out.append([cur_start, cur_end])
+    return out
+''',
+        '''
+from typing import List
+
+
+def merge(intervals: List[List[int]]) -> List[List[int]]:
+    """Sort by start and extend the last interval while they overlap."""
+    ordered = sorted(intervals, key=lambda pair: (pair[0], pair[1]))
+    merged: List[List[int]] = []
+    for pair in ordered:
+        if not merged or merged[-1][1] < pair[0]:
+            merged.append(list(pair))
+            continue
+        merged[-1][1] = max(merged[-1][1], pair[1])
+    return merged
+''',
+        '''
+def merge(intervals):
+    starts = sorted(i[0] for i in intervals)
+    ends = sorted(i[1] for i in intervals)
+    res = []
+    begin = 0
+    for k in range(len(intervals)):
+        if k == len(intervals) - 1 or starts[k + 1] > ends[k]:
+            res.append([starts[begin], ends[k]])
+            begin = k + 1
+    return res
+''',
+    ],
+    "course-schedule": [
+        '''
+from collections import deque
+
+
+def can_finish(num_courses, prerequisites):
+    indeg = [0] * num_courses
+    adj = [[] for _ in range(num_courses)]
+    for course, pre in prerequisites:
+        adj[pre].append(course)
+        indeg[course] += 1
+    q = deque(c for c in range(num_courses) if indeg[c] == 0)
+    finished = 0
+    while q:
+        c = q.popleft()
+        finished += 1
+        for nxt in adj[c]:
+            indeg[nxt] -= 1
+            if indeg[nxt] == 0:
+                q.append(nxt)
+    return finished == num_courses
+''',
+        '''
+def can_finish(num_courses, prerequisites):
+    graph = [[] for _ in range(num_courses)]
+    for a, b in prerequisites:
+        graph[a].append(b)
+    visit = [0] * num_courses
+
+    def cycle(node):
+        if visit[node] == 1:
+            return True
+        if visit[node] == 2:
+            return False
+        visit[node] = 1
+        for nxt in graph[node]:
+            if cycle(nxt):
+                return True
+        visit[node] = 2
+        return False
+
+    for c in range(num_courses):
+        if cycle(c):
+            return False
+    return True
+''',
+        '''
+def can_finish(num_courses, prerequisites):
+    adj = {c: [] for c in range(num_courses)}
+    for course, pre in prerequisites:
+        adj[course].append(pre)
+    state = [0] * num_courses  # 0 = new, 1 = visiting, 2 = done
+
+    def has_cycle(c):
+        if state[c] == 1:
+            return True
+        if state[c] == 2:
+            return False
+        state[c] = 1
+        for p in adj[c]:
+            if has_cycle(p):
+                return True
+        state[c] = 2
+        return False
+
+    return not any(has_cycle(c) for c in range(num_courses))
+''',
+        '''
+from collections import defaultdict
+
+
+def can_finish(num_courses, prerequisites):
+    needs = defaultdict(set)
+    unlocks = defaultdict(set)
+    for course, pre in prerequisites:
+        needs[course].add(pre)
+        unlocks[pre].add(course)
+    ready = [c for c in range(num_courses) if not needs[c]]
+    taken = 0
+    while ready:
+        c = ready.pop()
+        taken += 1
+        for nxt in unlocks[c]:
+            needs[nxt].discard(c)
+            if not needs[nxt]:
+                ready.append(nxt)
+    return taken == num_courses
+''',
+        '''
+def can_finish(num_courses, prerequisites):
+    graph = [[] for _ in range(num_courses)]
+    for a, b in prerequisites:
+        graph[a].append(b)
+    WHITE, GRAY, BLACK = 0, 1, 2
+    color = [WHITE] * num_courses
+    for root in range(num_courses):
+        if color[root] != WHITE:
+            continue
+        stack = [(root, iter(graph[root]))]
+        color[root] = GRAY
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                color[node] = BLACK
+                stack.pop()
+            elif color[child] == GRAY:
+                return False
+            elif color[child] == WHITE:
+                color[child] = GRAY
+                stack.append((child, iter(graph[child])))
+    return True
+''',
+        '''
+def can_finish(num_courses, prerequisites):
+    remaining = list(prerequisites)
+    done = set()
+    progress = True
+    while progress:
+        progress = False
+        blocked = {a for a, b in remaining}
+        for course in range(num_courses):
+            if course not in done and course not in blocked:
+                done.add(course)
+                progress = True
+        remaining = [(a, b) for a, b in remaining if b not in done]
+    return len(done) == num_courses
+''',
+    ],
+}
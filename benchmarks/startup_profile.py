@@ -0,0 +1,130 @@
+"""
+Cold-start profile for the API process.
+
+Each run starts a fresh interpreter, imports backend.main under
+`-X importtime`, and then calls warm_up() (database init and graph compile).
+The report shows import and warm-up wall time, the slowest modules by
+cumulative import time, and any heavy module that was imported too early.
+
+    python benchmarks/startup_profile.py --runs 5 --save baseline
+    python benchmarks/startup_profile.py --compare baseline
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+sys.path.append(ROOT)
+
+from benchmarks.run_benchmarks import setup_environment, compare, git_revision
+
+# Must stay out of `import backend.main`; they load during warm-up (langgraph)
+# or on the first LLM call (Gemini).
+DEFERRED_MODULES = ("langgraph", "langchain_google_genai", "google.genai")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import backend.main
+imported = time.perf_counter()
+early = sorted(m for m in {deferred!r} if m in sys.modules)
+backend.main.warm_up()
+ready = time.perf_counter()
+print(json.dumps({{"import_seconds": imported - start, "warmup_seconds": ready - imported, "early_imports": early}}))
+"""
+
+
+def parse_importtime(stderr):
+    """Parses `-X importtime` output into {module: (self_us, cumulative_us)}."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def profile_once():
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(deferred=DEFERRED_MODULES)],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Startup probe failed:\n{proc.stderr[-2000:]}")
+    # The probe prints its JSON line last; agents may print before it
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["modules"] = parse_importtime(proc.stderr)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile API cold start (imports and graph warm-up).")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list")
+    parser.add_argument("--save", help="Save results as benchmarks/results/startup_<name>.json")
+    parser.add_argument("--compare", help="Compare against benchmarks/results/startup_<name>.json")
+    parser.add_argument("--threshold", type=float, default=0.20, help="Relative change flagged as a regression")
+    args = parser.parse_args()
+
+    setup_environment(tempfile.mkdtemp(prefix="vintervu-startup-"))
+
+    runs = [profile_once() for _ in range(args.runs)]
+    last = runs[-1]
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "python": sys.version.split()[0],
+            "config": vars(args),
+        },
+        "results": {
+            "startup": {
+                "import_seconds": {"p50": statistics.median(r["import_seconds"] for r in runs)},
+                "warmup_seconds": {"p50": statistics.median(r["warmup_seconds"] for r in runs)},
+                "modules_imported": len(last["modules"]),
+            }
+        },
+        "early_imports": last["early_imports"],
+    }
+
+    slowest = sorted(last["modules"].items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+    print(f"{'module':50s} {'cumulative ms':>14s} {'self ms':>10s}")
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"{name:50s} {cumulative_us / 1000:14.1f} {self_us / 1000:10.1f}")
+    print(json.dumps(report["results"], indent=2))
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(os.path.join(RESULTS_DIR, "startup_latest.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    if args.save:
+        with open(os.path.join(RESULTS_DIR, f"startup_{args.save}.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    failed = False
+    if last["early_imports"]:
+        print(f"Imported by `import backend.main` but should be deferred: {', '.join(last['early_imports'])}")
+        failed = True
+
+    if args.compare:
+        with open(os.path.join(RESULTS_DIR, f"startup_{args.compare}.json"), "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed beyond {args.threshold:.0%}.")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
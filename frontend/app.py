@@ -1,11 +1,18 @@
 import streamlit as st
-import requests
 import json
+import uuid
 from streamlit_ace import st_ace
 
 st.set_page_config(page_title="VIntervu 2.0", layout="wide")
 
 API_URL = "http://localhost:8000"
+WS_URL = API_URL.replace("http", "ws", 1)
+
+# Messages the answer fragment draws before a full rerun folds them into the transcript
+MAX_FRAGMENT_MESSAGES = 20
+
+# Seconds to wait for each frame from the backend; a turn can take several LLM calls
+RECV_TIMEOUT = 180
 
 # Custom CSS for chat interface
 st.markdown("""
@@ -35,35 +42,117 @@ if "interview_active" not in st.session_state:
     st.session_state.interview_active = False
 
 if "session_id" not in st.session_state:
-    st.session_state.session_id = "session_1"
+    st.session_state.session_id = str(uuid.uuid4())
+
+def get_socket():
+    """Persistent WebSocket to the backend, kept across Streamlit reruns."""
+    if st.session_state.get("ws") is None:
+        from websockets.sync.client import connect
+        st.session_state.ws = connect(f"{WS_URL}/ws/{st.session_state.session_id}", open_timeout=5)
+    return st.session_state.ws
+
+def drop_socket():
+    ws = st.session_state.pop("ws", None)
+    if ws is not None:
+        try:
+            ws.close()
+        except Exception:
+            pass
+
+def apply_delta(data):
+    """Places the messages at the thread offset they start at and applies the changed state fields."""
+    st.session_state.messages[data["offset"]:] = data["messages"]
+    state = data["state"]
+    
+    if state.get("candidate_profile"):
+        st.session_state.candidate_profile = state["candidate_profile"]
+        
+    if state.get("code_output"):
+        st.session_state.agent_thoughts.append(f"Evaluated code. Output: {state['code_output'][:50]}...")
+
+class Busy(Exception):
+    """The backend is at capacity and refused the request."""
+
+def idempotency_key(event):
+    """
+    One key per pending input: sending the same input again after a failure
+    reuses it, so the backend runs it at most once. Cleared once answered.
+    """
+    pending = st.session_state.get("pending_input")
+    content = event.get("message", event.get("resume_text"))
+    if pending is None or pending["input"] != (event["type"], content):
+        pending = st.session_state.pending_input = {"input": (event["type"], content), "key": str(uuid.uuid4())}
+    return pending["key"]
+
+def receive():
+    return json.loads(st.session_state.ws.recv(timeout=RECV_TIMEOUT))
+
+def resync():
+    """
+    Replaces the transcript with the session's thread after a reconnect: a
+    dropped connection may have lost the delta of a turn that did finish.
+    """
+    get_socket().send(json.dumps({"type": "sync", "offset": 0}))
+    data = receive()
+    if data["type"] == "delta":
+        apply_delta(data)
+
+def exchange(event):
+    """
+    Sends only the new input over the socket and applies the server's delta,
+    showing the place in the queue while the backend is at capacity.
+    """
+    event = {**event, "idempotency_key": idempotency_key(event)}
+    try:
+        get_socket().send(json.dumps(event))
+    except Exception:
+        # Stale connection (backend restart, idle timeout): reconnect once
+        drop_socket()
+        resync()
+        if event["type"] == "answer" and st.session_state.messages[-1:] != [{"role": "user", "content": event["message"]}]:
+            # The thread doesn't have the answer yet; show it again while it's sent
+            st.session_state.messages.append({"role": "user", "content": event["message"]})
+        get_socket().send(json.dumps(event))
+    
+    waiting = st.empty()
+    try:
+        data = receive()
+        while data["type"] == "queued":
+            waiting.info(f"The interviewer is busy. You are #{data['position']} in line (about {data['estimated_wait']:.0f}s).")
+            data = receive()
+    except Exception:
+        # Includes TimeoutError: closing the socket cancels the run, and the
+        # same key is sent again on retry
+        drop_socket()
+        raise
+    finally:
+        waiting.empty()
+    
+    if data["type"] == "busy":
+        raise Busy(f"The interviewer is at capacity. Please try again in {data['retry_after']}s.")
+    if data["type"] == "error":
+        raise RuntimeError(data["detail"])
+    apply_delta(data)
+    st.session_state.pending_input = None
+    return data
 
 def send_message(message):
     st.session_state.messages.append({"role": "user", "content": message})
     
-    payload = {
-        "message": message,
-        "session_id": st.session_state.session_id,
-        "candidate_profile": st.session_state.candidate_profile,
-        "history": st.session_state.messages[:-1] # Send history excluding current new message (backend adds it)
-    }
-    
     try:
-        response = requests.post(f"{API_URL}/chat", json=payload)
-        response.raise_for_status()
-        data = response.json()
-        
-        bot_response = data["response"]
-        st.session_state.messages.append({"role": "assistant", "content": bot_response})
-        
-        if data.get("candidate_profile"):
-            st.session_state.candidate_profile = data["candidate_profile"]
-            
-        if data.get("code_output"):
-            st.session_state.agent_thoughts.append(f"Evaluated code. Output: {data['code_output'][:50]}...")
-            
+        exchange({"type": "answer", "message": message})
+    except Busy as e:
+        # Not received by the interviewer; let the candidate send it again
+        st.session_state.messages.pop()
+        st.warning(str(e))
     except Exception as e:
         st.error(f"Error communicating with backend: {e}")
 
+def render_messages(messages):
+    for msg in messages:
+        with st.chat_message(msg["role"]):
+            st.write(msg["content"])
+
 # Sidebar
 with st.sidebar:
     st.title("VIntervu 2.0")
@@ -93,33 +182,36 @@ with st.sidebar:
                 else:
                     # Call API
                     try:
-                        response = requests.post(f"{API_URL}/analyze-resume", json={"resume_text": resume_text})
-                        response.raise_for_status()
-                        data = response.json()
+                        exchange({"type": "resume", "resume_text": resume_text})
                         
-                        st.session_state.candidate_profile = data["candidate_profile"]
-                        st.session_state.messages.append({"role": "assistant", "content": data["response"]})
-                        st.session_state.interview_active = True
-                        st.session_state.agent_thoughts.append(f"Analyzed resume for {data['candidate_profile'].get('name')}")
+                        if st.session_state.candidate_profile:
+                            st.session_state.interview_active = True
+                            st.session_state.agent_thoughts.append(f"Analyzed resume for {st.session_state.candidate_profile.get('name')}")
                         st.rerun()
+                    except Busy as e:
+                        st.warning(str(e))
                     except Exception as e:
-                        error_detail = ""
-                        if hasattr(e, 'response') and e.response is not None:
-                            error_detail = f": {e.response.text}"
-                        st.error(f"API Error{error_detail}")
+                        st.error(f"API Error: {e}")
             except Exception as e:
                 st.error(f"Error processing file: {e}")
 
 # Main Chat Area
 st.header("Interview Session")
 
-# Display chat history
-for msg in st.session_state.messages:
-    with st.chat_message(msg["role"]):
-        st.write(msg["content"])
+# Full reruns draw the transcript once; each answer only reruns the
+# fragment below, which draws the messages added since then. A fragment's
+# output is replaced on every rerun, so what it draws can't accumulate;
+# once that tail reaches MAX_FRAGMENT_MESSAGES, a full rerun moves it into
+# the transcript, keeping each answer's redraw bounded however long the interview.
+st.session_state.rendered_upto = len(st.session_state.messages)
+render_messages(st.session_state.messages)
 
-# Input area
-if st.session_state.interview_active:
+@st.fragment
+def interview_turn():
+    if len(st.session_state.messages) - st.session_state.rendered_upto > MAX_FRAGMENT_MESSAGES:
+        st.rerun()
+    render_messages(st.session_state.messages[st.session_state.rendered_upto:])
+    
     user_input = st.chat_input("Type your answer...")
     
     # Code Editor Toggle
@@ -138,6 +230,10 @@ if st.session_state.interview_active:
             full_input += f"\n\n```python\n{code_input}\n```"
         
         send_message(full_input)
-        st.rerun()
+        st.rerun(scope="fragment")
+
+# Input area
+if st.session_state.interview_active:
+    interview_turn()
 else:
     st.info("Please upload a resume to start the interview.")
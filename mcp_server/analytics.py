@@ -0,0 +1,519 @@
+"""
+Columnar analytics store for interview scores.
+
+Per-question scores (interview_logs) and final per-stage scores
+(session_results) are exported incrementally from SQLite into one raw,
+fixed-width binary file per column. Each export only appends rows with an id
+above the last exported one, and runs in the background shortly after the
+tools write new scores (schedule_export), never on a read. Readers memory-map
+the files with NumPy, so cohort statistics over 100k+ interviews are
+vectorised array operations instead of SQLite scans.
+
+    python -m mcp_server.analytics --export
+    python -m mcp_server.analytics --report --since 2025-01-01
+"""
+import json
+import os
+import threading
+import time
+import warnings
+from datetime import datetime, timezone
+
+import numpy as np
+
+from utils.config import ANALYTICS_DIR, ANALYTICS_EXPORT_INTERVAL
+from .database import get_db_connection
+
+STAGES = ("self_intro", "technical", "dsa")
+DIFFICULTIES = ("easy", "medium", "hard")
+
+# Column name -> dtype for each exported table. Strings are stored as codes
+# into dictionaries, each an append-only file of one JSON string per line.
+TABLES = {
+    "answers": {
+        "log_id": "<i8",
+        "session": "<i4",
+        "stage": "<i1",
+        "topic": "<i4",
+        "difficulty": "<i1",
+        "score": "<f4",
+        "timestamp": "<f8",
+    },
+    "sessions": {
+        "result_id": "<i8",
+        "session": "<i4",
+        "candidate": "<i4",
+        "overall": "<f4",
+        "self_intro": "<f4",
+        "technical": "<f4",
+        "dsa": "<f4",
+        "total_questions": "<i2",
+        "completed_at": "<f8",
+    },
+}
+DICTIONARIES = ("session", "topic", "candidate")
+
+# A stale lock (crashed exporter) is ignored after this many seconds
+LOCK_TIMEOUT = 300
+
+
+def _timestamp(value):
+    if not value:
+        return np.nan
+    try:
+        return datetime.fromisoformat(str(value)).replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return np.nan
+
+
+def _code(values, mapping, value):
+    """Dictionary-encodes `value`; -1 means missing."""
+    if value is None or value == "":
+        return -1
+    code = mapping.get(value)
+    if code is None:
+        code = mapping[value] = len(values)
+        values.append(value)
+    return code
+
+
+class ColumnStore:
+    """
+    Append-only column and dictionary files, plus a small meta.json holding
+    how many rows and dictionary bytes of them are published.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or ANALYTICS_DIR
+        self.meta_path = os.path.join(self.path, "meta.json")
+        self.meta_mtime = None
+        self.dictionaries = {name: [] for name in DICTIONARIES}
+        # (entries, bytes) of each dictionary read from, or written to, its file
+        self.persisted = {name: (0, 0) for name in DICTIONARIES}
+        self.meta = self._load_meta()
+        self._load_dictionaries()
+
+    def _load_meta(self):
+        if os.path.exists(self.meta_path):
+            self.meta_mtime = os.path.getmtime(self.meta_path)
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {
+            "rows": {table: 0 for table in TABLES},
+            "last_id": {table: 0 for table in TABLES},
+            "dictionaries": {name: 0 for name in DICTIONARIES},
+        }
+
+    def _column_path(self, table, column):
+        return os.path.join(self.path, f"{table}.{column}.bin")
+
+    def _dictionary_path(self, name):
+        return os.path.join(self.path, f"{name}.dict")
+
+    def _load_dictionaries(self):
+        """Reads only the dictionary entries published since the last load."""
+        for name, values in self.dictionaries.items():
+            size = self.meta["dictionaries"][name]
+            count, loaded = self.persisted[name]
+            if size < loaded:
+                # The store was rebuilt from scratch
+                count = loaded = 0
+            # Entries an export added but never published are not in the file
+            del values[count:]
+            if size > loaded:
+                with open(self._dictionary_path(name), "rb") as f:
+                    f.seek(loaded)
+                    lines = f.read(size - loaded).decode("utf-8").splitlines()
+                values.extend(json.loads(line) for line in lines)
+            self.persisted[name] = (len(values), size)
+
+    def _append_dictionary(self, name):
+        """Appends the entries added since the last write and publishes the new size."""
+        values = self.dictionaries[name]
+        count, size = self.persisted[name]
+        if len(values) > count:
+            data = "".join(json.dumps(value) + "\n" for value in values[count:]).encode("utf-8")
+            with open(self._dictionary_path(name), "ab") as f:
+                # Drop a partial tail left by an export that died before updating meta.json
+                f.truncate(size)
+                f.write(data)
+            size += len(data)
+        self.meta["dictionaries"][name] = size
+        self.persisted[name] = (len(values), size)
+
+    def reload(self):
+        """
+        Picks up exports made by other processes (cheap when nothing
+        changed). Returns True if there was one.
+        """
+        if os.path.exists(self.meta_path) and os.path.getmtime(self.meta_path) != self.meta_mtime:
+            self.meta = self._load_meta()
+            self._load_dictionaries()
+            return True
+        return False
+
+    def column(self, table, column):
+        """Memory-maps one column (read-only). Only rows recorded in meta.json are visible."""
+        rows = self.meta["rows"][table]
+        dtype = np.dtype(TABLES[table][column])
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._column_path(table, column), dtype=dtype, mode="r", shape=(rows,))
+
+    def table(self, table):
+        return {column: self.column(table, column) for column in TABLES[table]}
+
+    def dictionary(self, name):
+        return self.dictionaries[name]
+
+    def snapshot(self):
+        """The published columns and dictionaries, as a Snapshot."""
+        return Snapshot(
+            {table: self.table(table) for table in TABLES},
+            {name: tuple(values) for name, values in self.dictionaries.items()}
+        )
+
+    def _append(self, table, columns):
+        """Appends equal-length column arrays, then publishes the new row count."""
+        rows = self.meta["rows"][table]
+        for column, dtype in TABLES[table].items():
+            path = self._column_path(table, column)
+            # Drop a partial tail left by an export that died before updating meta.json
+            with open(path, "ab") as f:
+                f.truncate(rows * np.dtype(dtype).itemsize)
+                f.write(np.asarray(columns[column], dtype=dtype).tobytes())
+        self.meta["rows"][table] = rows + len(next(iter(columns.values())))
+
+    def _save_meta(self):
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, self.meta_path)
+
+    def export(self, batch_size=10000):
+        """
+        Appends rows added to SQLite since the last export. Returns the number
+        of new (answers, sessions) rows, or None if another process holds
+        the export lock.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        lock = os.path.join(self.path, "export.lock")
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if time.time() - os.path.getmtime(lock) < LOCK_TIMEOUT:
+                return None
+            os.remove(lock)
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+
+        try:
+            # Another process may have exported since this store was opened
+            self.reload()
+            added = (self._export_answers(batch_size), self._export_sessions(batch_size))
+            if any(added):
+                for name in DICTIONARIES:
+                    self._append_dictionary(name)
+                self._save_meta()
+                self.meta_mtime = os.path.getmtime(self.meta_path)
+            return added
+        finally:
+            os.close(fd)
+            os.remove(lock)
+
+    def _export_answers(self, batch_size):
+        sessions = self.dictionaries["session"]
+        topics = self.dictionaries["topic"]
+        session_codes = topic_codes = None
+
+        conn = get_db_connection()
+        added = 0
+        while True:
+            rows = conn.execute(
+                """
+                SELECT id, session_id, stage, topic, difficulty, score, timestamp
+                FROM interview_logs WHERE id > ? AND score IS NOT NULL
+                ORDER BY id LIMIT ?
+                """,
+                (self.meta["last_id"]["answers"], batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            if session_codes is None:
+                session_codes = {v: i for i, v in enumerate(sessions)}
+                topic_codes = {v: i for i, v in enumerate(topics)}
+
+            self._append("answers", {
+                "log_id": [r["id"] for r in rows],
+                "session": [_code(sessions, session_codes, r["session_id"]) for r in rows],
+                "stage": [STAGES.index(r["stage"]) if r["stage"] in STAGES else -1 for r in rows],
+                "topic": [_code(topics, topic_codes, r["topic"]) for r in rows],
+                "difficulty": [DIFFICULTIES.index(r["difficulty"]) if r["difficulty"] in DIFFICULTIES else -1 for r in rows],
+                "score": [r["score"] for r in rows],
+                "timestamp": [_timestamp(r["timestamp"]) for r in rows],
+            })
+            self.meta["last_id"]["answers"] = rows[-1]["id"]
+            added += len(rows)
+        conn.close()
+        return added
+
+    def _export_sessions(self, batch_size):
+        sessions = self.dictionaries["session"]
+        candidates = self.dictionaries["candidate"]
+        session_codes = candidate_codes = None
+
+        def score(value):
+            return np.nan if value is None else value
+
+        conn = get_db_connection()
+        added = 0
+        while True:
+            rows = conn.execute(
+                """
+                SELECT id, session_id, candidate_name, overall_score, self_intro_score,
+                       technical_score, dsa_score, total_questions, completed_at
+                FROM session_results WHERE id > ?
+                ORDER BY id LIMIT ?
+                """,
+                (self.meta["last_id"]["sessions"], batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            if session_codes is None:
+                session_codes = {v: i for i, v in enumerate(sessions)}
+                candidate_codes = {v: i for i, v in enumerate(candidates)}
+
+            self._append("sessions", {
+                "result_id": [r["id"] for r in rows],
+                "session": [_code(sessions, session_codes, r["session_id"]) for r in rows],
+                "candidate": [_code(candidates, candidate_codes, r["candidate_name"]) for r in rows],
+                "overall": [score(r["overall_score"]) for r in rows],
+                "self_intro": [score(r["self_intro_score"]) for r in rows],
+                "technical": [score(r["technical_score"]) for r in rows],
+                "dsa": [score(r["dsa_score"]) for r in rows],
+                "total_questions": [r["total_questions"] or 0 for r in rows],
+                "completed_at": [_timestamp(r["completed_at"]) for r in rows],
+            })
+            self.meta["last_id"]["sessions"] = rows[-1]["id"]
+            added += len(rows)
+        conn.close()
+        return added
+
+
+class Snapshot:
+    """
+    One export as readers see it: memory-mapped columns and dictionaries
+    that never change, so concurrent reports can share it.
+    """
+
+    def __init__(self, tables, dictionaries):
+        self.tables = tables
+        self.dictionaries = dictionaries
+
+    def table(self, table):
+        return self.tables[table]
+
+    def dictionary(self, name):
+        return self.dictionaries[name]
+
+
+_store = None
+_snapshot = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    Snapshot of the latest export. The process-wide store parses
+    dictionaries once rather than per report; it is only reloaded under a
+    lock, and a new snapshot replaces the old one whole.
+    """
+    global _store, _snapshot
+    with _store_lock:
+        if _store is None:
+            _store = ColumnStore()
+        if _store.reload() or _snapshot is None:
+            _snapshot = _store.snapshot()
+        return _snapshot
+
+
+# The exporter keeps its own store, so readers of the shared one never see
+# an export half applied; they pick it up through meta.json.
+_exporter = None
+_export_lock = threading.Lock()
+_export_timer = None
+
+
+def schedule_export(delay=ANALYTICS_EXPORT_INTERVAL):
+    """
+    Exports new rows in the background `delay` seconds from now, unless an
+    export is already due; the writes in between go out in one export.
+    """
+    global _export_timer
+    with _export_lock:
+        if _export_timer is None:
+            _export_timer = threading.Timer(delay, _scheduled_export)
+            _export_timer.daemon = True
+            _export_timer.start()
+
+
+def _scheduled_export():
+    global _exporter, _export_timer
+    with _export_lock:
+        _export_timer = None
+        if _exporter is None:
+            _exporter = ColumnStore()
+    try:
+        added = _exporter.export()
+    except Exception as e:
+        print(f"Analytics export failed: {e}")
+        return
+    if added is None:
+        # Another process is exporting and may have missed the latest rows
+        schedule_export()
+
+
+def zscores(values):
+    """Column-wise z-scores, ignoring NaN (a stage the candidate never reached)."""
+    # All-NaN columns (no one reached a stage) warn and come out NaN, which is what we want
+    with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mean = np.nanmean(values, axis=0)
+        std = np.nanstd(values, axis=0)
+        z = (values - mean) / np.where(std > 0, std, 1)
+    return z
+
+
+def percentile_ranks(values, at):
+    """Share of `values` strictly below each of `at` (0-100), ignoring NaN; NaN stays NaN."""
+    valid = np.sort(values[~np.isnan(values)])
+    at = np.asarray(at, dtype=np.float64)
+    ranks = np.full(at.shape, np.nan)
+    if valid.size:
+        mask = ~np.isnan(at)
+        ranks[mask] = np.searchsorted(valid, at[mask], side="left") / valid.size * 100
+    return ranks
+
+
+def top_indices(values, k):
+    """Indices of the k largest values, best first; NaN sorts last. O(n) selection, not a full sort."""
+    keys = np.nan_to_num(values, nan=-np.inf)
+    k = min(k, keys.size)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(keys, keys.size - k)[keys.size - k:]
+    return candidates[np.argsort(keys[candidates])[::-1]]
+
+
+def cohort_report(since=None, until=None, top=20, weights=None, percentiles=(10, 25, 50, 75, 90), store=None):
+    """
+    Scores a cohort of completed interviews (optionally limited to a
+    completion window, as ISO dates) in one vectorised pass:
+    per-stage percentiles, per-stage z-scores, and a ranking by the weighted
+    sum of z-scores. Stages a candidate never reached don't count against them.
+    """
+    store = store or get_store()
+
+    table = store.table("sessions")
+    mask = np.ones(len(table["result_id"]), dtype=bool)
+    if since:
+        mask &= table["completed_at"] >= _timestamp(since)
+    if until:
+        mask &= table["completed_at"] < _timestamp(until)
+
+    scores = np.column_stack([np.asarray(table[stage][mask], dtype=np.float64) for stage in STAGES]) \
+        if mask.any() else np.empty((0, len(STAGES)))
+    overall = np.asarray(table["overall"][mask], dtype=np.float64)
+    sessions = np.asarray(table["session"][mask])
+    candidates = np.asarray(table["candidate"][mask])
+
+    report = {
+        "cohort_size": int(mask.sum()),
+        "percentiles": {},
+        "ranking": [],
+    }
+    if not report["cohort_size"]:
+        return report
+
+    with np.errstate(all="ignore"):
+        for i, stage in enumerate(STAGES + ("overall",)):
+            column = overall if stage == "overall" else scores[:, i]
+            if np.isnan(column).all():
+                continue
+            values = np.nanpercentile(column, percentiles)
+            report["percentiles"][stage] = {f"p{p}": round(float(v), 2) for p, v in zip(percentiles, values)}
+
+    z = zscores(scores)
+    w = np.array([(weights or {}).get(stage, 1.0) for stage in STAGES])
+    reached = ~np.isnan(z)
+    # Weighted mean over the stages each candidate reached
+    composite = np.nansum(z * w, axis=1) / np.maximum((reached * w).sum(axis=1), 1e-9)
+    composite[~reached.any(axis=1)] = np.nan
+
+    order = top_indices(composite, top)
+    ranks = percentile_ranks(composite, composite[order])
+
+    session_names = store.dictionary("session")
+    candidate_names = store.dictionary("candidate")
+    for position, (i, rank) in enumerate(zip(order, ranks), 1):
+        report["ranking"].append({
+            "rank": position,
+            "session_id": session_names[sessions[i]],
+            "candidate": candidate_names[candidates[i]] if candidates[i] >= 0 else None,
+            "overall": None if np.isnan(overall[i]) else round(float(overall[i]), 2),
+            "composite_z": None if np.isnan(composite[i]) else round(float(composite[i]), 3),
+            "percentile": None if np.isnan(rank) else round(float(rank), 1),
+            "stage_z": {
+                stage: None if np.isnan(z[i, j]) else round(float(z[i, j]), 3)
+                for j, stage in enumerate(STAGES)
+            },
+        })
+    return report
+
+
+def question_stats(store=None):
+    """Mean score and count per (stage, difficulty) across all exported answers."""
+    store = store or get_store()
+
+    answers = store.table("answers")
+    stage = np.asarray(answers["stage"], dtype=np.int64)
+    difficulty = np.asarray(answers["difficulty"], dtype=np.int64)
+    score = np.asarray(answers["score"], dtype=np.float64)
+
+    # One bincount over a combined key instead of a GROUP BY scan
+    key = (stage + 1) * (len(DIFFICULTIES) + 1) + (difficulty + 1)
+    size = (len(STAGES) + 1) * (len(DIFFICULTIES) + 1)
+    counts = np.bincount(key, minlength=size)
+    sums = np.bincount(key, weights=score, minlength=size)
+
+    stats = {}
+    for s, stage_name in enumerate(("unknown",) + STAGES):
+        for d, difficulty_name in enumerate(("unknown",) + DIFFICULTIES):
+            k = s * (len(DIFFICULTIES) + 1) + d
+            if counts[k]:
+                stats.setdefault(stage_name, {})[difficulty_name] = {
+                    "answers": int(counts[k]),
+                    "mean_score": round(float(sums[k] / counts[k]), 2)
+                }
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export interview scores and print cohort statistics.")
+    parser.add_argument("--export", action="store_true", help="Append new rows from SQLite to the column store")
+    parser.add_argument("--report", action="store_true", help="Print the cohort report")
+    parser.add_argument("--since", help="Cohort start (ISO date)")
+    parser.add_argument("--until", help="Cohort end (ISO date, exclusive)")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    store = ColumnStore()
+    if args.export:
+        print(f"Exported (answers, sessions): {store.export()}")
+    if args.report:
+        start = time.perf_counter()
+        report = cohort_report(args.since, args.until, args.top, store=store)
+        report["question_stats"] = question_stats(store=store)
+        print(json.dumps(report, indent=2))
+        print(f"Computed in {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -1,19 +1,149 @@
 import sqlite3
+import functools
+import hashlib
 import json
-from datetime import datetime
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
 import os
 
-DB_PATH = "vintervu.db"
+from utils.config import ARCHIVE_AFTER_DAYS, ARCHIVE_DIR, DB_PATH, SQLITE_BUSY_TIMEOUT
+
+try:
+    import zstandard
+except ImportError:  # optional: archives are written with zlib instead
+    zstandard = None
+
+# Schema of each monthly cold archive: one compressed JSON record per
+# archived session, candidate or resume
+ARCHIVE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS archived (
+        kind TEXT,
+        key TEXT,
+        codec TEXT,
+        payload BLOB,
+        archived_at REAL,
+        PRIMARY KEY (kind, key)
+    )
+'''
+
+# Full-text indexes of each archive's text, so archived interviews and
+# resumes stay searchable without their text or index in the hot database.
+# Log entries use the interview_logs id as rowid.
+ARCHIVE_SEARCH_SCHEMA = (
+    "CREATE VIRTUAL TABLE archived_logs_fts USING fts5(question, answer, evaluation, tokenize='porter unicode61')",
+    "CREATE VIRTUAL TABLE archived_resumes_fts USING fts5(resume_text, source UNINDEXED, ref UNINDEXED, tokenize='porter unicode61')",
+)
+
+# Keep the FTS5 indexes (init_search_index) in step with their tables
+SEARCH_TRIGGERS = (
+    '''
+    CREATE TRIGGER IF NOT EXISTS interview_logs_fts_insert AFTER INSERT ON interview_logs BEGIN
+        INSERT INTO interview_logs_fts (rowid, question, answer, evaluation)
+        VALUES (new.id, new.question, new.answer, new.evaluation);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS interview_logs_fts_delete AFTER DELETE ON interview_logs BEGIN
+        INSERT INTO interview_logs_fts (interview_logs_fts, rowid, question, answer, evaluation)
+        VALUES ('delete', old.id, old.question, old.answer, old.evaluation);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS interview_logs_fts_update AFTER UPDATE OF question, answer, evaluation ON interview_logs BEGIN
+        INSERT INTO interview_logs_fts (interview_logs_fts, rowid, question, answer, evaluation)
+        VALUES ('delete', old.id, old.question, old.answer, old.evaluation);
+        INSERT INTO interview_logs_fts (rowid, question, answer, evaluation)
+        VALUES (new.id, new.question, new.answer, new.evaluation);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS resumes_fts_insert AFTER INSERT ON resumes BEGIN
+        INSERT INTO resume_fts (rowid, resume_text) VALUES (new.id, new.resume_text);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS resumes_fts_delete AFTER DELETE ON resumes BEGIN
+        INSERT INTO resume_fts (resume_fts, rowid, resume_text) VALUES ('delete', old.id, old.resume_text);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS resumes_fts_update AFTER UPDATE OF resume_text ON resumes BEGIN
+        INSERT INTO resume_fts (resume_fts, rowid, resume_text) VALUES ('delete', old.id, old.resume_text);
+        INSERT INTO resume_fts (rowid, resume_text) VALUES (new.id, new.resume_text);
+    END
+    ''',
+)
+
+# Triggers of the resume index from before it read its text from `resumes`
+LEGACY_SEARCH_TRIGGERS = ("resumes_fts_insert", "resumes_fts_delete", "candidates_fts_insert", "candidates_fts_delete")
+
+RESUMES_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {} (
+        id INTEGER PRIMARY KEY,
+        hash TEXT UNIQUE,
+        resume_text TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+# Per-session, per-stage score aggregates, updated with every logged answer
+# so a live scorecard is a primary-key read (see get_scorecard)
+SCORECARD_TRIGGERS = (
+    '''
+    CREATE TRIGGER IF NOT EXISTS session_scorecard_insert AFTER INSERT ON interview_logs BEGIN
+        INSERT INTO session_scorecard (session_id, stage, answers, scored, score_sum, score_min, score_max,
+                                       mean_score, last_score, updated_at)
+        VALUES (new.session_id, COALESCE(new.stage, 'unknown'), 1, new.score IS NOT NULL, COALESCE(new.score, 0),
+                new.score, new.score, new.score, new.score, (julianday('now') - 2440587.5) * 86400.0)
+        ON CONFLICT (session_id, stage) DO UPDATE SET
+            answers = answers + 1,
+            scored = scored + excluded.scored,
+            score_sum = score_sum + excluded.score_sum,
+            score_min = min(COALESCE(score_min, excluded.score_min), COALESCE(excluded.score_min, score_min)),
+            score_max = max(COALESCE(score_max, excluded.score_max), COALESCE(excluded.score_max, score_max)),
+            mean_score = CASE WHEN scored + excluded.scored > 0
+                              THEN (score_sum + excluded.score_sum) * 1.0 / (scored + excluded.scored) END,
+            last_score = COALESCE(excluded.last_score, last_score),
+            updated_at = excluded.updated_at;
+    END
+    ''',
+    # Deletes are rare (min/max can't be undone incrementally): recount the stage
+    '''
+    CREATE TRIGGER IF NOT EXISTS session_scorecard_delete AFTER DELETE ON interview_logs BEGIN
+        DELETE FROM session_scorecard WHERE session_id = old.session_id AND stage = COALESCE(old.stage, 'unknown');
+        INSERT INTO session_scorecard (session_id, stage, answers, scored, score_sum, score_min, score_max,
+                                       mean_score, last_score, updated_at)
+        SELECT session_id, COALESCE(stage, 'unknown'), COUNT(*), COUNT(score), COALESCE(SUM(score), 0),
+               MIN(score), MAX(score), AVG(score),
+               (SELECT score FROM interview_logs l WHERE l.session_id = old.session_id
+                    AND COALESCE(l.stage, 'unknown') = COALESCE(old.stage, 'unknown') AND score IS NOT NULL
+                    ORDER BY id DESC LIMIT 1),
+               (julianday('now') - 2440587.5) * 86400.0
+        FROM interview_logs
+        WHERE session_id = old.session_id AND COALESCE(stage, 'unknown') = COALESCE(old.stage, 'unknown')
+        GROUP BY session_id;
+    END
+    ''',
+)
 
 def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
+    # Several worker processes share this file: wait for locks instead of
+    # failing with "database is locked"
+    conn = sqlite3.connect(DB_PATH, timeout=SQLITE_BUSY_TIMEOUT)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA synchronous=NORMAL")
     return conn
 
 def init_db():
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
     conn = get_db_connection()
     c = conn.cursor()
     
+    # WAL lets readers proceed while another process writes; it is a
+    # property of the database file, so setting it once here is enough
+    c.execute("PRAGMA journal_mode=WAL")
+    
     # Candidates table
     c.execute('''
         CREATE TABLE IF NOT EXISTS candidates (
@@ -25,6 +155,14 @@ def init_db():
         )
     ''')
     
+    # Resumes, stored once per distinct text and referenced by hash; the
+    # integer id is the rowid of their search index
+    c.execute(RESUMES_TABLE.format("resumes"))
+    columns = {row["name"] for row in c.execute("PRAGMA table_info(candidates)")}
+    if "resume_hash" not in columns:
+        c.execute("ALTER TABLE candidates ADD COLUMN resume_hash TEXT")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_candidates_resume_hash ON candidates (resume_hash)")
+    
     # Sessions table
     c.execute('''
         CREATE TABLE IF NOT EXISTS sessions (
@@ -50,15 +188,294 @@ def init_db():
         )
     ''')
     
+    # Structured score columns for analytics (added after the original schema)
+    columns = {row["name"] for row in c.execute("PRAGMA table_info(interview_logs)")}
+    for column, kind in (("stage", "TEXT"), ("topic", "TEXT"), ("difficulty", "TEXT")):
+        if column not in columns:
+            c.execute(f"ALTER TABLE interview_logs ADD COLUMN {column} {kind}")
+    
+    # Final per-stage scores, one row per completed interview
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS session_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT UNIQUE,
+            candidate_name TEXT,
+            overall_score REAL,
+            self_intro_score REAL,
+            technical_score REAL,
+            dsa_score REAL,
+            total_questions INTEGER,
+            completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # MinHash signatures of DSA submissions and their LSH band buckets
+    # (see mcp_server/similarity.py)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS code_submissions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            problem_id TEXT,
+            candidate TEXT,
+            signature BLOB,
+            created_at REAL
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS code_lsh (
+            bucket INTEGER,
+            submission_id INTEGER,
+            PRIMARY KEY (bucket, submission_id)
+        ) WITHOUT ROWID
+    ''')
+    # Each problem's base code (reference and canonical solutions), left
+    # out of its submissions' signatures
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS code_base (
+            problem_id TEXT PRIMARY KEY,
+            digest TEXT,
+            shingles BLOB
+        )
+    ''')
+    
+    # Idempotency keys for /chat and /analyze-resume, shared by all workers
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            key TEXT PRIMARY KEY,
+            fingerprint TEXT,
+            status TEXT,
+            response_json TEXT,
+            updated_at REAL
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_idempotency_updated_at ON idempotency_keys (updated_at)")
+    
+    # Sessions, candidates and resumes whose text was moved to cold storage, and the
+    # monthly archive that holds it (see archive_older_than)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS archive_index (
+            kind TEXT,
+            key TEXT,
+            archive TEXT,
+            archived_at REAL,
+            PRIMARY KEY (kind, key)
+        ) WITHOUT ROWID
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_interview_logs_session ON interview_logs (session_id)")
+    
+    init_search_index(c)
+    init_scorecards(c)
+    
     conn.commit()
     conn.close()
 
+def init_search_index(c):
+    """
+    Full-text indexes (FTS5) for mcp_server/search.py, kept in sync by
+    triggers. Both read their text from their table (interview_logs,
+    resumes), so they add only the index itself. Rows lose their entries
+    when archiving clears their text, which is indexed in its archive
+    instead, and get them back if restored. Indexes created on an existing
+    database are filled from it once.
+    """
+    # One transaction, so concurrent workers don't both fill a new index
+    c.connection.commit()
+    c.execute("BEGIN IMMEDIATE")
+    existing = {row[0]: row[1] for row in c.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table'")}
+    
+    c.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS interview_logs_fts USING fts5(
+            question, answer, evaluation,
+            content='interview_logs', content_rowid='id', tokenize='porter unicode61'
+        )
+    ''')
+    legacy = existing.get("resume_fts")
+    if legacy and "content=" not in legacy:
+        # The first resume index kept its own copy of every resume
+        c.execute("DROP TABLE resume_fts")
+        for trigger in LEGACY_SEARCH_TRIGGERS:
+            c.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        del existing["resume_fts"]
+    if "resume_fts" not in existing:
+        migrate_resumes(c)
+    c.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS resume_fts USING fts5(
+            resume_text, content='resumes', content_rowid='id', tokenize='porter unicode61'
+        )
+    ''')
+    for trigger in SEARCH_TRIGGERS:
+        c.execute(trigger)
+    
+    if "interview_logs_fts" not in existing:
+        c.execute("INSERT INTO interview_logs_fts (interview_logs_fts) VALUES ('rebuild')")
+    if "resume_fts" not in existing:
+        c.execute("INSERT INTO resume_fts (resume_fts) VALUES ('rebuild')")
+
+def migrate_resumes(c):
+    """
+    Gives `resumes` from before its search index an integer id, and moves
+    the resumes older candidates hold inline into it, so the index can read
+    every resume from one table. Runs inside init_search_index's transaction.
+    """
+    if "id" not in {row["name"] for row in c.execute("PRAGMA table_info(resumes)")}:
+        c.execute(RESUMES_TABLE.format("resumes_migrated"))
+        c.execute("INSERT INTO resumes_migrated (hash, resume_text, created_at) SELECT hash, resume_text, created_at FROM resumes")
+        c.execute("DROP TABLE resumes")
+        c.execute("ALTER TABLE resumes_migrated RENAME TO resumes")
+    inline = c.execute("SELECT id, resume_text, created_at FROM candidates WHERE resume_text IS NOT NULL").fetchall()
+    for row in inline:
+        resume_hash = _resume_hash(row["resume_text"])
+        c.execute(
+            """INSERT INTO resumes (hash, resume_text, created_at) VALUES (?, ?, ?)
+               ON CONFLICT (hash) DO UPDATE SET resume_text = excluded.resume_text WHERE resume_text IS NULL""",
+            (resume_hash, row["resume_text"], row["created_at"])
+        )
+        c.execute("UPDATE candidates SET resume_hash = ?, resume_text = NULL WHERE id = ?", (resume_hash, row["id"]))
+
+def init_scorecards(c):
+    """
+    The session_scorecard aggregates and their triggers. Runs inside
+    init_search_index's transaction; a table created on an existing
+    database is filled from interview_logs once.
+    """
+    existing = c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'session_scorecard'").fetchone()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS session_scorecard (
+            session_id TEXT,
+            stage TEXT,
+            answers INTEGER,
+            scored INTEGER,
+            score_sum REAL,
+            score_min REAL,
+            score_max REAL,
+            mean_score REAL,
+            last_score REAL,
+            updated_at REAL,
+            PRIMARY KEY (session_id, stage)
+        ) WITHOUT ROWID
+    ''')
+    for trigger in SCORECARD_TRIGGERS:
+        c.execute(trigger)
+    
+    if existing is None:
+        c.execute('''
+            INSERT INTO session_scorecard (session_id, stage, answers, scored, score_sum, score_min, score_max,
+                                           mean_score, last_score, updated_at)
+            SELECT g.*,
+                   (SELECT score FROM interview_logs l WHERE l.session_id = g.session_id
+                        AND COALESCE(l.stage, 'unknown') = g.stage AND score IS NOT NULL
+                        ORDER BY id DESC LIMIT 1),
+                   (julianday('now') - 2440587.5) * 86400.0
+            FROM (
+                SELECT session_id, COALESCE(stage, 'unknown') AS stage, COUNT(*), COUNT(score),
+                       COALESCE(SUM(score), 0), MIN(score), MAX(score), AVG(score)
+                FROM interview_logs
+                WHERE session_id IS NOT NULL
+                GROUP BY session_id, COALESCE(stage, 'unknown')
+            ) g
+        ''')
+
+def scorecard_from_rows(session_id, rows):
+    """A session's scorecard from its session_scorecard rows (one per stage)."""
+    stages = {}
+    answers = scored = 0
+    total = 0.0
+    updated_at = None
+    for row in rows:
+        stages[row["stage"]] = {
+            "answers": row["answers"],
+            "scored": row["scored"],
+            "mean": round(row["mean_score"], 2) if row["mean_score"] is not None else None,
+            "min": row["score_min"],
+            "max": row["score_max"],
+            "last": row["last_score"],
+        }
+        answers += row["answers"]
+        scored += row["scored"]
+        total += row["score_sum"]
+        updated_at = max(updated_at or 0.0, row["updated_at"])
+    return {
+        "session_id": session_id,
+        "answers": answers,
+        "overall": round(total / scored, 2) if scored else None,
+        "stages": stages,
+        "updated_at": updated_at,
+    }
+
+def get_scorecard(session_id):
+    """Live per-stage score aggregates of a session: a primary-key read, however long the interview."""
+    conn = get_db_connection()
+    try:
+        rows = conn.execute("SELECT * FROM session_scorecard WHERE session_id = ?", (session_id,)).fetchall()
+    finally:
+        conn.close()
+    return scorecard_from_rows(session_id, rows)
+
+def scorecards_updated_since(session_ids, since):
+    """Scorecards of `session_ids` changed after `since` (epoch seconds), by session id."""
+    if not session_ids:
+        return {}
+    conn = get_db_connection()
+    try:
+        changed = [
+            row["session_id"] for row in conn.execute(
+                f"SELECT DISTINCT session_id FROM session_scorecard "
+                f"WHERE session_id IN ({','.join('?' * len(session_ids))}) AND updated_at > ?",
+                (*session_ids, since)
+            )
+        ]
+        rows = conn.execute(
+            f"SELECT * FROM session_scorecard WHERE session_id IN ({','.join('?' * len(changed))})",
+            changed
+        ).fetchall() if changed else []
+    finally:
+        conn.close()
+    by_session = {}
+    for row in rows:
+        by_session.setdefault(row["session_id"], []).append(row)
+    return {session_id: scorecard_from_rows(session_id, rows) for session_id, rows in by_session.items()}
+
+def _resume_hash(resume_text):
+    return hashlib.sha256(resume_text.encode("utf-8")).hexdigest()
+
+def save_resume(resume_text, conn=None):
+    """Stores a resume once, however many candidates or sessions use it. Returns its hash."""
+    resume_hash = _resume_hash(resume_text)
+    own = conn is None
+    conn = conn or get_db_connection()
+    # A resume that was archived comes back into the hot table with its new candidate
+    conn.execute(
+        """INSERT INTO resumes (hash, resume_text) VALUES (?, ?)
+           ON CONFLICT (hash) DO UPDATE SET resume_text = excluded.resume_text WHERE resume_text IS NULL""",
+        (resume_hash, resume_text)
+    )
+    if own:
+        conn.commit()
+        conn.close()
+    return resume_hash
+
+def _resume_text(conn, resume_hash):
+    row = conn.execute("SELECT resume_text FROM resumes WHERE hash = ?", (resume_hash,)).fetchone()
+    if row is None or row["resume_text"] is not None:
+        return row["resume_text"] if row else None
+    archived = _archived(conn, "resume", resume_hash)
+    return archived["resume_text"] if archived else None
+
+def get_resume(resume_hash):
+    """A resume by hash, read back from the archive if it was archived, or None."""
+    conn = get_db_connection()
+    try:
+        return _resume_text(conn, resume_hash)
+    finally:
+        conn.close()
+
 def save_candidate(name, resume_text, profile_data):
     conn = get_db_connection()
     c = conn.cursor()
+    resume_hash = save_resume(resume_text, conn)
     c.execute(
-        "INSERT INTO candidates (name, resume_text, profile_json) VALUES (?, ?, ?)",
-        (name, resume_text, json.dumps(profile_data))
+        "INSERT INTO candidates (name, resume_hash, profile_json) VALUES (?, ?, ?)",
+        (name, resume_hash, json.dumps(profile_data))
     )
     candidate_id = c.lastrowid
     conn.commit()
@@ -75,16 +492,316 @@ def create_session(session_id, candidate_id):
     conn.commit()
     conn.close()
 
-def log_interaction(session_id, question, answer, evaluation, score):
+def log_interaction(session_id, question, answer, evaluation, score, stage=None, topic=None, difficulty=None):
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute(
+        "INSERT INTO interview_logs (session_id, question, answer, evaluation, score, stage, topic, difficulty) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (session_id, question, answer, evaluation, score, stage, topic, difficulty)
+    )
+    conn.commit()
+    conn.close()
+
+def save_session_result(session_id, candidate_name, final_score):
+    stage_scores = final_score.get("stage_scores", {})
     conn = get_db_connection()
     c = conn.cursor()
+    # A stage with no scored answers is NULL, not 0, so it doesn't drag cohort statistics down
     c.execute(
-        "INSERT INTO interview_logs (session_id, question, answer, evaluation, score) VALUES (?, ?, ?, ?, ?)",
-        (session_id, question, answer, evaluation, score)
+        """
+        INSERT INTO session_results (session_id, candidate_name, overall_score, self_intro_score,
+                                     technical_score, dsa_score, total_questions)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(session_id) DO NOTHING
+        """,
+        (
+            session_id, candidate_name, final_score.get("overall_score"),
+            stage_scores.get("self_intro") or None, stage_scores.get("technical") or None,
+            stage_scores.get("dsa") or None, final_score.get("total_questions")
+        )
     )
     conn.commit()
     conn.close()
 
+def _compress(data):
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(data)
+    return "zlib", zlib.compress(data, 9)
+
+def _decompress(codec, payload):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("This archive is zstd-compressed; install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    return zlib.decompress(payload)
+
+def archive_path(archive):
+    return os.path.join(ARCHIVE_DIR, f"interviews-{archive}.db")
+
+def list_archives():
+    """The months that have an archive, oldest first."""
+    if not os.path.isdir(ARCHIVE_DIR):
+        return []
+    names = (name for name in os.listdir(ARCHIVE_DIR) if name.startswith("interviews-") and name.endswith(".db"))
+    return sorted(name[len("interviews-"):-len(".db")] for name in names)
+
+def indexed_archive(archive):
+    """Path of a monthly archive, with its search index built (ARCHIVE_SEARCH_SCHEMA)."""
+    _archive_connection(archive).close()
+    return archive_path(archive)
+
+def _archive_connection(archive):
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    conn = sqlite3.connect(archive_path(archive), timeout=SQLITE_BUSY_TIMEOUT)
+    conn.execute(ARCHIVE_SCHEMA)
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'archived_logs_fts'").fetchone():
+        # Archives written before they were indexed are indexed when first opened
+        conn.execute("BEGIN IMMEDIATE")
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'archived_logs_fts'").fetchone():
+            for statement in ARCHIVE_SEARCH_SCHEMA:
+                conn.execute(statement)
+            for kind, key, codec, payload in conn.execute("SELECT kind, key, codec, payload FROM archived").fetchall():
+                _index_archived(conn, kind, key, json.loads(_decompress(codec, payload)))
+        conn.commit()
+    return conn
+
+def _index_archived(cold, kind, key, data):
+    """Indexes one archived record in its archive, replacing what was indexed for it before."""
+    _unindex_archived(cold, kind, key, data)
+    if kind == "session":
+        cold.executemany(
+            "INSERT INTO archived_logs_fts (rowid, question, answer, evaluation) VALUES (?, ?, ?, ?)",
+            data["logs"]
+        )
+    elif data.get("resume_text"):
+        cold.execute("INSERT INTO archived_resumes_fts (resume_text, source, ref) VALUES (?, ?, ?)", (data["resume_text"], kind, key))
+
+def _unindex_archived(cold, kind, key, data):
+    if kind == "session":
+        cold.executemany("DELETE FROM archived_logs_fts WHERE rowid = ?", [(log[0],) for log in data["logs"]])
+    else:
+        cold.execute("DELETE FROM archived_resumes_fts WHERE source = ? AND ref = ?", (kind, key))
+
+@functools.lru_cache(maxsize=256)
+def _read_archive(kind, key, archive, archived_at):
+    # archived_at is part of the cache key, so a re-archived record is read afresh
+    conn = _archive_connection(archive)
+    try:
+        row = conn.execute("SELECT codec, payload FROM archived WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+    finally:
+        conn.close()
+    return json.loads(_decompress(row[0], row[1])) if row else None
+
+def _archived(conn, kind, key):
+    """The archived record for (kind, key), or None if it was never archived."""
+    entry = conn.execute("SELECT archive, archived_at FROM archive_index WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+    return _read_archive(kind, key, entry["archive"], entry["archived_at"]) if entry else None
+
+def _move_to_archive(conn, records, clear_sql, clear_ids):
+    """
+    Writes (kind, key, archive, data) records to their monthly archives,
+    then indexes them and runs `clear_sql` for each of `clear_ids` in the
+    hot database. The archive is committed first, so a crash in between
+    only leaves text that the next run archives again.
+    """
+    now = time.time()
+    by_archive = {}
+    for kind, key, archive, data in records:
+        by_archive.setdefault(archive, []).append((kind, key, data))
+    for archive, batch in by_archive.items():
+        cold = _archive_connection(archive)
+        try:
+            cold.executemany(
+                "INSERT OR REPLACE INTO archived (kind, key, codec, payload, archived_at) VALUES (?, ?, ?, ?, ?)",
+                [(kind, key, *_compress(json.dumps(data).encode("utf-8")), now) for kind, key, data in batch]
+            )
+            for kind, key, data in batch:
+                _index_archived(cold, kind, key, data)
+            cold.commit()
+        finally:
+            cold.close()
+
+    previous = {
+        (row["kind"], row["key"]): row["archive"]
+        for kind, key, _, _ in records
+        for row in conn.execute("SELECT * FROM archive_index WHERE kind = ? AND key = ?", (kind, key))
+    }
+    conn.executemany(
+        "INSERT OR REPLACE INTO archive_index (kind, key, archive, archived_at) VALUES (?, ?, ?, ?)",
+        [(kind, key, archive, now) for kind, key, archive, _ in records]
+    )
+    conn.executemany(clear_sql, [(i,) for i in clear_ids])
+    conn.commit()
+
+    # A record re-archived into another month leaves a stale copy behind
+    for kind, key, archive, data in records:
+        old = previous.get((kind, key))
+        if old and old != archive:
+            cold = _archive_connection(old)
+            cold.execute("DELETE FROM archived WHERE kind = ? AND key = ?", (kind, key))
+            _unindex_archived(cold, kind, key, data)
+            cold.commit()
+            cold.close()
+
+def archive_older_than(days=ARCHIVE_AFTER_DAYS, batch_size=500):
+    """
+    Moves the question, answer and evaluation text of sessions with no
+    activity in the last `days` days, the resume and profile of candidates
+    created before then, and the resumes stored before then that no
+    unarchived candidate uses, into compressed monthly archives under
+    ARCHIVE_DIR. Ids, hashes, scores, stages and topics stay in the hot
+    tables, so analytics and joins still see every row; get_session_logs,
+    get_candidate and get_resume read the text back. Returns what was archived.
+    """
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    has_text = "(question IS NOT NULL OR answer IS NOT NULL OR evaluation IS NOT NULL)"
+    conn = get_db_connection()
+    counts = {"sessions": 0, "log_rows": 0, "candidates": 0, "resumes": 0}
+    try:
+        sessions = conn.execute(
+            f"""
+            SELECT session_id, MAX(timestamp) AS last_activity FROM interview_logs
+            GROUP BY session_id
+            HAVING last_activity < ? AND MAX({has_text})
+            """,
+            (cutoff,)
+        ).fetchall()
+        for start in range(0, len(sessions), batch_size):
+            records, log_ids = [], []
+            for session in sessions[start:start + batch_size]:
+                rows = conn.execute(
+                    f"SELECT id, question, answer, evaluation FROM interview_logs WHERE session_id = ? AND {has_text} ORDER BY id",
+                    (session["session_id"],)
+                ).fetchall()
+                # Rows logged after an earlier archival join the ones archived then
+                earlier = _archived(conn, "session", session["session_id"]) or {"logs": []}
+                logs = earlier["logs"] + [list(row) for row in rows]
+                records.append(("session", session["session_id"], session["last_activity"][:7], {"logs": logs}))
+                log_ids.extend(row["id"] for row in rows)
+            _move_to_archive(conn, records, "UPDATE interview_logs SET question = NULL, answer = NULL, evaluation = NULL WHERE id = ?", log_ids)
+            counts["sessions"] += len(records)
+            counts["log_rows"] += len(log_ids)
+
+        candidates = conn.execute(
+            "SELECT id, resume_text, profile_json, created_at FROM candidates WHERE created_at < ? AND (resume_text IS NOT NULL OR profile_json IS NOT NULL)",
+            (cutoff,)
+        ).fetchall()
+        for start in range(0, len(candidates), batch_size):
+            batch = candidates[start:start + batch_size]
+            records = [
+                ("candidate", str(row["id"]), row["created_at"][:7], {"resume_text": row["resume_text"], "profile_json": row["profile_json"]})
+                for row in batch
+            ]
+            _move_to_archive(conn, records, "UPDATE candidates SET resume_text = NULL, profile_json = NULL WHERE id = ?", [row["id"] for row in batch])
+            counts["candidates"] += len(records)
+
+        # After the candidates, so those archived above no longer hold their resume in the hot tables
+        resumes = conn.execute(
+            """
+            SELECT hash, resume_text, created_at FROM resumes r
+            WHERE resume_text IS NOT NULL AND created_at < ? AND NOT EXISTS (
+                SELECT 1 FROM candidates c WHERE c.resume_hash = r.hash AND NOT EXISTS (
+                    SELECT 1 FROM archive_index a WHERE a.kind = 'candidate' AND a.key = CAST(c.id AS TEXT)
+                )
+            )
+            """,
+            (cutoff,)
+        ).fetchall()
+        for start in range(0, len(resumes), batch_size):
+            batch = resumes[start:start + batch_size]
+            records = [("resume", row["hash"], row["created_at"][:7], {"resume_text": row["resume_text"]}) for row in batch]
+            _move_to_archive(conn, records, "UPDATE resumes SET resume_text = NULL WHERE hash = ?", [row["hash"] for row in batch])
+            counts["resumes"] += len(records)
+    finally:
+        conn.close()
+    return counts
+
+def compact():
+    """
+    Gives the space archiving freed back to the filesystem. Archived rows'
+    search entries are only marked deleted until their index segments are
+    merged, and freed pages stay inside the file until VACUUM.
+    """
+    conn = get_db_connection()
+    try:
+        for table in ("interview_logs_fts", "resume_fts"):
+            conn.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+def get_session_logs(session_id):
+    """A session's interview_logs rows, oldest first, with archived text read back."""
+    conn = get_db_connection()
+    try:
+        rows = [dict(row) for row in conn.execute("SELECT * FROM interview_logs WHERE session_id = ? ORDER BY id", (session_id,))]
+        archived = _archived(conn, "session", session_id)
+    finally:
+        conn.close()
+    if archived:
+        text = {log[0]: log[1:] for log in archived["logs"]}
+        for row in rows:
+            if row["id"] in text:
+                row["question"], row["answer"], row["evaluation"] = text[row["id"]]
+    return rows
+
+def get_candidate(candidate_id):
+    """A candidates row with archived resume and profile read back, or None."""
+    conn = get_db_connection()
+    try:
+        row = conn.execute("SELECT * FROM candidates WHERE id = ?", (candidate_id,)).fetchone()
+        if row is None:
+            return None
+        candidate = dict(row)
+        archived = _archived(conn, "candidate", str(candidate_id))
+        if archived:
+            candidate.update(archived)
+        # Candidates saved since resumes were split out reference theirs by hash
+        if candidate["resume_text"] is None and candidate["resume_hash"]:
+            candidate["resume_text"] = _resume_text(conn, candidate["resume_hash"])
+    finally:
+        conn.close()
+    return candidate
+
+def restore_session(session_id):
+    """Moves an archived session's text back into the hot database. Returns whether it was archived."""
+    conn = get_db_connection()
+    try:
+        entry = conn.execute("SELECT archive FROM archive_index WHERE kind = 'session' AND key = ?", (session_id,)).fetchone()
+        archived = _archived(conn, "session", session_id)
+        if archived is None:
+            return False
+        conn.executemany(
+            "UPDATE interview_logs SET question = ?, answer = ?, evaluation = ? WHERE id = ?",
+            [(question, answer, evaluation, log_id) for log_id, question, answer, evaluation in archived["logs"]]
+        )
+        conn.execute("DELETE FROM archive_index WHERE kind = 'session' AND key = ?", (session_id,))
+        conn.commit()
+    finally:
+        conn.close()
+    cold = _archive_connection(entry["archive"])
+    cold.execute("DELETE FROM archived WHERE kind = 'session' AND key = ?", (session_id,))
+    _unindex_archived(cold, "session", session_id, archived)
+    cold.commit()
+    cold.close()
+    return True
+
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="VIntervu database")
+    parser.add_argument("--archive", action="store_true", help="Move old interviews to cold storage")
+    parser.add_argument("--older-than", type=int, default=ARCHIVE_AFTER_DAYS, metavar="DAYS")
+    parser.add_argument("--vacuum", action="store_true", help="Shrink the database file afterwards")
+    parser.add_argument("--restore", metavar="SESSION_ID", help="Move an archived session back")
+    args = parser.parse_args()
+
     init_db()
     print("Database initialized.")
+    if args.archive:
+        print(json.dumps(archive_older_than(args.older_than)))
+    if args.restore:
+        print("Restored." if restore_session(args.restore) else "Session is not archived.")
+    if args.vacuum:
+        compact()
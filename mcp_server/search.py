@@ -0,0 +1,164 @@
+"""
+Ranked full-text search over interview transcripts and resumes.
+
+Backed by the SQLite FTS5 indexes created in database.init_search_index,
+which triggers keep current on every insert, update and delete, so there is
+no rebuild step, and by the index in each monthly archive of the text
+archived since. A query is matched against the indexes instead of scanning
+every row with LIKE, ranked with BM25 and returned with highlighted snippets.
+
+    python -m mcp_server.search "kafka partitioning" --limit 10
+"""
+import re
+
+from .database import get_db_connection, indexed_archive, list_archives
+
+# BM25 column weights for interview_logs_fts (question, answer, evaluation):
+# what the candidate said matters most
+LOG_WEIGHTS = (1.0, 2.0, 0.5)
+
+HIGHLIGHT = ("**", "**")
+SNIPPET_TOKENS = 16
+
+
+def to_match_query(query):
+    """
+    FTS5 query for free text: every word must appear (any column), in any
+    order. Words are quoted, so punctuation and FTS operators in the input
+    can't make the query invalid. A trailing * keeps prefix matching.
+    """
+    terms = []
+    for word, star in re.findall(r"(\w+)(\*?)", query):
+        terms.append(f'"{word}"{star}')
+    return " ".join(terms)
+
+
+# Paths of the archives whose search index is known to exist
+_archive_paths = {}
+
+
+def _log_hits(conn, table, match, limit, schema="main"):
+    return conn.execute(
+        f"""
+        SELECT l.id, l.session_id, l.stage, l.topic, l.score, l.timestamp, r.candidate_name,
+               snippet({table}, -1, ?, ?, '...', {SNIPPET_TOKENS}) AS snippet,
+               bm25({table}, {", ".join(map(str, LOG_WEIGHTS))}) AS rank
+        FROM {schema}.{table}
+        JOIN interview_logs l ON l.id = {table}.rowid
+        LEFT JOIN session_results r ON r.session_id = l.session_id
+        WHERE {table} MATCH ?
+        ORDER BY rank
+        LIMIT ?
+        """,
+        (*HIGHLIGHT, match, limit)
+    ).fetchall()
+
+
+def _resume_hits(conn, match, limit):
+    return conn.execute(
+        f"""
+        SELECT 'resume' AS source, resumes.hash AS ref,
+               snippet(resume_fts, 0, ?, ?, '...', {SNIPPET_TOKENS}) AS snippet,
+               bm25(resume_fts) AS rank
+        FROM resume_fts
+        JOIN resumes ON resumes.id = resume_fts.rowid
+        WHERE resume_fts MATCH ?
+        ORDER BY rank
+        LIMIT ?
+        """,
+        (*HIGHLIGHT, match, limit)
+    ).fetchall()
+
+
+def _archived_resume_hits(conn, match, limit):
+    return conn.execute(
+        f"""
+        SELECT source, ref,
+               snippet(archived_resumes_fts, 0, ?, ?, '...', {SNIPPET_TOKENS}) AS snippet,
+               bm25(archived_resumes_fts) AS rank
+        FROM cold.archived_resumes_fts
+        WHERE archived_resumes_fts MATCH ?
+        ORDER BY rank
+        LIMIT ?
+        """,
+        (*HIGHLIGHT, match, limit)
+    ).fetchall()
+
+
+def search_interviews(query, limit=20, sources=("interviews", "resumes")):
+    """
+    Interview answers and resumes matching `query`, best first (BM25),
+    archived ones included. Returns {"interviews": [...], "resumes": [...]};
+    each hit carries a snippet with the matched terms highlighted. Each
+    archive is ranked on its own index, so ranks across archives compare
+    only roughly.
+    """
+    match = to_match_query(query)
+    results = {"interviews": [], "resumes": []}
+    if not match:
+        return results
+
+    conn = get_db_connection()
+    try:
+        logs = _log_hits(conn, "interview_logs_fts", match, limit) if "interviews" in sources else []
+        resumes = _resume_hits(conn, match, limit) if "resumes" in sources else []
+        for archive in list_archives():
+            if archive not in _archive_paths:
+                _archive_paths[archive] = indexed_archive(archive)
+            conn.execute("ATTACH DATABASE ? AS cold", (_archive_paths[archive],))
+            try:
+                if "interviews" in sources:
+                    logs += _log_hits(conn, "archived_logs_fts", match, limit, schema="cold")
+                if "resumes" in sources:
+                    resumes += _archived_resume_hits(conn, match, limit)
+            finally:
+                conn.execute("DETACH DATABASE cold")
+        results["interviews"] = [dict(row) for row in sorted(logs, key=lambda row: row["rank"])[:limit]]
+
+        for row in sorted(resumes, key=lambda row: row["rank"])[:limit]:
+            if row["source"] == "resume":
+                names = conn.execute("SELECT id, name FROM candidates WHERE resume_hash = ? ORDER BY id", (row["ref"],)).fetchall()
+            else:
+                names = conn.execute("SELECT id, name FROM candidates WHERE id = ?", (row["ref"],)).fetchall()
+            results["resumes"].append({
+                "candidates": [{"id": n["id"], "name": n["name"]} for n in names],
+                "snippet": row["snippet"],
+                "rank": row["rank"]
+            })
+    finally:
+        conn.close()
+    return results
+
+
+def maintain(pages=500):
+    """
+    One step of incremental index maintenance: merges up to `pages` pages of
+    the FTS5 segment b-trees, so searches keep touching few segments without
+    a full (blocking) optimize. Cheap enough to run on a timer.
+    """
+    conn = get_db_connection()
+    try:
+        for table in ("interview_logs_fts", "resume_fts"):
+            conn.execute(f"INSERT INTO {table} ({table}, rank) VALUES ('merge', ?)", (pages,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from .database import init_db
+
+    parser = argparse.ArgumentParser(description="Search interviews and resumes")
+    parser.add_argument("query", nargs="?")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--maintain", action="store_true", help="Run one incremental index merge step")
+    args = parser.parse_args()
+
+    init_db()
+    if args.maintain:
+        maintain()
+    if args.query:
+        print(json.dumps(search_interviews(args.query, args.limit), indent=2))
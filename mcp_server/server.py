@@ -1,19 +1,48 @@
 from mcp.server.fastmcp import FastMCP
 import sqlite3
 import json
-from .database import get_db_connection, save_candidate, log_interaction, init_db
+import sys
+import os
 
-# Initialize database
-init_db()
+# Allow running as a script (the MCP client launches this file directly)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-# Create MCP Server
-mcp = FastMCP("VIntervu MCP Server")
+from mcp_server.database import (
+    get_db_connection, save_candidate, log_interaction, save_session_result, init_db,
+    get_session_logs
+)
+from mcp_server import analytics, search, similarity
+from utils.config import MCP_HOST, MCP_PORT
 
-@mcp.tool()
+# Create MCP Server. The HTTP settings only apply to the shared server used
+# in multi-worker mode: stateless JSON responses let every backend worker
+# call tools with a plain POST and no per-worker session.
+mcp = FastMCP(
+    "VIntervu MCP Server",
+    host=MCP_HOST,
+    port=MCP_PORT,
+    stateless_http=True,
+    json_response=True
+)
+
+# Plain functions behind each MCP tool, so the in-process transport
+# (utils/mcp_client.py) can call them without JSON-RPC
+TOOLS = {}
+
+def tool():
+    """Registers a function as an MCP tool and in TOOLS."""
+    def register(fn):
+        TOOLS[fn.__name__] = fn
+        return mcp.tool()(fn)
+    return register
+
+@tool()
 def query_db(sql_query: str) -> str:
     """
     Safe read-only access to the SQLite database.
     Use this to retrieve interview history, candidate details, or session status.
+    Text of archived interviews reads as NULL here; use get_session_log for it.
+    To find interviews or resumes by content, use search_interviews, not LIKE.
     """
     # Basic safety check to prevent modification
     if not sql_query.strip().lower().startswith("select"):
@@ -29,18 +58,21 @@ def query_db(sql_query: str) -> str:
     except Exception as e:
         return f"Database Error: {str(e)}"
 
-@mcp.tool()
-def insert_interview_log(session_id: str, question: str, answer: str, evaluation: str, score: int) -> str:
+@tool()
+def insert_interview_log(session_id: str, question: str, answer: str, evaluation: str, score: int,
+                         stage: str = "", topic: str = "", difficulty: str = "") -> str:
     """
     Log an interview interaction (question, answer, evaluation, score) to the database.
+    stage, topic and difficulty are optional and feed the cohort analytics.
     """
     try:
-        log_interaction(session_id, question, answer, evaluation, score)
+        log_interaction(session_id, question, answer, evaluation, score, stage or None, topic or None, difficulty or None)
+        analytics.schedule_export()
         return "Interaction logged successfully."
     except Exception as e:
         return f"Error logging interaction: {str(e)}"
 
-@mcp.tool()
+@tool()
 def fetch_job_market_data(role: str) -> str:
     """
     Returns 'current hot topics' for a specific role.
@@ -56,7 +88,7 @@ def fetch_job_market_data(role: str) -> str:
     else:
         return "Hot Topics: Cloud Native (Kubernetes), CI/CD pipelines, System Design, Security best practices."
 
-@mcp.tool()
+@tool()
 def save_candidate_profile(name: str, resume_text: str, profile_json: str) -> str:
     """
     Saves a parsed candidate profile to the database.
@@ -71,5 +103,86 @@ def save_candidate_profile(name: str, resume_text: str, profile_json: str) -> st
     except Exception as e:
         return f"Error saving candidate: {str(e)}"
 
+@tool()
+def record_session_result(session_id: str, candidate_name: str, final_score_json: str) -> str:
+    """
+    Stores the final per-stage scores of a completed interview.
+    final_score_json is the final_score object as a JSON string.
+    """
+    try:
+        save_session_result(session_id, candidate_name, json.loads(final_score_json))
+        analytics.schedule_export()
+        return "Session result saved successfully."
+    except json.JSONDecodeError:
+        return "Error: final_score_json must be a valid JSON string."
+    except Exception as e:
+        return f"Error saving session result: {str(e)}"
+
+@tool()
+def cohort_report(since: str = "", until: str = "", top: int = 20) -> str:
+    """
+    Ranks completed interviews in a cohort (optional ISO date window) by
+    per-stage z-scores and returns per-stage score percentiles.
+    """
+    try:
+        report = analytics.cohort_report(since or None, until or None, top)
+        return json.dumps(report, indent=2)
+    except Exception as e:
+        return f"Analytics Error: {str(e)}"
+
+@tool()
+def check_code_similarity(session_id: str, problem_id: str, code: str, candidate: str = "",
+                          base_code_json: str = "") -> str:
+    """
+    Compares a DSA submission with the stored submissions to the same
+    problem from other sessions and candidates (MinHash/LSH), then adds it
+    to the index. base_code_json is a JSON list of the problem's reference
+    and canonical solutions; code they share is never counted as copied.
+    Returns the near-duplicates found, best first, as JSON.
+    """
+    try:
+        base_code = json.loads(base_code_json) if base_code_json else None
+        report = similarity.check_submission(session_id, problem_id or None, code, candidate or None,
+                                             base_code=base_code)
+        return json.dumps(report)
+    except json.JSONDecodeError:
+        return "Error: base_code_json must be a valid JSON string."
+    except Exception as e:
+        return f"Similarity Error: {str(e)}"
+
+@tool()
+def search_interviews(query: str, limit: int = 20) -> str:
+    """
+    Full-text search over interview questions, answers and evaluations and
+    over resumes, e.g. "kafka partitioning". Every word must match; end a
+    word with * for prefix matching. Returns ranked hits with session,
+    candidate, score and a snippet with the matches in **bold**, as JSON.
+    """
+    try:
+        return json.dumps(search.search_interviews(query, limit), indent=2)
+    except Exception as e:
+        return f"Search Error: {str(e)}"
+
+@tool()
+def get_session_log(session_id: str) -> str:
+    """
+    Returns every logged question, answer, evaluation and score of a
+    session as JSON, including sessions moved to cold storage.
+    """
+    try:
+        return json.dumps(get_session_logs(session_id), indent=2)
+    except Exception as e:
+        return f"Database Error: {str(e)}"
+
 if __name__ == "__main__":
-    mcp.run()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="VIntervu MCP server")
+    parser.add_argument("--transport", choices=["stdio", "streamable-http"], default="stdio")
+    args = parser.parse_args()
+
+    # Initialize database (only when serving, not when imported)
+    init_db()
+    # Catch up on scores written while no server was exporting them
+    analytics.schedule_export(0)
+    mcp.run(transport=args.transport)
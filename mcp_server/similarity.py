@@ -0,0 +1,287 @@
+"""
+Near-duplicate detection for DSA code submissions across candidates.
+
+Each submission is reduced to a MinHash signature over shingles of its
+normalised token stream: comments, whitespace and literal values are dropped
+and every identifier becomes the same placeholder, so renaming variables,
+reformatting or introducing a new one doesn't hide a copy.
+
+Honest candidates often write the textbook solution to a bank problem, which
+normalises to much the same tokens however it is named. Each problem
+therefore has base code (code_base): the bank's reference and canonical
+solutions. Shingles that also occur in the base are left out of the
+signature, and a submission with fewer than
+MIN_DISTINCT_SHINGLES shingles beyond the base is neither indexed nor
+flagged. Only the code a candidate wrote beyond the textbook is compared.
+
+Signatures are split into LSH bands, keyed by problem, and stored next to
+interview_logs in SQLite (code_submissions, code_lsh). A lookup only touches
+the submissions to the same problem that share a band bucket with the query.
+Since textbook code never reaches the buckets, popular problems don't pile
+into a few of them, and adding a submission is a handful of inserts.
+
+    python -m mcp_server.similarity --check solution.py
+"""
+import builtins
+import hashlib
+import io
+import json
+import keyword
+import time
+import tokenize
+import zlib
+
+import numpy as np
+
+from .database import get_db_connection
+
+NUM_PERM = 128
+
+# 32 bands of 4 rows: pairs above ~0.6 Jaccard similarity almost always share
+# a bucket, pairs below ~0.2 rarely do
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+SHINGLE_SIZE = 5
+
+# Estimated similarity, of the code beyond the base, at which a submission
+# is flagged. Independently written solutions stay below 0.1.
+THRESHOLD = 0.7
+
+# Shingles beyond the base code a submission needs to be compared at all:
+# about four tokens written differently from every textbook solution
+MIN_DISTINCT_SHINGLES = 20
+
+# Hash parameters are fixed so signatures stay comparable across processes
+_rng = np.random.RandomState(20240917)
+_A = _rng.randint(0, 2 ** 64, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.randint(0, 2 ** 64, NUM_PERM, dtype=np.uint64)
+
+_KEEP = set(keyword.kwlist) | set(dir(builtins))
+_SKIP = {tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT, tokenize.ENCODING, tokenize.ENDMARKER}
+
+
+def normalize(code):
+    """Token stream with identifiers and literals collapsed."""
+    tokens = []
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(code).readline):
+            if tok.type in _SKIP:
+                continue
+            if tok.type == tokenize.NAME and tok.string not in _KEEP:
+                tokens.append("ID")
+            elif tok.type == tokenize.STRING:
+                tokens.append("STR")
+            elif tok.type == tokenize.NUMBER:
+                tokens.append("NUM")
+            else:
+                tokens.append(tok.string)
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        # Unfinished code still gets compared, just less precisely
+        tokens = code.split()
+    return tokens
+
+
+def shingles(tokens, base=None):
+    """
+    Hashes of every SHINGLE_SIZE-token window (the whole stream if shorter),
+    less those in `base` (from base_shingles).
+    """
+    if not tokens:
+        return np.empty(0, dtype=np.uint64)
+    size = min(SHINGLE_SIZE, len(tokens))
+    hashes = {zlib.crc32(" ".join(tokens[i:i + size]).encode("utf-8")) for i in range(len(tokens) - size + 1)}
+    values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+    return values[~np.isin(values, base)] if base is not None and base.size else values
+
+
+def base_shingles(solutions):
+    """Sorted shingle hashes of a problem's base code."""
+    return np.unique(np.concatenate([shingles(normalize(code)) for code in solutions] or [np.empty(0, dtype=np.uint64)]))
+
+
+def signature(code, base=None):
+    """
+    MinHash signature (NUM_PERM uint32 values) of the code beyond `base`,
+    or None if fewer than MIN_DISTINCT_SHINGLES shingles are left.
+    """
+    values = shingles(normalize(code), base)
+    if values.size < MIN_DISTINCT_SHINGLES:
+        return None
+    # Multiply-add-shift hashing of the 32-bit shingle hashes: the high 32
+    # bits of a*x + b (mod 2**64), with 64-bit odd a and 64-bit b
+    hashed = (_A[:, None] * values[None, :] + _B[:, None]) >> np.uint64(32)
+    return hashed.min(axis=1).astype(np.uint32)
+
+
+def band_keys(sig, problem_id=None):
+    """One bucket key per band; the problem and the band number are part of the key."""
+    keys = []
+    scope = (problem_id or "").encode("utf-8")
+    for band in range(BANDS):
+        chunk = sig[band * ROWS:(band + 1) * ROWS].tobytes()
+        digest = hashlib.blake2b(scope + bytes([0, band]) + chunk, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def seed_base(problem_id, solutions, conn=None):
+    """
+    Sets the base code of a problem: its reference and canonical solutions.
+    Returns True if the base changed. Submissions indexed before a change
+    keep the signature they were indexed with.
+    """
+    solutions = [code for code in solutions if code]
+    digest = hashlib.blake2b(json.dumps(solutions).encode("utf-8"), digest_size=16).hexdigest()
+    own = conn is None
+    conn = conn or get_db_connection()
+    try:
+        row = conn.execute("SELECT digest FROM code_base WHERE problem_id = ?", (problem_id or "",)).fetchone()
+        if row is not None and row["digest"] == digest:
+            return False
+        conn.execute(
+            "INSERT OR REPLACE INTO code_base (problem_id, digest, shingles) VALUES (?, ?, ?)",
+            (problem_id or "", digest, base_shingles(solutions).tobytes())
+        )
+        if own:
+            conn.commit()
+        return True
+    finally:
+        if own:
+            conn.close()
+
+
+def get_base(conn, problem_id):
+    """The problem's base shingles (empty if it has no base code)."""
+    row = conn.execute("SELECT shingles FROM code_base WHERE problem_id = ?", (problem_id or "",)).fetchone()
+    return np.frombuffer(row["shingles"], dtype=np.uint64) if row else np.empty(0, dtype=np.uint64)
+
+
+def find_similar(code, problem_id=None, exclude_session=None, exclude_candidate=None, threshold=THRESHOLD, limit=5, sig=None):
+    """
+    Stored submissions to the same problem whose code beyond the base is
+    estimated at least `threshold` similar to that of `code`, best first.
+    Submissions from `exclude_session` or by `exclude_candidate`
+    (resubmissions) are skipped.
+    """
+    conn = get_db_connection()
+    try:
+        sig = signature(code, get_base(conn, problem_id)) if sig is None else sig
+        if sig is None:
+            return []
+        keys = band_keys(sig, problem_id)
+        rows = conn.execute(
+            f"""
+            SELECT s.id, s.session_id, s.problem_id, s.candidate, s.signature
+            FROM code_submissions s
+            WHERE s.id IN (SELECT submission_id FROM code_lsh WHERE bucket IN ({",".join("?" * len(keys))}))
+              AND s.problem_id IS ?
+            """,
+            keys + [problem_id]
+        ).fetchall()
+    finally:
+        conn.close()
+
+    matches = []
+    for row in rows:
+        if exclude_session and row["session_id"] == exclude_session:
+            continue
+        if exclude_candidate and row["candidate"] == exclude_candidate:
+            continue
+        score = similarity(sig, np.frombuffer(row["signature"], dtype=np.uint32))
+        if score >= threshold:
+            matches.append({
+                "submission_id": row["id"],
+                "session_id": row["session_id"],
+                "problem_id": row["problem_id"],
+                "similarity": round(score, 3)
+            })
+    matches.sort(key=lambda m: m["similarity"], reverse=True)
+    return matches[:limit]
+
+
+def _insert(conn, session_id, problem_id, candidate, sig):
+    cursor = conn.execute(
+        "INSERT INTO code_submissions (session_id, problem_id, candidate, signature, created_at) VALUES (?, ?, ?, ?, ?)",
+        (session_id, problem_id, candidate, sig.tobytes(), time.time())
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO code_lsh (bucket, submission_id) VALUES (?, ?)",
+        [(key, cursor.lastrowid) for key in band_keys(sig, problem_id)]
+    )
+    return cursor.lastrowid
+
+
+def add_submissions(submissions):
+    """
+    Indexes (session_id, problem_id, candidate, code) tuples in one
+    transaction. Returns the new submission ids (None for code with too
+    little beyond its problem's base).
+    """
+    conn = get_db_connection()
+    ids = []
+    bases = {}
+    try:
+        for session_id, problem_id, candidate, code in submissions:
+            if problem_id not in bases:
+                bases[problem_id] = get_base(conn, problem_id)
+            sig = signature(code, bases[problem_id])
+            ids.append(_insert(conn, session_id, problem_id, candidate, sig) if sig is not None else None)
+        conn.commit()
+    finally:
+        conn.close()
+    return ids
+
+
+def check_submission(session_id, problem_id, code, candidate=None, threshold=THRESHOLD, base_code=None):
+    """
+    Looks up near-duplicates of a submission to the same problem, then adds
+    it to the index. `base_code` (the problem's reference and canonical
+    solutions) seeds or updates the problem's base first.
+    """
+    conn = get_db_connection()
+    try:
+        if base_code:
+            seed_base(problem_id, base_code, conn)
+            conn.commit()
+        sig = signature(code, get_base(conn, problem_id))
+    finally:
+        conn.close()
+
+    matches = []
+    if sig is not None:
+        matches = find_similar(code, problem_id, session_id, candidate, threshold, sig=sig)
+        conn = get_db_connection()
+        try:
+            _insert(conn, session_id, problem_id, candidate, sig)
+            conn.commit()
+        finally:
+            conn.close()
+    return {
+        "flagged": bool(matches),
+        "max_similarity": matches[0]["similarity"] if matches else 0.0,
+        "threshold": threshold,
+        "matches": matches
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .database import init_db
+
+    parser = argparse.ArgumentParser(description="Code similarity index")
+    parser.add_argument("--check", metavar="FILE", help="Report stored submissions similar to FILE")
+    parser.add_argument("--problem", help="Problem id FILE was written for")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    init_db()
+    if args.check:
+        with open(args.check, "r", encoding="utf-8") as f:
+            print(json.dumps(find_similar(f.read(), args.problem, threshold=args.threshold), indent=2))
@@ -0,0 +1,57 @@
+import threading
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from .telemetry import RUN_CANCELLATIONS
+
+
+class RunCancelled(Exception):
+    """Raised inside a graph run once its CancelToken is cancelled."""
+
+
+class CancelToken:
+    """Thread-safe flag shared by a request handler and the graph run it started."""
+
+    def __init__(self):
+        self.event = threading.Event()
+
+    def cancel(self):
+        self.event.set()
+
+    @property
+    def cancelled(self):
+        return self.event.is_set()
+
+    def check(self):
+        if self.event.is_set():
+            raise RunCancelled("Run cancelled: the client disconnected.")
+
+
+class CancellationCallback(BaseCallbackHandler):
+    """
+    Stops a graph run at the next node or LLM call after its token is
+    cancelled. A request already sent to the LLM can't be aborted from
+    another thread, but its result is dropped and nothing after it runs.
+    """
+
+    raise_error = True
+
+    def __init__(self, token, endpoint="unknown"):
+        self.token = token
+        self.endpoint = endpoint
+        self.counted = False
+
+    def _check(self):
+        if self.token.cancelled and not self.counted:
+            self.counted = True
+            RUN_CANCELLATIONS.inc(endpoint=self.endpoint)
+        self.token.check()
+
+    def on_chain_start(self, serialized, inputs, **kwargs):
+        self._check()
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self._check()
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self._check()
@@ -0,0 +1,307 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dotenv import load_dotenv
+
+from .cancellation import RunCancelled
+from .config import LLM_FALLBACK_MODELS, LLM_HEDGING, LLM_SLO_SCALE, LLM_TIER_MODELS, LLM_TIERS
+from .telemetry import (
+    LLM_DURATION, LLM_FALLBACKS, LLM_HEDGES, LLM_TIMEOUTS, TelemetryCallback, current_span
+)
+from .recorder import record_llm_call
+
+load_dotenv()
+
+# Model tiers, smallest first; prompts escalate up this list
+TIERS = ("small", "default", "large")
+DEFAULT_MODEL = LLM_TIER_MODELS["default"]
+DEFAULT_FALLBACK_MODEL = LLM_FALLBACK_MODELS["default"]
+
+# Latency SLO (seconds) for one LLM call made by each graph node. A call
+# that misses it is abandoned for the fallback model, then the prompt's
+# templated response. Nodes on the candidate's critical path are tight;
+# the end-of-interview report can take longer.
+NODE_SLOS = {
+    "ambiguity_checker": 4.0,
+    "technical_questions": 6.0,
+    "technical_feedback": 8.0,
+    "self_intro": 8.0,
+    "dsa_questions": 8.0,
+    "code_evaluator": 15.0,
+    "resume_analyst": 20.0,
+    "final_feedback": 30.0,
+    # Offline; nobody is waiting on it
+    "problem_generation": 120.0,
+}
+DEFAULT_SLO = 10.0
+
+# A call still running at its node's observed p95 gets one hedged duplicate.
+# Until a node has MIN_SAMPLES calls the model's p95 across all nodes stands
+# in, and half the SLO before that.
+MIN_SAMPLES = 20
+MIN_HEDGE_DELAY = 0.1
+
+# Hedges may add at most this share of extra requests, so a slow provider
+# doesn't get twice the load (and twice the bill) exactly when it struggles
+HEDGE_BUDGET = 0.1
+HEDGE_BURST = 10
+
+# Consecutive timeouts after which a model is skipped for FALLBACK_COOLDOWN
+TIMEOUTS_BEFORE_FALLBACK = 3
+FALLBACK_COOLDOWN = 60.0
+
+# Upper bound on a single request, so abandoned calls free their thread
+REQUEST_TIMEOUT = 60.0
+
+_llms = {}
+_lock = threading.Lock()
+_factory = None
+
+# Runs every LLM request, so the calling node can stop waiting for one
+_pool = ThreadPoolExecutor(max_workers=64, thread_name_prefix="llm")
+
+_hedge_tokens = HEDGE_BURST
+_timeouts = {}
+_skip_until = {}
+
+
+class LLMTimeout(TimeoutError):
+    """
+    No model answered within the node's SLO, in time or at all, and the
+    prompt has no fallback. Chained to the last error, if any.
+    """
+
+
+def _gemini_factory(model, callbacks):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        model=model,
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+        timeout=REQUEST_TIMEOUT,
+        callbacks=callbacks
+    )
+
+
+def set_llm_factory(factory):
+    """
+    Replaces how chat models are built, e.g. with a fake LLM for offline
+    benchmarks. `factory(model, callbacks)` must return a LangChain chat
+    model. Clients are built on first use, so this must be called before
+    the first LLM call; pass None to restore Gemini.
+    """
+    global _factory
+    with _lock:
+        _factory = factory
+        _llms.clear()
+
+
+def get_llm(model=DEFAULT_MODEL):
+    """
+    Returns the shared chat model for `model`, instrumented with the
+    telemetry callback. Clients are created once per model and reused.
+    """
+    llm = _llms.get(model)
+    if llm is None:
+        with _lock:
+            llm = _llms.get(model)
+            if llm is None:
+                factory = _factory or _gemini_factory
+                llm = factory(model, [TelemetryCallback(model)])
+                _llms[model] = llm
+    return llm
+
+
+def prompt_tier(prompt_name, default="default"):
+    """The tier a prompt runs on: its configured override, else `default`."""
+    tier = LLM_TIERS.get(prompt_name, default)
+    if tier not in TIERS:
+        raise ValueError(f"Unknown model tier {tier!r} for prompt {prompt_name!r}")
+    return tier
+
+
+def tier_model(tier):
+    return LLM_TIER_MODELS[tier]
+
+
+def tier_fallback_model(tier):
+    return LLM_FALLBACK_MODELS[tier]
+
+
+def node_slo(node):
+    return NODE_SLOS.get(node, DEFAULT_SLO) * LLM_SLO_SCALE
+
+
+def hedge_delay(node, model, slo):
+    """How long a call waits before it is hedged: the observed p95, within the SLO."""
+    p95 = LLM_DURATION.quantile(0.95, min_count=MIN_SAMPLES, node=node, model=model)
+    if p95 is None:
+        p95 = LLM_DURATION.quantile(0.95, min_count=MIN_SAMPLES, model=model)
+    if p95 is None:
+        return slo / 2
+    return min(max(p95, MIN_HEDGE_DELAY), slo / 2)
+
+
+def _take_hedge_token():
+    global _hedge_tokens
+    with _lock:
+        if _hedge_tokens >= 1:
+            _hedge_tokens -= 1
+            return True
+        return False
+
+
+def _refill_hedge_tokens():
+    global _hedge_tokens
+    with _lock:
+        _hedge_tokens = min(_hedge_tokens + HEDGE_BUDGET, HEDGE_BURST)
+
+
+def _record_failure(model):
+    # A timeout or an error: either way the model gave no answer
+    with _lock:
+        count = _timeouts[model] = _timeouts.get(model, 0) + 1
+        if count >= TIMEOUTS_BEFORE_FALLBACK:
+            _skip_until[model] = time.monotonic() + FALLBACK_COOLDOWN
+            _timeouts[model] = 0
+
+
+def _record_success(model):
+    with _lock:
+        _timeouts.pop(model, None)
+
+
+def _skipped(model):
+    return _skip_until.get(model, 0.0) > time.monotonic()
+
+
+class _Race:
+    """Concurrent attempts at one call; the first successful response wins."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.attempts = {}
+        self.failed = set()
+        self.error = None
+
+    def launch(self, model, client, kind):
+        # Each attempt runs in a copy of the caller's context, so telemetry
+        # and cancellation still see the node that made the call
+        future = _pool.submit(contextvars.copy_context().run, client.invoke, self.messages)
+        self.attempts[future] = (model, kind)
+
+    def wait(self, timeout):
+        """
+        The first attempt to succeed within `timeout`, or None. Returns
+        None early once every attempt has failed (see exhausted), but a
+        cancelled run is never retried: RunCancelled is re-raised.
+        """
+        deadline = time.monotonic() + timeout
+        pending = set(self.attempts) - self.failed
+        while pending:
+            done, pending = wait(pending, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                return None
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    return future
+                if isinstance(error, RunCancelled):
+                    raise error
+                self.failed.add(future)
+                self.error = error
+        return None
+
+    def exhausted(self, model=None):
+        """Every attempt launched so far (on `model`, if given) has failed with an error."""
+        return all(future in self.failed for future, (name, _) in self.attempts.items() if model in (None, name))
+
+    def abandon(self):
+        # Attempts still queued never reach the provider; running ones
+        # finish in the background and their responses are dropped
+        for future in self.attempts:
+            future.cancel()
+
+
+def invoke(messages, llm=None, model=DEFAULT_MODEL, fallback=None, fallback_model=DEFAULT_FALLBACK_MODEL):
+    """
+    Calls the chat model within the current node's latency SLO (see
+    _invoke). Runs being captured (utils/recorder.py) record the request
+    and the response the node got, whichever model or fallback gave it.
+    """
+    start = time.perf_counter()
+    response = _invoke(messages, llm, model, fallback, fallback_model)
+    record_llm_call(messages, response, model, time.perf_counter() - start)
+    return response
+
+
+def _invoke(messages, llm, model, fallback, fallback_model):
+    """
+    A call still running at the node's p95 is hedged with a duplicate
+    request (within the hedge budget) and the first response is used. A
+    call that misses the SLO, or whose attempts all fail with an error
+    (429, 5xx, a lost connection), is retried on `fallback_model` while
+    any original attempts keep racing; after repeated failures the primary
+    model is skipped for a while. If nothing answers in time, `fallback`
+    (a canned response) is returned, or LLMTimeout is raised without one.
+    An explicit `llm` is hedged but has no model fallback.
+    """
+    if not LLM_HEDGING:
+        return (llm or get_llm(model)).invoke(messages)
+
+    from langchain_core.messages import AIMessage
+
+    span = current_span()
+    node = span["node"] if span else "none"
+    slo = node_slo(node)
+
+    tiers = [(model, llm or get_llm(model))]
+    if llm is None and fallback_model and fallback_model != model:
+        if _skipped(model):
+            tiers.clear()
+        tiers.append((fallback_model, get_llm(fallback_model)))
+
+    _refill_hedge_tokens()
+    race = _Race(messages)
+    winner = None
+    hedged = None
+    try:
+        for name, client in tiers:
+            race.launch(name, client, "primary")
+            delay = hedge_delay(node, name, slo)
+            winner = race.wait(delay)
+            # A model that has just failed outright isn't asked again
+            if winner is None and not race.exhausted(name) and hedged is None and _take_hedge_token():
+                race.launch(name, client, "hedge")
+                hedged = name
+            if winner is None and not race.exhausted():
+                winner = race.wait(slo - delay)
+            if winner is not None:
+                break
+            LLM_TIMEOUTS.inc(node=node, model=name, reason="error" if race.exhausted(name) else "timeout")
+            _record_failure(name)
+    finally:
+        race.abandon()
+
+    if hedged is not None:
+        if winner is None:
+            outcome = "none"
+        elif race.attempts[winner][0] != hedged:
+            outcome = "fallback"
+        else:
+            outcome = race.attempts[winner][1]
+        LLM_HEDGES.inc(node=node, model=hedged, winner=outcome)
+
+    if winner is not None:
+        name, _ = race.attempts[winner]
+        _record_success(name)
+        if name != model:
+            LLM_FALLBACKS.inc(node=node, fallback=name)
+        return winner.result()
+
+    if fallback is not None:
+        LLM_FALLBACKS.inc(node=node, fallback="template")
+        return AIMessage(content=fallback)
+    raise LLMTimeout(f"No LLM response for {node} within {slo:.1f}s") from race.error
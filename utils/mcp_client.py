@@ -4,6 +4,10 @@ import sys
 import os
 import threading
 import queue
+import time
+
+from .telemetry import record_tool_call
+from .config import MCP_TRANSPORT, MCP_URL
 
 class MCPClient:
     def __init__(self, server_script_path):
@@ -12,6 +16,7 @@ class MCPClient:
         self.request_id = 0
         self.pending_requests = {}
         self.running = False
+        self.lock = threading.Lock()
 
     def start(self):
         """Starts the MCP server subprocess."""
@@ -33,6 +38,14 @@ class MCPClient:
         self.reader_thread = threading.Thread(target=self._read_loop, daemon=True)
         self.reader_thread.start()
 
+        # MCP servers reject tool calls until the initialize handshake is done
+        self._request("initialize", {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {},
+            "clientInfo": {"name": "vintervu-backend", "version": "2.0"}
+        })
+        self._send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
     def stop(self):
         """Stops the MCP server subprocess."""
         self.running = False
@@ -48,73 +61,167 @@ class MCPClient:
                 break
             try:
                 response = json.loads(line)
-                if "id" in response and response["id"] in self.pending_requests:
+                pending = self.pending_requests.pop(response.get("id"), None)
+                if pending is not None:
                     # Complete the future/queue
-                    self.pending_requests[response["id"]].put(response)
-                    del self.pending_requests[response["id"]]
+                    pending.put(response)
             except json.JSONDecodeError:
                 pass # Ignore non-JSON lines (logs)
 
     def call_tool(self, tool_name, arguments):
-        """Calls a tool on the MCP server."""
+        """Calls a tool on the MCP server, recording latency and errors."""
+        start = time.perf_counter()
+        error = None
+        try:
+            return self._call_tool(tool_name, arguments)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            record_tool_call(tool_name, time.perf_counter() - start, error)
+
+    def _send(self, message):
+        with self.lock:
+            self.process.stdin.write(json.dumps(message) + "\n")
+            self.process.stdin.flush()
+
+    def _request(self, method, params, timeout=30):
+        """Sends a JSON-RPC request and waits for its response."""
         if not self.process:
             raise RuntimeError("MCP Client is not started.")
 
-        self.request_id += 1
-        current_id = self.request_id
-        
         # Create a queue to wait for response
         response_queue = queue.Queue()
-        self.pending_requests[current_id] = response_queue
-        
-        # Construct JSON-RPC request
-        # Note: FastMCP uses a specific protocol. 
-        # Standard MCP protocol for tools usually involves "tools/call".
-        # Let's try the standard format.
+        with self.lock:
+            self.request_id += 1
+            current_id = self.request_id
+            self.pending_requests[current_id] = response_queue
+
         request = {
             "jsonrpc": "2.0",
-            "method": "tools/call",
-            "params": {
-                "name": tool_name,
-                "arguments": arguments
-            },
+            "method": method,
+            "params": params,
             "id": current_id
         }
-        
+
         # Send request
         try:
-            json_str = json.dumps(request)
-            self.process.stdin.write(json_str + "\n")
-            self.process.stdin.flush()
+            self._send(request)
         except Exception as e:
-            del self.pending_requests[current_id]
+            self.pending_requests.pop(current_id, None)
             raise e
-            
+
         # Wait for response
         try:
-            response = response_queue.get(timeout=30) # 30s timeout
-            if "error" in response:
-                raise Exception(f"MCP Error: {response['error']}")
-            
-            # Result is usually in result.content or similar depending on protocol version
-            # FastMCP returns result directly in 'result' usually?
-            # Let's inspect the response structure if we hit errors.
-            return response.get("result", {}).get("content", [])
-            
+            response = response_queue.get(timeout=timeout)
         except queue.Empty:
-            del self.pending_requests[current_id]
-            raise TimeoutError("MCP Tool call timed out.")
+            self.pending_requests.pop(current_id, None)
+            raise TimeoutError(f"MCP request '{method}' timed out.")
+
+        if "error" in response:
+            raise Exception(f"MCP Error: {response['error']}")
+        return response.get("result", {})
+
+    def _call_tool(self, tool_name, arguments):
+        # Standard MCP protocol for tools is "tools/call"; the tool output is
+        # returned as a list of content items in result.content
+        result = self._request("tools/call", {
+            "name": tool_name,
+            "arguments": arguments
+        })
+        return result.get("content", [])
+
+class HTTPMCPClient(MCPClient):
+    """
+    Talks to one shared MCP server over streamable HTTP (stateless, JSON
+    responses), so multiple backend workers don't each spawn a subprocess.
+    """
+
+    def __init__(self, url):
+        super().__init__(None)
+        self.url = url
+        self.local = threading.local()
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def _session(self):
+        import requests
+
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def _request(self, method, params, timeout=30):
+        with self.lock:
+            self.request_id += 1
+            current_id = self.request_id
+
+        response = self._session().post(
+            self.url,
+            json={"jsonrpc": "2.0", "method": method, "params": params, "id": current_id},
+            headers={"Accept": "application/json, text/event-stream"},
+            timeout=timeout
+        )
+        response.raise_for_status()
+        payload = response.json()
+
+        if "error" in payload:
+            raise Exception(f"MCP Error: {payload['error']}")
+        return payload.get("result", {})
+
+class InProcessMCPClient(MCPClient):
+    """
+    Calls the MCP server's tool functions directly in this process. There is
+    no subprocess, no JSON-RPC and no reader thread. Results come back in
+    the same content-item shape as the other transports. Use stdio instead
+    when tools should be isolated from the API process.
+    """
+
+    def __init__(self):
+        super().__init__(None)
+        self.tools = {}
+
+    def start(self):
+        from mcp_server.server import TOOLS
+        from mcp_server.database import init_db
+
+        init_db()
+        self.tools = TOOLS
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def _request(self, method, params, timeout=30):
+        raise RuntimeError(f"The in-process MCP transport only supports tool calls, not '{method}'.")
+
+    def _call_tool(self, tool_name, arguments):
+        tool = self.tools.get(tool_name)
+        if tool is None:
+            raise Exception(f"MCP Error: Unknown tool: {tool_name}")
+        return [{"type": "text", "text": str(tool(**arguments))}]
 
 # Global client instance
 client = None
+_client_lock = threading.Lock()
 
 def get_client():
     global client
-    if client is None:
-        # Assuming server.py is in mcp_server/server.py relative to project root
-        # We need absolute path
-        base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        server_path = os.path.join(base_path, 'mcp_server', 'server.py')
-        client = MCPClient(server_path)
-        client.start()
+    with _client_lock:
+        if client is None:
+            if MCP_TRANSPORT == "http":
+                client = HTTPMCPClient(MCP_URL)
+            elif MCP_TRANSPORT == "inprocess":
+                client = InProcessMCPClient()
+            else:
+                # Assuming server.py is in mcp_server/server.py relative to project root
+                # We need absolute path
+                base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+                server_path = os.path.join(base_path, 'mcp_server', 'server.py')
+                client = MCPClient(server_path)
+            client.start()
     return client
@@ -0,0 +1,299 @@
+"""
+Opt-in capture of interview traffic for offline replay.
+
+With VINTERVU_RECORD_DIR set, every graph run (one resume analysis or one
+candidate turn) of a sampled session is appended to that session's cassette,
+<dir>/<session_id>.jsonl.gz: the run's input, each node's input and output
+with its timings, and every LLM request and response. Cassettes are gzipped
+JSON lines, one per run, and written with emails, phone numbers and URLs
+masked unless VINTERVU_RECORD_REDACT=0. `redact_cassette` scrubs an existing
+cassette with extra patterns.
+
+benchmarks/replay.py re-executes recorded sessions against the current graph
+with the recorded LLM responses and reports per-node latency and output diffs.
+
+    python -m utils.recorder show cassettes/<session_id>.jsonl.gz
+    python -m utils.recorder redact cassettes/<session_id>.jsonl.gz --pattern "Acme Corp"
+"""
+import contextvars
+import dataclasses
+import functools
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+import zlib
+from contextlib import contextmanager
+
+from .config import RECORD_DIR, RECORD_REDACT, RECORD_SAMPLE
+from .telemetry import current_span
+
+CASSETTE_VERSION = 1
+
+# Masked before anything is written; the same masks are applied to prompts
+# before they are hashed, so replay matches prompts rebuilt from redacted input
+REDACTIONS = (
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), "<email>"),
+    (re.compile(r"https?://\S+|www\.\S+"), "<url>"),
+    (re.compile(r"\+\d[\d ()-]{7,}\d|\(?\b\d{3}\)?[ .-]\d{3}[ .-]\d{4}\b"), "<phone>"),
+)
+
+# Node inputs keep only the newest messages and feedback; earlier ones are
+# in the outputs of earlier nodes
+INPUT_TAIL = 2
+
+# The run being recorded in this context, if any
+_turn = contextvars.ContextVar("vintervu_recorded_turn", default=None)
+
+# Prompt.cache_key of the prompt whose LLM calls run in this context
+_prompt_key = contextvars.ContextVar("vintervu_prompt_key", default=None)
+
+
+def redact(text, patterns=REDACTIONS):
+    for pattern, mask in patterns:
+        text = pattern.sub(mask, text)
+    return text
+
+
+def _scrub(value, patterns):
+    if isinstance(value, str):
+        return redact(value, patterns)
+    if isinstance(value, dict):
+        return {k: _scrub(v, patterns) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_scrub(v, patterns) for v in value]
+    return value
+
+
+def to_jsonable(value):
+    """Plain JSON for state values: records become dicts, Commands their goto and update."""
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {f.name: to_jsonable(getattr(value, f.name)) for f in dataclasses.fields(value)}
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if hasattr(value, "goto") and hasattr(value, "update"):
+        return {"goto": to_jsonable(value.goto), "update": to_jsonable(value.update)}
+    return str(value)
+
+
+def compact_input(state):
+    """A node's input state, with long histories cut to their last INPUT_TAIL entries."""
+    compact = {}
+    for key, value in state.items():
+        if key in ("messages", "feedbacks", "asked_problem_ids") and isinstance(value, list):
+            compact[key] = {"count": len(value), "tail": to_jsonable(value[-INPUT_TAIL:])}
+        else:
+            compact[key] = to_jsonable(value)
+    return compact
+
+
+def prompt_hash(messages):
+    text = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def message_dicts(messages, redacted=RECORD_REDACT):
+    """LLM request messages as {"role", "content"}, masked if `redacted`."""
+    converted = []
+    for message in messages:
+        role = getattr(message, "type", None) or message.get("role", "")
+        content = str(message.content if hasattr(message, "content") else message.get("content", ""))
+        converted.append({"role": role, "content": redact(content) if redacted else content})
+    return converted
+
+
+def sampled(session_id):
+    """Whole sessions are in or out of the sample, decided by their id."""
+    if RECORD_SAMPLE >= 1:
+        return True
+    return zlib.crc32(session_id.encode("utf-8")) % 10000 < RECORD_SAMPLE * 10000
+
+
+def cassette_path(session_id, directory=None):
+    return os.path.join(directory or RECORD_DIR, f"{session_id}.jsonl.gz")
+
+
+def append_turn(turn, directory=None):
+    """Appends one run to its session's cassette as its own gzip member."""
+    if RECORD_REDACT:
+        turn = _scrub(turn, REDACTIONS)
+    path = cassette_path(turn["session_id"], directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = gzip.compress((json.dumps(turn, separators=(",", ":")) + "\n").encode("utf-8"))
+    # One write per run, so runs from several workers never interleave
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+def read_cassette(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def redact_cassette(path, patterns, out=None):
+    """Rewrites a cassette (in place unless `out`) with every regex in `patterns` masked."""
+    compiled = tuple((re.compile(p), "<redacted>") for p in patterns)
+    turns = [_scrub(turn, compiled) for turn in read_cassette(path)]
+    target = out or path
+    tmp = target + ".tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        for turn in turns:
+            f.write(json.dumps(turn, separators=(",", ":")) + "\n")
+    os.replace(tmp, target)
+    return target
+
+
+def turn_record(session_id, input, seed=None):
+    """
+    A run about to be captured. The input is kept in the form replay needs:
+    a resume to analyse, a candidate answer, or a full state (a session
+    rebuilt from client history, or the session's state when its first
+    recorded run comes mid-interview).
+    """
+    turn = {"v": CASSETTE_VERSION, "session_id": session_id, "recorded_at": time.time(), "redacted": RECORD_REDACT}
+    update = getattr(input, "update", None)
+    if isinstance(update, dict) and len(update.get("messages") or []) == 1 and seed is None:
+        turn.update(kind="answer", message=update["messages"][0].content)
+    elif isinstance(input, dict) and input.get("resume_text") and not input.get("messages"):
+        turn.update(kind="resume", resume_text=input["resume_text"])
+    else:
+        state = dict(seed or {})
+        if update is not None:
+            state["messages"] = list(state.get("messages", [])) + list(update.get("messages", []))
+        elif isinstance(input, dict):
+            state.update(input)
+        turn.update(kind="state", state=to_jsonable(state))
+    turn.update(nodes=[], llm=[])
+    return turn
+
+
+@contextmanager
+def capture(turn):
+    """Collects the nodes and LLM calls of the run executed inside the block into `turn`."""
+    token = _turn.set(turn)
+    start = time.perf_counter()
+    try:
+        yield turn
+    except BaseException as e:
+        turn["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _turn.reset(token)
+        turn["seconds"] = time.perf_counter() - start
+
+
+def recorded_node(name, fn):
+    """Wraps a graph node so runs being captured record its input, output and timings."""
+    @functools.wraps(fn)
+    def wrapper(state):
+        turn = _turn.get()
+        if turn is None:
+            return fn(state)
+        entry = {"node": name, "input": compact_input(state)}
+        start = time.perf_counter()
+        try:
+            output = fn(state)
+            entry["output"] = to_jsonable(output)
+            return output
+        except Exception as e:
+            entry["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            entry["seconds"] = time.perf_counter() - start
+            span = current_span()
+            if span is not None:
+                entry["llm_seconds"] = span["llm_seconds"]
+            turn["nodes"].append(entry)
+
+    return wrapper
+
+
+@contextmanager
+def sending_prompt(cache_key):
+    """Tags the LLM calls made inside with the prompt's cache key (see record_llm_call)."""
+    token = _prompt_key.set(cache_key)
+    try:
+        yield
+    finally:
+        _prompt_key.reset(token)
+
+
+def prompt_key():
+    return _prompt_key.get()
+
+
+def record_llm_call(messages, response, model, seconds):
+    """Records one LLM request and the response the node received."""
+    turn = _turn.get()
+    if turn is None:
+        return
+    span = current_span()
+    request = message_dicts(messages)
+    usage = getattr(response, "usage_metadata", None) or {}
+    turn["llm"].append({
+        "node": span["node"] if span else "none",
+        "model": model,
+        "prompt_hash": prompt_hash(request),
+        "cache_key": _prompt_key.get(),
+        "messages": request,
+        "response": str(response.content),
+        "seconds": seconds,
+        "tokens": [usage.get("input_tokens", 0), usage.get("output_tokens", 0)],
+    })
+
+
+class RecordingGraph:
+    """
+    The compiled interview graph, with each run of a sampled session
+    appended to its cassette. Everything except invoke is passed through.
+    """
+
+    def __init__(self, graph, directory=None):
+        self.graph = graph
+        self.directory = directory or RECORD_DIR
+
+    def __getattr__(self, name):
+        return getattr(self.graph, name)
+
+    def invoke(self, input, config=None, **kwargs):
+        session_id = ((config or {}).get("configurable") or {}).get("thread_id")
+        if session_id is None or not sampled(session_id):
+            return self.graph.invoke(input, config, **kwargs)
+
+        seed = None
+        if hasattr(input, "goto") and not os.path.exists(cassette_path(session_id, self.directory)):
+            # First recorded run of a session already under way: keep the state it resumes
+            seed = self.graph.get_state(config).values
+        turn = turn_record(session_id, input, seed)
+        try:
+            with capture(turn):
+                return self.graph.invoke(input, config, **kwargs)
+        finally:
+            append_turn(turn, self.directory)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or redact interview cassettes")
+    sub = parser.add_subparsers(dest="command", required=True)
+    show = sub.add_parser("show", help="Summarise a cassette's runs")
+    show.add_argument("path")
+    scrub = sub.add_parser("redact", help="Mask extra patterns in a cassette")
+    scrub.add_argument("path")
+    scrub.add_argument("--pattern", action="append", required=True, help="Regex to mask (repeatable)")
+    scrub.add_argument("--out", help="Write here instead of in place")
+    args = parser.parse_args()
+
+    if args.command == "show":
+        for i, turn in enumerate(read_cassette(args.path)):
+            nodes = ", ".join(f"{n['node']} {n['seconds']:.2f}s" for n in turn["nodes"])
+            print(f"{i:3d} {turn['kind']:7s} {turn.get('seconds', 0):6.2f}s  {len(turn['llm'])} LLM calls  [{nodes}]")
+    else:
+        print(redact_cassette(args.path, args.pattern, args.out))
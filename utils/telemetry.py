@@ -0,0 +1,329 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Latency buckets (seconds) shared by every histogram. LLM calls dominate, so
+# the upper range is wide enough to separate p95 from p99 stalls.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+MAX_TRACED_SESSIONS = 1000
+MAX_SPANS_PER_SESSION = 500
+TRACE_DIR = os.getenv("VINTERVU_TRACE_DIR")
+
+
+class Histogram:
+    """Minimal Prometheus-style histogram with labels."""
+
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.label_names)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for key, series in sorted(self.series.items()):
+                labels = ",".join(f'{n}="{v}"' for n, v in zip(self.label_names, key))
+                sep = "," if labels else ""
+                for bound, count in zip(self.buckets, series["counts"]):
+                    lines.append(f'{self.name}_bucket{{{labels}{sep}le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{labels}{sep}le="+Inf"}} {series["count"]}')
+                lines.append(f"{self.name}_sum{{{labels}}} {series['sum']}")
+                lines.append(f"{self.name}_count{{{labels}}} {series['count']}")
+        return lines
+
+    def quantile(self, q, min_count=1, **labels):
+        """
+        Bucket-resolution estimate of the q-quantile over the series matching
+        `labels` (labels left out match any value), or None with fewer than
+        `min_count` observations.
+        """
+        wanted = [(i, str(labels[n])) for i, n in enumerate(self.label_names) if n in labels]
+        counts = [0] * len(self.buckets)
+        total = 0
+        with self.lock:
+            for key, series in self.series.items():
+                if all(key[i] == value for i, value in wanted):
+                    counts = [a + b for a, b in zip(counts, series["counts"])]
+                    total += series["count"]
+        if not total or total < min_count:
+            return None
+        rank = q * total
+        for bound, count in zip(self.buckets, counts):
+            if count >= rank:
+                return bound
+        return self.buckets[-1]
+
+
+class Counter:
+    """Minimal Prometheus-style counter with labels."""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.label_names)
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for key, value in sorted(self.series.items()):
+                labels = ",".join(f'{n}="{v}"' for n, v in zip(self.label_names, key))
+                lines.append(f"{self.name}{{{labels}}} {value}")
+        return lines
+
+
+NODE_DURATION = Histogram("vintervu_node_duration_seconds", "Wall time per graph node execution.", ("node",))
+NODE_LLM_DURATION = Histogram("vintervu_node_llm_seconds", "Time spent waiting on the LLM per graph node execution.", ("node",))
+NODE_ERRORS = Counter("vintervu_node_errors_total", "Graph node executions that raised.", ("node",))
+LLM_DURATION = Histogram("vintervu_llm_request_duration_seconds", "Latency of individual LLM requests.", ("node", "model"))
+LLM_TOKENS = Counter("vintervu_llm_tokens_total", "LLM tokens by kind (prompt/completion).", ("node", "model", "kind"))
+LLM_ERRORS = Counter("vintervu_llm_errors_total", "LLM requests that failed.", ("node", "model"))
+MCP_DURATION = Histogram("vintervu_mcp_call_duration_seconds", "Latency of MCP tool calls.", ("tool",))
+MCP_ERRORS = Counter("vintervu_mcp_errors_total", "MCP tool calls that failed.", ("tool",))
+CACHE_HITS = Counter("vintervu_cache_hits_total", "Cache hits by cache name.", ("cache",))
+CACHE_MISSES = Counter("vintervu_cache_misses_total", "Cache misses by cache name.", ("cache",))
+PROMPT_TOKENS = Histogram("vintervu_prompt_tokens", "Estimated tokens of each rendered prompt.", ("node", "prompt", "version"), buckets=TOKEN_BUCKETS)
+PROMPT_TRUNCATIONS = Counter("vintervu_prompt_truncations_total", "Prompt inputs cut down to fit their token budget.", ("prompt", "input"))
+RUN_CANCELLATIONS = Counter("vintervu_run_cancellations_total", "Graph runs stopped because every waiting client went away.", ("endpoint",))
+LLM_TIER_DURATION = Histogram("vintervu_llm_tier_duration_seconds", "Latency of prompt calls by model tier, hedges and fallbacks included.", ("tier", "prompt"))
+LLM_TIER_TOKENS = Counter("vintervu_llm_tier_tokens_total", "LLM tokens by model tier and kind (prompt/completion).", ("tier", "kind"))
+LLM_ESCALATIONS = Counter("vintervu_llm_escalations_total", "Prompt calls retried on a larger tier after invalid output, by the tier that failed.", ("prompt", "tier"))
+LLM_HEDGES = Counter("vintervu_llm_hedges_total", "Hedged duplicate LLM requests, by which request answered first.", ("node", "model", "winner"))
+LLM_TIMEOUTS = Counter("vintervu_llm_timeouts_total", "LLM calls a model didn't answer within their node's latency SLO, by reason (timeout/error).", ("node", "model", "reason"))
+LLM_FALLBACKS = Counter("vintervu_llm_fallbacks_total", "LLM calls answered by a fallback (model or template).", ("node", "fallback"))
+ADMISSION_REJECTIONS = Counter("vintervu_admission_rejections_total", "Requests turned away with 429, by kind of run and limit hit (sessions/queue/timeout).", ("kind", "reason"))
+QUEUE_WAIT = Histogram("vintervu_queue_wait_seconds", "Time admitted graph runs spent queued for a slot.", ("kind",))
+RESUME_CHUNKS = Counter("vintervu_resume_chunks_total", "Resume chunks extracted in chunked resume analysis, by outcome (parsed/dropped).", ("outcome",))
+
+METRICS = [
+    NODE_DURATION, NODE_LLM_DURATION, NODE_ERRORS,
+    LLM_DURATION, LLM_TOKENS, LLM_ERRORS,
+    MCP_DURATION, MCP_ERRORS,
+    CACHE_HITS, CACHE_MISSES,
+    PROMPT_TOKENS, PROMPT_TRUNCATIONS,
+    RUN_CANCELLATIONS,
+    LLM_TIER_DURATION, LLM_TIER_TOKENS, LLM_ESCALATIONS,
+    LLM_HEDGES, LLM_TIMEOUTS, LLM_FALLBACKS,
+    ADMISSION_REJECTIONS, QUEUE_WAIT,
+    RESUME_CHUNKS,
+]
+
+
+def render_prometheus():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# The span of the node currently executing, so LLM and MCP calls made inside
+# it are attributed to that node and session.
+_current_span = contextvars.ContextVar("vintervu_current_span", default=None)
+
+_traces = OrderedDict()
+_traces_lock = threading.Lock()
+
+
+def current_span():
+    return _current_span.get()
+
+
+def _record_span(span):
+    session_id = span.get("session_id") or "unknown"
+    with _traces_lock:
+        spans = _traces.get(session_id)
+        if spans is None:
+            spans = _traces[session_id] = deque(maxlen=MAX_SPANS_PER_SESSION)
+            while len(_traces) > MAX_TRACED_SESSIONS:
+                _traces.popitem(last=False)
+        else:
+            _traces.move_to_end(session_id)
+        spans.append(span)
+
+    if TRACE_DIR:
+        dump_span(span, TRACE_DIR)
+
+
+def dump_span(span, directory):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{span.get('session_id') or 'unknown'}.jsonl")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(span) + "\n")
+
+
+def get_session_trace(session_id):
+    with _traces_lock:
+        return list(_traces.get(session_id, []))
+
+
+def dump_session_trace(session_id, path):
+    """Writes a session's recorded spans to a JSON file and returns the path."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"session_id": session_id, "spans": get_session_trace(session_id)}, f, indent=2)
+    return path
+
+
+def traced_node(name, fn):
+    """
+    Wraps a graph node so each execution records wall time, LLM time, tokens,
+    tool calls and errors, both as metrics and as a span in the session trace.
+    """
+    @functools.wraps(fn)
+    def wrapper(state):
+        span = {
+            "node": name,
+            "session_id": state.get("session_id"),
+            "started_at": time.time(),
+            "llm_seconds": 0.0,
+            "llm_calls": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "tool_calls": 0,
+            "cache_hits": 0,
+            "rendered_tokens": 0,
+            "truncations": 0,
+            "error": None,
+        }
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            return fn(state)
+        except Exception as e:
+            span["error"] = f"{type(e).__name__}: {e}"
+            NODE_ERRORS.inc(node=name)
+            raise
+        finally:
+            _current_span.reset(token)
+            span["wall_seconds"] = time.perf_counter() - start
+            NODE_DURATION.observe(span["wall_seconds"], node=name)
+            NODE_LLM_DURATION.observe(span["llm_seconds"], node=name)
+            _record_span(span)
+
+    return wrapper
+
+
+def record_tool_call(tool_name, seconds, error=None):
+    MCP_DURATION.observe(seconds, tool=tool_name)
+    if error is not None:
+        MCP_ERRORS.inc(tool=tool_name)
+    span = _current_span.get()
+    if span is not None:
+        span["tool_calls"] += 1
+
+
+def record_cache(cache_name, hit):
+    if hit:
+        CACHE_HITS.inc(cache=cache_name)
+        span = _current_span.get()
+        if span is not None:
+            span["cache_hits"] += 1
+    else:
+        CACHE_MISSES.inc(cache=cache_name)
+
+
+def record_prompt(prompt_name, version, tokens, truncated=()):
+    """Records the estimated size of a rendered prompt and any inputs that were cut."""
+    span = _current_span.get()
+    node = span["node"] if span else "none"
+    PROMPT_TOKENS.observe(tokens, node=node, prompt=prompt_name, version=version)
+    for name in truncated:
+        PROMPT_TRUNCATIONS.inc(prompt=prompt_name, input=name)
+    if span is not None:
+        span["rendered_tokens"] += tokens
+        span["truncations"] += len(truncated)
+
+
+def record_tier_call(tier, prompt_name, seconds, message):
+    """Records one prompt call against its model tier (`message` is the AI message used)."""
+    LLM_TIER_DURATION.observe(seconds, tier=tier, prompt=prompt_name)
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        LLM_TIER_TOKENS.inc(usage.get("input_tokens", 0), tier=tier, kind="prompt")
+        LLM_TIER_TOKENS.inc(usage.get("output_tokens", 0), tier=tier, kind="completion")
+
+
+def record_escalation(prompt_name, tier):
+    LLM_ESCALATIONS.inc(prompt=prompt_name, tier=tier)
+
+
+def record_resume_chunks(parsed, dropped):
+    RESUME_CHUNKS.inc(parsed, outcome="parsed")
+    RESUME_CHUNKS.inc(dropped, outcome="dropped")
+
+
+def _token_usage(response):
+    """Pulls (prompt, completion) token counts out of an LLMResult."""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+
+class TelemetryCallback(BaseCallbackHandler):
+    """LangChain callback that times LLM requests and counts their tokens."""
+
+    def __init__(self, model):
+        self.model = model
+        self.started = {}
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self.started[run_id] = time.perf_counter()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self.started[run_id] = time.perf_counter()
+
+    def _finish(self, run_id):
+        start = self.started.pop(run_id, None)
+        seconds = time.perf_counter() - start if start is not None else 0.0
+        span = _current_span.get()
+        node = span["node"] if span else "none"
+        LLM_DURATION.observe(seconds, node=node, model=self.model)
+        if span is not None:
+            span["llm_seconds"] += seconds
+            span["llm_calls"] += 1
+        return span, node
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        span, node = self._finish(run_id)
+        prompt_tokens, completion_tokens = _token_usage(response)
+        LLM_TOKENS.inc(prompt_tokens, node=node, model=self.model, kind="prompt")
+        LLM_TOKENS.inc(completion_tokens, node=node, model=self.model, kind="completion")
+        if span is not None:
+            span["prompt_tokens"] += prompt_tokens
+            span["completion_tokens"] += completion_tokens
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        _, node = self._finish(run_id)
+        LLM_ERRORS.inc(node=node, model=self.model)